@@ -0,0 +1,186 @@
+import os
+import uuid
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from resume_model import normalize_resume
+
+DEFAULT_EXPORT_DIR = os.environ.get("RESUME_EXPORT_DIR", "exports")
+DEFAULT_CHUNK_SIZE = 5000
+
+_category = pa.dictionary(pa.int32(), pa.string())
+
+RESUME_SCHEMA = pa.schema([
+    ("resume_id", pa.string()),
+    ("batch_id", pa.string()),
+    ("department", pa.string()),
+    ("sub_department", _category),
+    ("experience_years", pa.int16()),
+    ("name", pa.string()),
+    ("email", pa.string()),
+    ("phone", pa.string()),
+    ("summary", pa.string()),
+    ("num_skills", pa.int16()),
+    ("num_positions", pa.int16()),
+    ("num_certifications", pa.int16()),
+    ("degree", pa.string()),
+    ("university", pa.string()),
+    ("graduation_year", pa.string()),
+    ("exported_at", pa.timestamp("ms", tz="UTC")),
+])
+
+EXPERIENCE_SCHEMA = pa.schema([
+    ("resume_id", pa.string()),
+    ("batch_id", pa.string()),
+    ("department", pa.string()),
+    ("position_index", pa.int16()),
+    ("title", pa.string()),
+    ("company", pa.string()),
+    ("duration", pa.string()),
+    ("num_responsibilities", pa.int16()),
+])
+
+SKILL_SCHEMA = pa.schema([
+    ("resume_id", pa.string()),
+    ("batch_id", pa.string()),
+    ("department", pa.string()),
+    ("skill_index", pa.int16()),
+    ("skill", _category),
+])
+
+TABLES = {"resumes": RESUME_SCHEMA, "experiences": EXPERIENCE_SCHEMA, "skills": SKILL_SCHEMA}
+
+
+class ParquetExporter:
+    """Flatten resumes into Arrow tables and stream them to partitioned Parquet"""
+
+    def __init__(self, root=DEFAULT_EXPORT_DIR, batch_id=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.root = root
+        self.batch_id = batch_id or f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self.chunk_size = chunk_size
+        self.rows_written = 0
+        self._chunk_index = 0
+        self._rows = {table: {field.name: [] for field in schema} for table, schema in TABLES.items()}
+        self._pending = 0
+
+    def add(self, resume_data, department="", sub_department="", experience_years=None, resume_id=None):
+        """Buffer one resume; flushes automatically every chunk_size resumes"""
+        resume = normalize_resume(resume_data)
+        resume_id = resume_id or f"{self.batch_id}-{self.rows_written + self._pending:06d}"
+        department = department or "unknown"
+        first_education = resume.education[0] if resume.education else None
+
+        self._append("resumes", {
+            "resume_id": resume_id,
+            "batch_id": self.batch_id,
+            "department": department,
+            "sub_department": sub_department,
+            "experience_years": experience_years,
+            "name": resume.name,
+            "email": resume.email,
+            "phone": resume.phone,
+            "summary": resume.summary,
+            "num_skills": len(resume.skills),
+            "num_positions": len(resume.experience),
+            "num_certifications": len(resume.certifications),
+            "degree": first_education.degree if first_education else None,
+            "university": first_education.university if first_education else None,
+            "graduation_year": first_education.year if first_education else None,
+            "exported_at": datetime.now(timezone.utc),
+        })
+        for position_index, exp in enumerate(resume.experience):
+            self._append("experiences", {
+                "resume_id": resume_id,
+                "batch_id": self.batch_id,
+                "department": department,
+                "position_index": position_index,
+                "title": exp.title,
+                "company": exp.company,
+                "duration": exp.duration,
+                "num_responsibilities": len(exp.responsibilities),
+            })
+        for skill_index, skill in enumerate(resume.skills):
+            self._append("skills", {
+                "resume_id": resume_id,
+                "batch_id": self.batch_id,
+                "department": department,
+                "skill_index": skill_index,
+                "skill": skill,
+            })
+
+        self._pending += 1
+        if self._pending >= self.chunk_size:
+            self.flush()
+        return resume_id
+
+    def _append(self, table, row):
+        columns = self._rows[table]
+        for name, value in row.items():
+            columns[name].append(value)
+
+    def flush(self):
+        """Write buffered rows as one Parquet file per table and department"""
+        if not self._pending:
+            return
+        for table, schema in TABLES.items():
+            columns = self._rows[table]
+            if columns["resume_id"]:
+                pq.write_to_dataset(
+                    pa.Table.from_pydict(columns, schema=schema),
+                    os.path.join(self.root, table),
+                    partition_cols=["department"],
+                    basename_template=f"{self.batch_id}-{self._chunk_index:05d}-{{i}}.parquet",
+                    existing_data_behavior="overwrite_or_ignore",
+                )
+            for values in columns.values():
+                values.clear()
+        self.rows_written += self._pending
+        self._pending = 0
+        self._chunk_index += 1
+
+    def close(self):
+        self.flush()
+        return self.rows_written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def export_resumes(resumes, root=DEFAULT_EXPORT_DIR, batch_id=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                   department="", sub_department="", experience_years=None, metadata=None):
+    """Export resumes in streaming chunks; metadata optionally gives per-resume add() kwargs"""
+    with ParquetExporter(root, batch_id, chunk_size) as exporter:
+        for index, resume in enumerate(resumes):
+            fields = {"department": department, "sub_department": sub_department,
+                      "experience_years": experience_years}
+            if metadata:
+                fields.update(metadata[index])
+            exporter.add(resume, **fields)
+    return exporter
+
+
+def load_table(table, root=DEFAULT_EXPORT_DIR, columns=None, filters=None):
+    """Read an exported table back, memory-mapping the Parquet files"""
+    return pq.read_table(
+        os.path.join(root, table),
+        columns=columns,
+        filters=filters,
+        memory_map=True,
+        partitioning="hive",
+    )
+
+
+def skill_distribution(root=DEFAULT_EXPORT_DIR, department=None, top=25):
+    """Most common skills across exported resumes, optionally for one department"""
+    filters = [("department", "=", department)] if department else None
+    # Each Parquet file carries its own skill dictionary
+    skills = load_table("skills", root, columns=["skill", "resume_id"], filters=filters).unify_dictionaries()
+    counts = skills.group_by("skill").aggregate([("resume_id", "count_distinct")])
+    order = pc.sort_indices(counts, sort_keys=[("resume_id_count_distinct", "descending")])
+    return counts.take(order).slice(0, top).rename_columns(["skill", "resumes"])
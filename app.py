@@ -3,173 +3,103 @@ os.environ['GRPC_VERBOSITY'] = 'ERROR'
 os.environ['GLOG_minloglevel'] = '2'
 
 import streamlit as st
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import PromptTemplate
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable
-from reportlab.lib.enums import TA_LEFT, TA_CENTER
-import io
-import json
-import random
-import time
-from datetime import datetime
-from faker import Faker
-
-fake = Faker()
+from generator import BatchSpec, build_chain, start_batch, continue_batch, format_eta, resume_prompt, batch_profile_label
+from checkpoints import list_batches
+from rate_control import controller_for
+from response_log import ResponseLog
+from shared_store import shared_store, cached_render
+from profiling import PROFILE_BY_DEFAULT, find_report
+from analytics_export import export_resumes, DEFAULT_EXPORT_DIR
+from renderers import render_pdf
+from functools import partial
 
 st.set_page_config(page_title="Professional Resume Generator", layout="wide")
 
 if 'generated_resumes' not in st.session_state:
     st.session_state.generated_resumes = []
-
-def generate_fake_phone():
-    return fake.phone_number()
-
-def generate_fake_email(name):
-    return fake.email()
-
-def generate_unique_name(index, department, name_hint=None):
-    if name_hint:
-        for _ in range(10):
-            name = fake.name()
-            if name[0].upper() == name_hint.upper():
-                return name
-        return fake.name()
+if 'generated_meta' not in st.session_state:
+    st.session_state.generated_meta = []
+if 'generated_pdfs' not in st.session_state:
+    st.session_state.generated_pdfs = []
+if 'generation_job' not in st.session_state:
+    st.session_state.generation_job = None
+
+# Every reply is logged; a rerun with the same seed and spec is served from the log
+@st.cache_resource
+def get_response_log():
+    return ResponseLog(prompt=resume_prompt, mode='cache', shared=shared_store())
+
+def running_batches():
+    """{batch_id: owner} of batches any server process is running right now (shared-store mode only)"""
+    store = shared_store()
+    if store is None:
+        return {}
+    return {job['job_id']: job['owner'] for job in store.jobs(running_only=True)}
+
+def collect_job_results(job):
+    """Copy a finished job's resumes into the session (once)"""
+    if st.session_state.get('collected_job') is not job:
+        results = job.channel.results()
+        st.session_state.generated_resumes = [resume for resume, meta in results]
+        st.session_state.generated_meta = [meta for resume, meta in results]
+        st.session_state.generated_pdfs = job.channel.renders()
+        st.session_state.collected_job = job
+
+def show_profile_report(report):
+    """Top functions of a saved profile, with the flame graph for speedscope.app"""
+    st.caption(f"🔬 Profiled {report.elapsed:.1f}s ({report.samples} samples) - pstats: `{report.pstats_path}`")
+    st.dataframe(report.top, use_container_width=True, hide_index=True)
+    with open(report.speedscope_path, "rb") as f:
+        st.download_button("⬇️ Flame graph (speedscope JSON)", f.read(),
+                           file_name=os.path.basename(report.speedscope_path), mime="application/json",
+                           key=f"profile_{report.label}")
+
+def show_progress_summary(progress):
+    st.progress(progress.fraction)
+    eta = f" · ETA {format_eta(progress.eta_seconds)}" if not progress.finished else ""
+    st.caption(
+        f"Queued {progress.queued} · In flight {progress.in_flight} · "
+        f"Done {progress.done} · Failed {progress.failed}{eta}"
+    )
+    if progress.stages:
+        st.caption("⚙️ " + " · ".join(
+            f"{stage['name']} {stage['processed']} at {stage['throughput']:.1f}/s" for stage in progress.stages
+        ))
+    for level, text in progress.messages:
+        if level == 'error':
+            st.error(text)
+        elif level == 'warning':
+            st.warning(text)
+        else:
+            st.caption(text)
+
+def continue_generation(batch_id):
+    """Restart a checkpointed batch, generating only the items it is missing"""
+    if not api_key:
+        st.error("Please enter your Google API Key in the sidebar")
+    elif st.session_state.generation_job and st.session_state.generation_job.is_running():
+        st.warning("A batch is already running - wait for it to finish or cancel it")
+    elif batch_id in (busy := running_batches()):
+        st.warning(f"Batch {batch_id} is still running on {busy[batch_id]}")
     else:
-        return fake.name()
-
-resume_prompt = PromptTemplate(
-    input_variables=["department", "sub_department", "experience", "seed", "name_hint"],
-    template="""Generate a detailed professional resume for a candidate with the following profile:
-    
-Department: {department}
-Sub-Department: {sub_department}
-Years of Experience: {experience}
-Unique Identifier: {seed}
-Name must start with letter: {name_hint}
-
-CRITICAL REQUIREMENTS:
-1. MUST use a COMPLETELY DIFFERENT name starting with the letter "{name_hint}"
-2. MUST use DIFFERENT companies than previous resumes
-3. MUST use DIFFERENT universities
-4. Generate UNIQUE and DIVERSE content - no repetition
-
-Create a complete resume with the following sections in JSON format:
-1. Full Name (MUST start with "{name_hint}" - be creative with first and last names)
-2. Professional Summary (3-4 sentences, unique achievements)
-3. Skills (8-12 relevant technical and soft skills)
-4. Work Experience (2-3 positions with DIFFERENT company names, job titles, dates, and 4-5 bullet points each)
-5. Education (degree, DIFFERENT university name, graduation year)
-6. Certifications (2-3 relevant certifications)
-
-Return ONLY a valid JSON object with this structure:
-{{
-    "name": "Full Name starting with {name_hint}",
-    "summary": "Professional summary text",
-    "skills": ["skill1", "skill2", ...],
-    "experience": [
-        {{
-            "title": "Job Title",
-            "company": "Company Name",
-            "duration": "Start Date - End Date",
-            "responsibilities": ["resp1", "resp2", ...]
-        }}
-    ],
-    "education": {{
-        "degree": "Degree Name",
-        "university": "University Name",
-        "year": "Year"
-    }},
-    "certifications": ["cert1", "cert2", ...]
-}}
-
-Make it realistic and professional for the specified department and experience level."""
-)
+        st.session_state.generation_job = continue_batch(
+            build_chain(api_key), batch_id, controller_for(api_key), responses=get_response_log(), shared=shared_store(),
+            profile=profile_batches, render_pdfs=True
+        )
+        st.rerun()
 
-def generate_pdf(resume_data):
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    story = []
-    
-    styles = getSampleStyleSheet()
-    
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor='#2C3E50',
-        spaceAfter=6,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    contact_style = ParagraphStyle(
-        'Contact',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor='#5D6D7E',
-        alignment=TA_CENTER,
-        spaceAfter=12
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor='#34495E',
-        spaceAfter=8,
-        spaceBefore=12,
-        fontName='Helvetica-Bold'
-    )
-    
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor='#2C3E50',
-        spaceAfter=6,
-        leading=14
-    )
-    
-    story.append(Paragraph(resume_data['name'], title_style))
-    
-    contact_text = f"{resume_data['email']} | {resume_data['phone']}"
-    story.append(Paragraph(contact_text, contact_style))
-    story.append(HRFlowable(width="100%", thickness=1, color='#BDC3C7', spaceAfter=12))
-    
-    story.append(Paragraph("PROFESSIONAL SUMMARY", heading_style))
-    story.append(Paragraph(resume_data['summary'], body_style))
-    story.append(Spacer(1, 0.1*inch))
-    
-    story.append(Paragraph("SKILLS", heading_style))
-    skills_text = " • ".join(resume_data['skills'])
-    story.append(Paragraph(skills_text, body_style))
-    story.append(Spacer(1, 0.1*inch))
-    
-    story.append(Paragraph("WORK EXPERIENCE", heading_style))
-    for exp in resume_data['experience']:
-        title_company = f"<b>{exp['title']}</b> - {exp['company']}"
-        story.append(Paragraph(title_company, body_style))
-        story.append(Paragraph(f"<i>{exp['duration']}</i>", body_style))
-        for resp in exp['responsibilities']:
-            story.append(Paragraph(f"• {resp}", body_style))
-        story.append(Spacer(1, 0.1*inch))
-    
-    story.append(Paragraph("EDUCATION", heading_style))
-    edu_text = f"<b>{resume_data['education']['degree']}</b><br/>{resume_data['education']['university']}<br/>{resume_data['education']['year']}"
-    story.append(Paragraph(edu_text, body_style))
-    story.append(Spacer(1, 0.1*inch))
-    
-    if resume_data['certifications']:
-        story.append(Paragraph("CERTIFICATIONS", heading_style))
-        for cert in resume_data['certifications']:
-            story.append(Paragraph(f"• {cert}", body_style))
-    
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
+# Polls the background job; the server thread stays free while the batch runs
+@st.fragment(run_every=1)
+def show_generation_progress():
+    job = st.session_state.generation_job
+    progress = job.channel.snapshot()
+    if progress.finished:
+        collect_job_results(job)
+        st.rerun()
+    st.text(progress.status or "Starting...")
+    show_progress_summary(progress)
+    if st.button("⏹️ Cancel", key="cancel_generation"):
+        job.cancel()
 
 st.title("🎯 Professional Resume Generator")
 st.markdown("Generate multiple professional resumes using AI")
@@ -178,6 +108,8 @@ with st.sidebar:
     st.header("Resume Configuration")
     
     api_key = st.text_input("Google API Key", type="password", help="Enter your Gemini API key")
+    if api_key:
+        st.caption(f"⚡ Learned rate for this key: {controller_for(api_key).describe()}")
     
     st.info("💡 **Free Tier Limits**: Generate 2-5 resumes at a time to avoid rate limits")
     
@@ -186,11 +118,34 @@ with st.sidebar:
     experience = st.number_input("Years of Experience", min_value=0, max_value=50, value=3)
     quantity = st.number_input("Number of Resumes", min_value=1, max_value=20, value=3, 
                                 help="Recommended: 2-5 resumes at a time for free tier")
+    run_seed = st.number_input("Run seed", min_value=0, value=0, step=1,
+                               help="0 picks a new seed; reuse a batch's seed to reproduce it from the response log")
     
+    profile_batches = st.toggle("🔬 Profile batches", value=PROFILE_BY_DEFAULT,
+                                help="Save a pstats profile and a flame graph of each batch run")
     generate_button = st.button("🚀 Generate Resumes", type="primary", use_container_width=True)
     
+    busy_batches = running_batches()
+    if busy_batches:
+        st.caption(f"🖥️ {len(busy_batches)} batch(es) running across server processes")
+    incomplete_batches = [b for b in list_batches(incomplete_only=True) if b['batch_id'] not in busy_batches]
+    if incomplete_batches:
+        with st.expander(f"♻️ Incomplete batches ({len(incomplete_batches)})"):
+            batch_labels = {
+                f"{b['spec']['department']} / {b['spec']['sub_department']} - {b['done']}/{b['total']} ({b['created_at'][:16]})": b['batch_id']
+                for b in incomplete_batches[:10]
+            }
+            selected_batch = st.selectbox("Batch", list(batch_labels))
+            if st.button("🔁 Continue selected batch", use_container_width=True):
+                continue_generation(batch_labels[selected_batch])
+    
     if st.button("Clear All", use_container_width=True):
+        if st.session_state.generation_job:
+            st.session_state.generation_job.cancel()
+        st.session_state.generation_job = None
         st.session_state.generated_resumes = []
+        st.session_state.generated_meta = []
+        st.session_state.generated_pdfs = []
         st.rerun()
 
 if generate_button:
@@ -198,112 +153,62 @@ if generate_button:
         st.error("Please enter your Google API Key in the sidebar")
     elif not department or not sub_department:
         st.error("Please fill in Department and Sub-Department fields")
+    elif st.session_state.generation_job and st.session_state.generation_job.is_running():
+        st.warning("A batch is already running - wait for it to finish or cancel it")
     else:
         try:
-            llm = ChatGoogleGenerativeAI(
-                model="gemini-2.0-flash",
-                google_api_key=api_key,
-                temperature=1.0
-            )
-            
-            chain = resume_prompt | llm
-            
+            chain = build_chain(api_key)
             st.session_state.generated_resumes = []
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            name_letters = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'J', 'K', 'L', 'M', 'N', 'P', 'R', 'S', 'T', 'V', 'W', 'Z']
-            
-            for i in range(quantity):
-                status_text.text(f"Generating resume {i+1} of {quantity}... (This may take a moment)")
-                
-                if i > 0:
-                    time.sleep(4)
-                
-                max_retries = 3
-                retry_count = 0
-                
-                while retry_count < max_retries:
-                    try:
-                        experience_variation = experience + random.randint(-1, 2)
-                        if experience_variation < 0:
-                            experience_variation = 0
-                        
-                        unique_seed = f"RESUME-{i}-{random.randint(10000, 99999)}-{int(time.time() * 1000)}"
-                        name_hint = name_letters[i % len(name_letters)]
-                        
-                        status_text.text(f"Generating resume {i+1} of {quantity}... Calling API...")
-                        
-                        response = chain.invoke({
-                            "department": department,
-                            "sub_department": sub_department,
-                            "experience": experience_variation,
-                            "seed": unique_seed,
-                            "name_hint": name_hint
-                        })
-                        
-                        status_text.text(f"Generating resume {i+1} of {quantity}... Parsing response...")
-                        
-                        resume_text = response.content
-                        
-                        st.sidebar.text(f"Response preview: {resume_text[:200]}...")
-                        
-                        if "```json" in resume_text:
-                            resume_text = resume_text.split("```json")[1].split("```")[0]
-                        elif "```" in resume_text:
-                            resume_text = resume_text.split("```")[1].split("```")[0]
-                        
-                        resume_data = json.loads(resume_text.strip())
-                        
-                        unique_name = generate_unique_name(i, department, name_hint)
-                        resume_data['name'] = unique_name
-                        
-                        resume_data['email'] = generate_fake_email(resume_data['name'])
-                        resume_data['phone'] = generate_fake_phone()
-                        
-                        st.session_state.generated_resumes.append(resume_data)
-                        status_text.text(f"✅ Resume {i+1} completed!")
-                        break
-                        
-                    except json.JSONDecodeError as je:
-                        st.error(f"JSON Parse Error on resume {i+1}: {str(je)}")
-                        st.code(resume_text[:500] if 'resume_text' in locals() else "No response text")
-                        break
-                    except Exception as e:
-                        error_msg = str(e)
-                        st.error(f"Error details: {error_msg}")
-                        if "429" in error_msg or "quota" in error_msg.lower():
-                            retry_count += 1
-                            if retry_count < max_retries:
-                                wait_time = 25 * retry_count
-                                status_text.text(f"Rate limit hit. Waiting {wait_time} seconds before retry {retry_count}/{max_retries}...")
-                                time.sleep(wait_time)
-                            else:
-                                st.error(f"Rate limit exceeded. Successfully generated {len(st.session_state.generated_resumes)} resumes. Please wait a few minutes and try again for the remaining resumes.")
-                                break
-                        else:
-                            st.error(f"Error on resume {i+1}: {error_msg}")
-                            break
-                
-                progress_bar.progress((i + 1) / quantity)
-            
-            status_text.text(f"✅ Successfully generated {len(st.session_state.generated_resumes)} resumes!")
-            if len(st.session_state.generated_resumes) == quantity:
-                st.success(f"Generated {quantity} professional resumes!")
-            else:
-                st.warning(f"Generated {len(st.session_state.generated_resumes)} out of {quantity} resumes due to rate limits.")
-            
+            st.session_state.generated_meta = []
+            st.session_state.generated_pdfs = []
+            spec = BatchSpec(department, sub_department, experience, quantity, int(run_seed) or None)
+            st.session_state.generation_job = start_batch(
+                chain, spec, controller_for(api_key), responses=get_response_log(), shared=shared_store(),
+                profile=profile_batches, render_pdfs=True
+            )
         except Exception as e:
             st.error(f"Error generating resumes: {str(e)}")
-            if "429" in str(e) or "quota" in str(e).lower():
+
+job = st.session_state.generation_job
+if job:
+    if job.is_running():
+        show_generation_progress()
+    else:
+        collect_job_results(job)
+        progress = job.channel.snapshot()
+        with st.expander("Last batch", expanded=progress.done < progress.total):
+            show_progress_summary(progress)
+            report = find_report(batch_profile_label(job.name))
+            if report:
+                show_profile_report(report)
+        if progress.cancelled:
+            st.warning(f"Batch cancelled after {progress.done} of {progress.total} resumes.")
+        elif progress.done == progress.total:
+            st.success(f"Generated {progress.total} professional resumes!")
+        else:
+            st.warning(f"Generated {progress.done} out of {progress.total} resumes.")
+            if any("Rate limit" in text for level, text in progress.messages):
                 st.info("💡 **Tip**: You've hit the API rate limit. Try:\n- Reducing the quantity\n- Waiting a few minutes\n- Using a different API key\n- Upgrading to a paid plan")
+        if progress.done < progress.total:
+            st.caption(f"Finished items are checkpointed (batch {job.name}); continuing reuses their seeds and only calls the API for the rest.")
+            if st.button(f"🔁 Continue batch ({progress.total - progress.done} missing)", type="primary"):
+                continue_generation(job.name)
 
 if st.session_state.generated_resumes:
     st.markdown("---")
     st.header("Generated Resumes")
     
+    if st.button("📊 Export batch to Parquet", help="Write resumes, experiences and skills as partitioned Parquet tables for analytics"):
+        exporter = export_resumes(
+            st.session_state.generated_resumes,
+            metadata=st.session_state.generated_meta
+        )
+        st.success(f"Exported {exporter.rows_written} resumes to {DEFAULT_EXPORT_DIR}/ (batch {exporter.batch_id})")
+    
     cols_per_row = 2
     resumes = st.session_state.generated_resumes
+    # PDFs rendered by the batch pipeline while later resumes were still being generated
+    pdfs = st.session_state.generated_pdfs
     
     for i in range(0, len(resumes), cols_per_row):
         cols = st.columns(cols_per_row)
@@ -311,28 +216,28 @@ if st.session_state.generated_resumes:
         for j, col in enumerate(cols):
             if i + j < len(resumes):
                 resume = resumes[i + j]
+                pdf = pdfs[i + j] if i + j < len(pdfs) else None
                 
                 with col:
                     with st.container(border=True):
-                        st.subheader(f"👤 {resume['name']}")
-                        st.caption(f"📧 {resume['email']} | 📱 {resume['phone']}")
+                        st.subheader(f"👤 {resume.name}")
+                        st.caption(f"📧 {resume.email} | 📱 {resume.phone}")
                         
                         with st.expander("View Details", expanded=False):
                             st.markdown("**Summary:**")
-                            st.write(resume['summary'])
+                            st.write(resume.summary)
                             
                             st.markdown("**Skills:**")
-                            st.write(", ".join(resume['skills'][:5]) + "...")
+                            st.write(", ".join(resume.skills[:5]) + "...")
                             
                             st.markdown("**Experience:**")
-                            for exp in resume['experience'][:2]:
-                                st.write(f"• {exp['title']} at {exp['company']}")
+                            for exp in resume.experience[:2]:
+                                st.write(f"• {exp.title} at {exp.company}")
                         
-                        pdf_buffer = generate_pdf(resume)
                         st.download_button(
                             label="📥 Download PDF",
-                            data=pdf_buffer,
-                            file_name=f"resume_{resume['name'].replace(' ', '_')}.pdf",
+                            data=pdf or partial(cached_render, 'pdf', partial(render_pdf, resume), resume),
+                            file_name=f"resume_{resume.name.replace(' ', '_')}.pdf",
                             mime="application/pdf",
                             use_container_width=True,
                             key=f"download_btn_{i+j}"
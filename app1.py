@@ -5,19 +5,23 @@ os.environ['GLOG_minloglevel'] = '2'
 import streamlit as st
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable
-from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
-from reportlab.lib.colors import HexColor
-from docx import Document
-from docx.shared import Inches, Pt, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-import io
+import html
 import json
-import PyPDF2
 import time
+from functools import partial
+from preview import render_resume_html, DebouncedRenderer
+from ingest import ingest_upload, UploadRejected
+from resume_store import ResumeStore, SharedResumeStore, fingerprint_upload, prompt_fingerprint
+from resume_model import normalize_resume
+from renderers import generate_stylish_pdf, generate_stylish_docx, generate_html, generate_markdown, MIME_TYPES
+from layout import available_themes, DEFAULT_THEME
+from resources import load_brand, DEFAULT_BRAND_PATH
+from rate_control import controller_for, stage_budget
+from shared_store import shared_store, cached_render
+from profiling import PROFILE_BY_DEFAULT, profiled, profile_calls, recent_reports
+from prefetch import Prefetcher, PREFETCH_BY_DEFAULT
+from keywords import keyword_coverage
+from semantic_cache import SemanticCache, REUSE_BY_DEFAULT, DEFAULT_REUSE_THRESHOLD, adapt_optimization
 
 # Page configuration
 st.set_page_config(page_title="AI Resume Optimizer", layout="wide", page_icon="📄")
@@ -25,32 +29,27 @@ st.set_page_config(page_title="AI Resume Optimizer", layout="wide", page_icon="
 # Initialize session state
 if 'optimized_resume' not in st.session_state:
     st.session_state.optimized_resume = None
+if 'resume_revision' not in st.session_state:
+    st.session_state.resume_revision = 0
+if 'upload_fingerprints' not in st.session_state:
+    st.session_state.upload_fingerprints = {}
 
-# Function to extract text from PDF
-def extract_text_from_pdf(pdf_file):
-    """Extract text from uploaded PDF"""
-    try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        return text
-    except Exception as e:
-        st.error(f"Error reading PDF: {str(e)}")
-        return None
-
-# Function to extract text from DOCX
-def extract_text_from_docx(docx_file):
-    """Extract text from uploaded DOCX"""
-    try:
-        doc = Document(docx_file)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text
-    except Exception as e:
-        st.error(f"Error reading DOCX: {str(e)}")
-        return None
+# Parsed resumes shared by all sessions, keyed by a hash of the uploaded bytes
+# (and by every server process when $RESUME_SHARED_STORE is set)
+@st.cache_resource
+def get_resume_store():
+    store = shared_store()
+    return SharedResumeStore(store) if store else ResumeStore()
+
+resume_store = get_resume_store()
+
+# Structured extraction starts as soon as a file is uploaded, so it is usually
+# done by the time the job description has been pasted
+@st.cache_resource
+def get_prefetcher():
+    return Prefetcher()
+
+prefetcher = get_prefetcher()
 
 # Resume extraction prompt
 extraction_prompt = PromptTemplate(
@@ -128,447 +127,150 @@ Generate an optimized resume that:
 
 Return ONLY a valid JSON object with the same structure as the input, with optimized content."""
 )
+extraction_key = prompt_fingerprint(extraction_prompt)
+optimization_key = prompt_fingerprint(optimization_prompt)
 
-def generate_stylish_pdf(resume_data):
-    """Generate a modern, stylish PDF resume"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buffer, 
-        pagesize=letter, 
-        topMargin=0.5*inch, 
-        bottomMargin=0.5*inch,
-        leftMargin=0.75*inch,
-        rightMargin=0.75*inch
-    )
-    story = []
-    
-    # Define modern color scheme
-    primary_color = HexColor('#1a5490')  # Professional blue
-    secondary_color = HexColor('#2c3e50')  # Dark blue-gray
-    accent_color = HexColor('#3498db')  # Light blue
-    text_color = HexColor('#2c3e50')  # Dark text
-    
-    # Define styles
-    styles = getSampleStyleSheet()
-    
-    # Name style - Large and bold
-    name_style = ParagraphStyle(
-        'Name',
-        parent=styles['Heading1'],
-        fontSize=28,
-        textColor=primary_color,
-        spaceAfter=4,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold',
-        leading=32
-    )
-    
-    # Contact style
-    contact_style = ParagraphStyle(
-        'Contact',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=secondary_color,
-        alignment=TA_CENTER,
-        spaceAfter=16,
-        leading=14
-    )
-    
-    # Section heading style
-    section_heading_style = ParagraphStyle(
-        'SectionHeading',
-        parent=styles['Heading2'],
-        fontSize=13,
-        textColor=primary_color,
-        spaceAfter=10,
-        spaceBefore=14,
-        fontName='Helvetica-Bold',
-        borderWidth=0,
-        borderColor=primary_color,
-        borderPadding=0,
-        leftIndent=0,
-        leading=16
-    )
-    
-    # Body text style
-    body_style = ParagraphStyle(
-        'Body',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=text_color,
-        spaceAfter=8,
-        leading=14,
-        alignment=TA_JUSTIFY
-    )
-    
-    # Job title style
-    job_title_style = ParagraphStyle(
-        'JobTitle',
-        parent=styles['Normal'],
-        fontSize=11,
-        textColor=secondary_color,
-        fontName='Helvetica-Bold',
-        spaceAfter=2,
-        leading=14
-    )
-    
-    # Company style
-    company_style = ParagraphStyle(
-        'Company',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=accent_color,
-        fontName='Helvetica-Bold',
-        spaceAfter=2,
-        leading=12
-    )
-    
-    # Duration style
-    duration_style = ParagraphStyle(
-        'Duration',
-        parent=styles['Normal'],
-        fontSize=9,
-        textColor=HexColor('#7f8c8d'),
-        fontName='Helvetica-Oblique',
-        spaceAfter=6,
-        leading=11
+# Optimizations of near-identical (resume, job description) pairs, shared by all
+# sessions; one index per optimization prompt so an edited prompt starts empty
+@st.cache_resource
+def get_optimization_cache(prompt_key):
+    return SemanticCache()
+
+optimization_cache = get_optimization_cache(optimization_key)
+
+
+def reply_json_text(content):
+    """The JSON part of a model reply, without any markdown code fence"""
+    if "```json" in content:
+        return content.split("```json")[1].split("```")[0]
+    if "```" in content:
+        return content.split("```")[1].split("```")[0]
+    return content
+
+
+def extract_structured(llm, rate_controller, fingerprint, resume_text, on_retry=None):
+    """Have the model structure the resume text and keep the result in the resume store"""
+    extraction_response = rate_controller.invoke(extraction_prompt | llm, {"resume_text": resume_text}, on_retry=on_retry, stage='extract')
+    extracted_data = json.loads(reply_json_text(extraction_response.content).strip())
+    resume_store.update(fingerprint, structured=extracted_data, provenance={
+        'structured_model': "gemini-2.0-flash",
+        'extraction_prompt': extraction_key,
+        'structured_at': time.time()
+    })
+    return extracted_data
+
+
+def has_structured(stored_resume):
+    """True when the entry has a structured extraction made with the current prompt"""
+    return bool(stored_resume and stored_resume.get('structured')
+                and stored_resume['provenance'].get('extraction_prompt') == extraction_key)
+
+
+def split_lines(text):
+    """Split a multi-line text area into a list of non-empty lines"""
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+def edit_entries(entries, fields, key_prefix, title_fn, add_label):
+    """Edit a list of dict entries; returns (entries, structure_changed)"""
+    edited_entries = []
+    structure_changed = False
+    for idx, entry in enumerate(entries):
+        with st.expander(title_fn(entry)):
+            item = dict(entry)
+            for field, label, kind in fields:
+                key = f"{key_prefix}_{idx}_{field}"
+                if kind == 'lines':
+                    item[field] = split_lines(st.text_area(label, value="\n".join(entry.get(field) or []), key=key))
+                elif kind == 'area':
+                    item[field] = st.text_area(label, value=entry.get(field) or "", key=key)
+                else:
+                    item[field] = st.text_input(label, value=str(entry.get(field) or ""), key=key)
+            if st.button("🗑️ Remove", key=f"{key_prefix}_{idx}_remove"):
+                structure_changed = True
+                continue
+        edited_entries.append(item)
+    if st.button(add_label, key=f"{key_prefix}_add"):
+        edited_entries.append({field: [] if kind == 'lines' else "" for field, _, kind in fields})
+        structure_changed = True
+    return edited_entries, structure_changed
+
+def render_resume_editor(resume_data):
+    """Render edit widgets for every resume section and return the edited resume"""
+    prefix = f"edit_{st.session_state.resume_revision}"
+    resume_data = resume_data.to_dict()
+    edited = dict(resume_data)
+
+    st.markdown("### 👤 Personal Information")
+    name_col, email_col, phone_col = st.columns(3)
+    edited['name'] = name_col.text_input("Name", value=resume_data.get('name', ''), key=f"{prefix}_name")
+    edited['email'] = email_col.text_input("Email", value=resume_data.get('email', ''), key=f"{prefix}_email")
+    edited['phone'] = phone_col.text_input("Phone", value=resume_data.get('phone', ''), key=f"{prefix}_phone")
+
+    st.markdown("### 💼 Professional Summary")
+    edited['summary'] = st.text_area("Summary", value=resume_data.get('summary', ''), height=120, key=f"{prefix}_summary")
+
+    st.markdown("### 🛠️ Skills")
+    edited['skills'] = split_lines(st.text_area("Skills (one per line)", value="\n".join(resume_data.get('skills', [])), key=f"{prefix}_skills"))
+
+    st.markdown("### 💼 Experience")
+    edited['experience'], experience_changed = edit_entries(
+        resume_data.get('experience', []),
+        [('title', "Job Title", 'text'), ('company', "Company", 'text'), ('duration', "Duration", 'text'),
+         ('responsibilities', "Responsibilities (one per line)", 'lines')],
+        f"{prefix}_exp",
+        lambda exp: f"{exp.get('title') or 'Position'} at {exp.get('company') or 'Company'}",
+        "➕ Add Experience"
     )
-    
-    # Bullet style
-    bullet_style = ParagraphStyle(
-        'Bullet',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=text_color,
-        leftIndent=20,
-        spaceAfter=4,
-        leading=13,
-        bulletIndent=10
+
+    st.markdown("### 🚀 Projects")
+    edited['projects'], projects_changed = edit_entries(
+        resume_data.get('projects', []),
+        [('name', "Project Name", 'text'), ('duration', "Duration", 'text'), ('description', "Description", 'area'),
+         ('technologies', "Technologies (one per line)", 'lines')],
+        f"{prefix}_proj",
+        lambda project: project.get('name') or 'Project',
+        "➕ Add Project"
     )
-    
-    # Skills style
-    skills_style = ParagraphStyle(
-        'Skills',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=text_color,
-        spaceAfter=6,
-        leading=14
+
+    st.markdown("### 🎓 Education")
+    edited['education'], education_changed = edit_entries(
+        resume_data.get('education', []),
+        [('degree', "Degree", 'text'), ('university', "University", 'text'), ('year', "Year", 'text'),
+         ('details', "Details", 'text')],
+        f"{prefix}_edu",
+        lambda edu: edu.get('degree') or 'Degree',
+        "➕ Add Education"
     )
-    
-    # === HEADER ===
-    # Name
-    story.append(Paragraph(resume_data['name'].upper(), name_style))
-    
-    # Contact Info
-    contact_parts = []
-    if resume_data.get('email'):
-        contact_parts.append(resume_data['email'])
-    if resume_data.get('phone'):
-        contact_parts.append(resume_data['phone'])
-    
-    if contact_parts:
-        contact_text = " | ".join(contact_parts)
-        story.append(Paragraph(contact_text, contact_style))
-    
-    # Decorative line
-    story.append(HRFlowable(
-        width="100%", 
-        thickness=2, 
-        color=primary_color, 
-        spaceAfter=16,
-        spaceBefore=0
-    ))
-    
-    # === PROFESSIONAL SUMMARY ===
-    if resume_data.get('summary'):
-        story.append(Paragraph("PROFESSIONAL SUMMARY", section_heading_style))
-        story.append(Paragraph(resume_data['summary'], body_style))
-        story.append(Spacer(1, 0.15*inch))
-    
-    # === SKILLS ===
-    if resume_data.get('skills'):
-        story.append(Paragraph("CORE COMPETENCIES", section_heading_style))
-        
-        # Format skills in a clean way
-        skills_text = " • ".join(resume_data['skills'])
-        story.append(Paragraph(skills_text, skills_style))
-        story.append(Spacer(1, 0.15*inch))
-    
-    # === WORK EXPERIENCE ===
-    if resume_data.get('experience'):
-        story.append(Paragraph("PROFESSIONAL EXPERIENCE", section_heading_style))
-        
-        for exp in resume_data['experience']:
-            # Job title
-            story.append(Paragraph(exp.get('title', 'Position'), job_title_style))
-            
-            # Company name
-            story.append(Paragraph(exp.get('company', 'Company'), company_style))
-            
-            # Duration
-            if exp.get('duration'):
-                story.append(Paragraph(exp['duration'], duration_style))
-            
-            # Responsibilities
-            if exp.get('responsibilities'):
-                for resp in exp['responsibilities']:
-                    bullet_text = f"• {resp}"
-                    story.append(Paragraph(bullet_text, bullet_style))
-            
-            story.append(Spacer(1, 0.12*inch))
-    
-    # === PROJECTS ===
-    if resume_data.get('projects'):
-        story.append(Paragraph("PROJECTS", section_heading_style))
-        
-        for project in resume_data['projects']:
-            # Project name
-            project_name = project.get('name', 'Project')
-            if project.get('duration'):
-                project_name += f" ({project['duration']})"
-            story.append(Paragraph(project_name, job_title_style))
-            
-            # Description
-            if project.get('description'):
-                story.append(Paragraph(project['description'], body_style))
-            
-            # Technologies
-            if project.get('technologies'):
-                tech_text = f"<b>Technologies:</b> {', '.join(project['technologies'])}"
-                story.append(Paragraph(tech_text, skills_style))
-            
-            story.append(Spacer(1, 0.1*inch))
-    
-    # === EDUCATION ===
-    if resume_data.get('education'):
-        story.append(Paragraph("EDUCATION", section_heading_style))
-        
-        education_list = resume_data['education'] if isinstance(resume_data['education'], list) else [resume_data['education']]
-        
-        for edu in education_list:
-            # Degree
-            degree_text = f"<b>{edu.get('degree', 'Degree')}</b>"
-            story.append(Paragraph(degree_text, job_title_style))
-            
-            # University
-            story.append(Paragraph(edu.get('university', 'University'), company_style))
-            
-            # Year and details
-            year_details = []
-            if edu.get('year'):
-                year_details.append(str(edu['year']))
-            if edu.get('details'):
-                year_details.append(edu['details'])
-            
-            if year_details:
-                story.append(Paragraph(" | ".join(year_details), duration_style))
-            
-            story.append(Spacer(1, 0.08*inch))
-    
-    # === CERTIFICATIONS ===
-    if resume_data.get('certifications'):
-        story.append(Paragraph("CERTIFICATIONS", section_heading_style))
-        
-        for cert in resume_data['certifications']:
-            cert_text = f"• {cert}"
-            story.append(Paragraph(cert_text, bullet_style))
-    
-    # Build PDF
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
-
-def generate_stylish_docx(resume_data):
-    """Generate a modern, stylish DOCX resume"""
-    doc = Document()
-    
-    # Set document margins
-    sections = doc.sections
-    for section in sections:
-        section.top_margin = Inches(0.5)
-        section.bottom_margin = Inches(0.5)
-        section.left_margin = Inches(0.75)
-        section.right_margin = Inches(0.75)
-    
-    # Define colors
-    primary_color = RGBColor(26, 84, 144)  # Professional blue
-    secondary_color = RGBColor(44, 62, 80)  # Dark blue-gray
-    accent_color = RGBColor(52, 152, 219)  # Light blue
-    
-    # === NAME ===
-    name_paragraph = doc.add_paragraph()
-    name_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    name_run = name_paragraph.add_run(resume_data['name'].upper())
-    name_run.font.size = Pt(24)
-    name_run.font.bold = True
-    name_run.font.color.rgb = primary_color
-    
-    # === CONTACT INFO ===
-    contact_parts = []
-    if resume_data.get('email'):
-        contact_parts.append(resume_data['email'])
-    if resume_data.get('phone'):
-        contact_parts.append(resume_data['phone'])
-    
-    if contact_parts:
-        contact_paragraph = doc.add_paragraph()
-        contact_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        contact_run = contact_paragraph.add_run(" | ".join(contact_parts))
-        contact_run.font.size = Pt(10)
-        contact_run.font.color.rgb = secondary_color
-    
-    # Add horizontal line
-    doc.add_paragraph("_" * 80)
-    
-    # === PROFESSIONAL SUMMARY ===
-    if resume_data.get('summary'):
-        add_section_heading(doc, "PROFESSIONAL SUMMARY", primary_color)
-        summary_para = doc.add_paragraph(resume_data['summary'])
-        summary_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-        format_body_text(summary_para)
-        doc.add_paragraph()
-    
-    # === SKILLS ===
-    if resume_data.get('skills'):
-        add_section_heading(doc, "CORE COMPETENCIES", primary_color)
-        skills_text = " • ".join(resume_data['skills'])
-        skills_para = doc.add_paragraph(skills_text)
-        format_body_text(skills_para)
-        doc.add_paragraph()
-    
-    # === WORK EXPERIENCE ===
-    if resume_data.get('experience'):
-        add_section_heading(doc, "PROFESSIONAL EXPERIENCE", primary_color)
-        
-        for exp in resume_data['experience']:
-            # Job title
-            title_para = doc.add_paragraph()
-            title_run = title_para.add_run(exp.get('title', 'Position'))
-            title_run.font.size = Pt(11)
-            title_run.font.bold = True
-            title_run.font.color.rgb = secondary_color
-            
-            # Company
-            company_para = doc.add_paragraph()
-            company_run = company_para.add_run(exp.get('company', 'Company'))
-            company_run.font.size = Pt(10)
-            company_run.font.bold = True
-            company_run.font.color.rgb = accent_color
-            
-            # Duration
-            if exp.get('duration'):
-                duration_para = doc.add_paragraph()
-                duration_run = duration_para.add_run(exp['duration'])
-                duration_run.font.size = Pt(9)
-                duration_run.font.italic = True
-                duration_run.font.color.rgb = RGBColor(127, 140, 141)
-            
-            # Responsibilities
-            if exp.get('responsibilities'):
-                for resp in exp['responsibilities']:
-                    resp_para = doc.add_paragraph(resp, style='List Bullet')
-                    format_body_text(resp_para)
-            
-            doc.add_paragraph()
-    
-    # === PROJECTS ===
-    if resume_data.get('projects'):
-        add_section_heading(doc, "PROJECTS", primary_color)
-        
-        for project in resume_data['projects']:
-            # Project name
-            project_name = project.get('name', 'Project')
-            if project.get('duration'):
-                project_name += f" ({project['duration']})"
-            
-            project_para = doc.add_paragraph()
-            project_run = project_para.add_run(project_name)
-            project_run.font.size = Pt(11)
-            project_run.font.bold = True
-            project_run.font.color.rgb = secondary_color
-            
-            # Description
-            if project.get('description'):
-                desc_para = doc.add_paragraph(project['description'])
-                desc_para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-                format_body_text(desc_para)
-            
-            # Technologies
-            if project.get('technologies'):
-                tech_para = doc.add_paragraph()
-                tech_label = tech_para.add_run("Technologies: ")
-                tech_label.font.bold = True
-                tech_label.font.size = Pt(10)
-                tech_text = tech_para.add_run(", ".join(project['technologies']))
-                tech_text.font.size = Pt(10)
-            
-            doc.add_paragraph()
-    
-    # === EDUCATION ===
-    if resume_data.get('education'):
-        add_section_heading(doc, "EDUCATION", primary_color)
-        
-        education_list = resume_data['education'] if isinstance(resume_data['education'], list) else [resume_data['education']]
-        
-        for edu in education_list:
-            # Degree
-            degree_para = doc.add_paragraph()
-            degree_run = degree_para.add_run(edu.get('degree', 'Degree'))
-            degree_run.font.size = Pt(11)
-            degree_run.font.bold = True
-            degree_run.font.color.rgb = secondary_color
-            
-            # University
-            uni_para = doc.add_paragraph()
-            uni_run = uni_para.add_run(edu.get('university', 'University'))
-            uni_run.font.size = Pt(10)
-            uni_run.font.bold = True
-            uni_run.font.color.rgb = accent_color
-            
-            # Year and details
-            year_details = []
-            if edu.get('year'):
-                year_details.append(str(edu['year']))
-            if edu.get('details'):
-                year_details.append(edu['details'])
-            
-            if year_details:
-                year_para = doc.add_paragraph()
-                year_run = year_para.add_run(" | ".join(year_details))
-                year_run.font.size = Pt(9)
-                year_run.font.italic = True
-                year_run.font.color.rgb = RGBColor(127, 140, 141)
-            
-            doc.add_paragraph()
-    
-    # === CERTIFICATIONS ===
-    if resume_data.get('certifications'):
-        add_section_heading(doc, "CERTIFICATIONS", primary_color)
-        
-        for cert in resume_data['certifications']:
-            cert_para = doc.add_paragraph(cert, style='List Bullet')
-            format_body_text(cert_para)
-    
-    # Save to buffer
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
-
-def add_section_heading(doc, text, color):
-    """Add a styled section heading to the document"""
-    heading = doc.add_paragraph()
-    heading_run = heading.add_run(text)
-    heading_run.font.size = Pt(13)
-    heading_run.font.bold = True
-    heading_run.font.color.rgb = color
-
-def format_body_text(paragraph):
-    """Format body text paragraphs"""
-    for run in paragraph.runs:
-        run.font.size = Pt(10)
-        run.font.color.rgb = RGBColor(44, 62, 80)
+
+    st.markdown("### 📜 Certifications")
+    edited['certifications'] = split_lines(st.text_area("Certifications (one per line)", value="\n".join(resume_data.get('certifications', [])), key=f"{prefix}_certs"))
+
+    # Adding or removing entries shifts widget indices, so re-key every widget
+    if experience_changed or projects_changed or education_changed:
+        st.session_state.optimized_resume = normalize_resume(edited)
+        st.session_state.resume_revision += 1
+        st.rerun()
+
+    return normalize_resume(edited)
+
+def show_profile_report(report):
+    """Top functions of a saved profile, with the flame graph for speedscope.app"""
+    st.caption(f"🔬 {report.label}: {report.elapsed:.2f}s ({report.samples} samples) - pstats: `{report.pstats_path}`")
+    st.dataframe(report.top, use_container_width=True, hide_index=True)
+    with open(report.speedscope_path, "rb") as f:
+        st.download_button("⬇️ Flame graph (speedscope JSON)", f.read(),
+                           file_name=os.path.basename(report.speedscope_path), mime="application/json",
+                           key=f"profile_{report.speedscope_path}")
+
+@st.fragment(run_every=0.5)
+def show_live_preview():
+    """Poll the background renderer and show the latest HTML preview"""
+    renderer = st.session_state.preview_renderer
+    preview_html = renderer.latest()
+    if renderer.is_stale():
+        st.caption("⏳ Updating preview...")
+    if preview_html:
+        st.markdown(preview_html, unsafe_allow_html=True)
 
 # Custom CSS for better UI
 st.markdown("""
@@ -620,6 +322,26 @@ st.markdown('<div class="main-header"><h1>🎯 AI-Powered Resume Optimizer</h1><
 with st.sidebar:
     st.header("⚙️ Configuration")
     api_key = st.text_input("Google Gemini API Key", type="password", help="Enter your Gemini API key")
+    themes = available_themes()
+    resume_theme = st.selectbox(
+        "🎨 Template",
+        themes,
+        index=themes.index(DEFAULT_THEME) if DEFAULT_THEME in themes else 0,
+        help="Applies to the preview and every download format"
+    )
+    fit_pages = 1 if st.toggle("📏 Fit PDF to one page", value=False,
+                               help="Tighten spacing, then line height, then font size just enough for the PDF to fit one page") else None
+    profile_runs = st.toggle("🔬 Profile runs", value=PROFILE_BY_DEFAULT,
+                             help="Save a pstats profile and a flame graph of each optimization and download render")
+    reuse_optimizations = st.toggle("♻️ Reuse near-identical optimizations", value=REUSE_BY_DEFAULT,
+                                    help="Skip the model when a very similar resume with the same jobs, dates, skills and certifications "
+                                         "was already optimized for a very similar job description")
+    if reuse_optimizations:
+        reuse_threshold = st.slider("Reuse similarity", 0.5, 1.0, DEFAULT_REUSE_THRESHOLD, 0.01,
+                                    help="How similar both the resume and the job description must be to a previous request")
+        reuse_stats = optimization_cache.stats()
+        st.caption(f"Reused {reuse_stats['hits']} of {reuse_stats['lookups']} optimizations "
+                   f"({reuse_stats['hit_rate']:.0%}) from {reuse_stats['entries']} stored")
     
     st.markdown("---")
     st.markdown("### 📋 How it works:")
@@ -627,7 +349,7 @@ with st.sidebar:
     1. Upload your current resume (PDF/DOCX)
     2. Paste the job requirements
     3. AI analyzes and optimizes your resume
-    4. Download in PDF or DOCX format
+    4. Download as PDF, DOCX, HTML or Markdown
     
     **Protected:**
     - ✅ Education
@@ -660,17 +382,41 @@ with tab1:
         
         if uploaded_file:
             st.success(f"✅ Uploaded: {uploaded_file.name}")
-            file_type = uploaded_file.name.split('.')[-1].lower()
             
-            # Extract text based on file type
-            if file_type == 'pdf':
-                resume_text = extract_text_from_pdf(uploaded_file)
-            elif file_type == 'docx':
-                resume_text = extract_text_from_docx(uploaded_file)
+            # Reruns and repeat uploads of the same bytes reuse the stored extraction
+            upload_id = getattr(uploaded_file, 'file_id', None) or uploaded_file.name
+            if upload_id not in st.session_state.upload_fingerprints:
+                st.session_state.upload_fingerprints[upload_id] = fingerprint_upload(uploaded_file)
+            fingerprint = st.session_state.upload_fingerprints[upload_id]
+            
+            stored_resume = resume_store.get(fingerprint)
+            if stored_resume is None:
+                provenance = {'file_name': uploaded_file.name, 'size_bytes': uploaded_file.size, 'extracted_at': time.time()}
+                # Sniff the real file type and enforce size limits before parsing
+                try:
+                    file_type, resume_text = ingest_upload(uploaded_file)
+                    provenance['file_type'] = file_type
+                    stored_resume = resume_store.update(fingerprint, text=resume_text, provenance=provenance)
+                except UploadRejected as e:
+                    stored_resume = resume_store.update(fingerprint, error=str(e), provenance=provenance)
+            
+            if stored_resume.get('error'):
+                st.error(f"❌ {stored_resume['error']}")
+                resume_text = None
+            else:
+                resume_text = stored_resume['text']
             
             if resume_text:
                 with st.expander("👁️ View extracted text (preview)"):
                     st.text(resume_text[:500] + "..." if len(resume_text) > 500 else resume_text)
+
+            # Speculatively structure the resume while the user fills in step 2
+            if resume_text and api_key and PREFETCH_BY_DEFAULT and not has_structured(stored_resume):
+                prefetcher.submit((fingerprint, extraction_key), lambda: extract_structured(
+                    ChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=api_key, temperature=0.7,
+                                           timeout=stage_budget('extract').deadline),
+                    controller_for(api_key), fingerprint, resume_text
+                ))
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
@@ -703,62 +449,66 @@ with tab1:
             st.error("❌ Could not extract text from resume. Please try another file.")
         else:
             try:
-                with st.spinner("🔍 Analyzing your resume..."):
+                with st.spinner("🔍 Analyzing your resume..."), profiled("optimize", profile_runs):
                     # Initialize LLM
                     llm = ChatGoogleGenerativeAI(
                         model="gemini-2.0-flash",
                         google_api_key=api_key,
-                        temperature=0.7
+                        temperature=0.7,
+                        timeout=stage_budget('optimize').deadline
                     )
                     
-                    # Step 1: Extract resume data
-                    extraction_chain = extraction_prompt | llm
-                    
                     progress_bar = st.progress(0)
                     status_text = st.empty()
                     
+                    # Paces both calls by what this key has tolerated so far, instead of fixed sleeps
+                    rate_controller = controller_for(api_key)
+                    def on_retry(attempt, wait_time):
+                        status_text.text(f"⏳ Rate limit hit. Retrying in ~{wait_time:.0f} seconds...")
+                    
                     status_text.text("📋 Extracting resume information...")
                     progress_bar.progress(25)
                     
-                    extraction_response = extraction_chain.invoke({"resume_text": resume_text})
-                    
-                    # Parse extracted data
-                    extracted_text = extraction_response.content
-                    if "```json" in extracted_text:
-                        extracted_text = extracted_text.split("```json")[1].split("```")[0]
-                    elif "```" in extracted_text:
-                        extracted_text = extracted_text.split("```")[1].split("```")[0]
-                    
-                    extracted_data = json.loads(extracted_text.strip())
+                    # Step 1: Extract resume data - usually already started (or finished) at upload;
+                    # if that attempt failed it is simply made again here
+                    prefetcher.wait((fingerprint, extraction_key))
+                    stored_resume = resume_store.get(fingerprint)
+                    if has_structured(stored_resume):
+                        extracted_data = stored_resume['structured']
+                    else:
+                        extracted_data = extract_structured(llm, rate_controller, fingerprint, resume_text, on_retry=on_retry)
+                        prefetcher.forget((fingerprint, extraction_key))
                     
                     progress_bar.progress(50)
                     status_text.text("🎯 Optimizing resume for job requirements...")
                     
-                    time.sleep(1)  # Rate limiting
-                    
-                    # Step 2: Optimize resume
-                    optimization_chain = optimization_prompt | llm
-                    
-                    optimization_response = optimization_chain.invoke({
-                        "extracted_resume": json.dumps(extracted_data, indent=2),
-                        "job_requirements": job_requirements
-                    })
-                    
-                    # Parse optimized data
-                    optimized_text = optimization_response.content
-                    if "```json" in optimized_text:
-                        optimized_text = optimized_text.split("```json")[1].split("```")[0]
-                    elif "```" in optimized_text:
-                        optimized_text = optimized_text.split("```")[1].split("```")[0]
-                    
-                    optimized_data = json.loads(optimized_text.strip())
+                    # Step 2: Optimize resume - or adapt the optimization of a near-identical request
+                    reuse = optimization_cache.lookup(extracted_data, job_requirements, reuse_threshold) if reuse_optimizations else None
+                    if reuse:
+                        optimized_data = adapt_optimization(reuse.optimized, extracted_data)
+                    else:
+                        optimization_chain = optimization_prompt | llm
+                        
+                        optimization_response = rate_controller.invoke(optimization_chain, {
+                            "extracted_resume": json.dumps(extracted_data, indent=2),
+                            "job_requirements": job_requirements
+                        }, on_retry=on_retry, stage='optimize')
+                        
+                        # Parse optimized data
+                        optimized_data = json.loads(reply_json_text(optimization_response.content).strip())
+                        if reuse_optimizations:
+                            optimization_cache.add(extracted_data, job_requirements, optimized_data)
                     
                     progress_bar.progress(100)
-                    status_text.text("✅ Optimization complete!")
+                    status_text.text(f"♻️ Reused a {reuse.similarity:.0%} similar optimization" if reuse else "✅ Optimization complete!")
                     
                     # Store in session state
-                    st.session_state.optimized_resume = optimized_data
-                    st.session_state.original_resume = extracted_data
+                    st.session_state.optimized_resume = normalize_resume(optimized_data)
+                    st.session_state.original_resume = normalize_resume(extracted_data)
+                    st.session_state.original_text = resume_text
+                    st.session_state.job_requirements = job_requirements
+                    st.session_state.reused_similarity = reuse.similarity if reuse else None
+                    st.session_state.resume_revision += 1
                     
                     time.sleep(0.5)
                     st.balloons()
@@ -770,7 +520,7 @@ with tab1:
             except json.JSONDecodeError as e:
                 st.error(f"❌ Error parsing response: {str(e)}")
                 with st.expander("🔍 Debug Information"):
-                    st.code(extracted_text if 'extracted_text' in locals() else optimized_text)
+                    st.code(e.doc)
             except Exception as e:
                 st.error(f"❌ Error: {str(e)}")
                 if "429" in str(e):
@@ -782,6 +532,11 @@ with tab2:
         
         st.subheader("📋 Your Optimized Resume")
         
+        if st.session_state.get('reused_similarity'):
+            st.info(f"♻️ Reused the optimization of a {st.session_state.reused_similarity:.0%} similar resume and job description "
+                    "(same jobs, dates, skills and certifications); wording in the summary and bullets comes from that run. "
+                    "Turn off reuse in the sidebar and optimize again for a fresh result.")
+        
         # Comparison view
         if 'original_resume' in st.session_state:
             with st.expander("🔄 View Changes Made"):
@@ -789,93 +544,168 @@ with tab2:
                 
                 with col1:
                     st.markdown("**Original Summary:**")
-                    st.info(st.session_state.original_resume.get('summary', 'N/A'))
+                    st.info(st.session_state.original_resume.summary or 'N/A')
                 
                 with col2:
                     st.markdown("**Optimized Summary:**")
-                    st.success(resume_data.get('summary', 'N/A'))
+                    st.success(resume_data.summary or 'N/A')
         
-        # Preview sections
-        with st.container():
-            st.markdown("### 👤 Personal Information")
-            st.write(f"**Name:** {resume_data.get('name', 'N/A')}")
-            st.write(f"**Email:** {resume_data.get('email', 'N/A')}")
-            st.write(f"**Phone:** {resume_data.get('phone', 'N/A')}")
+        edit_mode = st.toggle("✏️ Edit mode", key="edit_mode", help="Edit any section and see the preview update instantly - no API calls")
         
-        with st.container():
-            st.markdown("### 💼 Professional Summary")
-            st.write(resume_data.get('summary', 'N/A'))
-        
-        with st.container():
-            st.markdown("### 🛠️ Skills")
-            if resume_data.get('skills'):
-                skills_cols = st.columns(3)
-                for idx, skill in enumerate(resume_data['skills']):
-                    with skills_cols[idx % 3]:
-                        st.markdown(f"✓ {skill}")
+        if edit_mode:
+            editor_col, preview_col = st.columns(2)
+            
+            with editor_col:
+                resume_data = render_resume_editor(resume_data)
+                st.session_state.optimized_resume = resume_data
+            
+            with preview_col:
+                st.markdown("### 👁️ Live Preview")
+                # One background renderer per template, reused across reruns
+                if 'preview_renderers' not in st.session_state:
+                    st.session_state.preview_renderers = {}
+                if resume_theme not in st.session_state.preview_renderers:
+                    st.session_state.preview_renderers[resume_theme] = DebouncedRenderer(partial(render_resume_html, theme=resume_theme))
+                st.session_state.preview_renderer = st.session_state.preview_renderers[resume_theme]
+                for theme, renderer in st.session_state.preview_renderers.items():
+                    if theme != resume_theme:
+                        renderer.close()  # no longer shown; its worker thread exits
+                st.session_state.preview_renderer.submit(resume_data)
+                show_live_preview()
+        else:
+            # Preview sections
+            with st.container():
+                st.markdown("### 👤 Personal Information")
+                st.write(f"**Name:** {resume_data.name or 'N/A'}")
+                st.write(f"**Email:** {resume_data.email or 'N/A'}")
+                st.write(f"**Phone:** {resume_data.phone or 'N/A'}")
+            
+            with st.container():
+                st.markdown("### 💼 Professional Summary")
+                st.write(resume_data.summary or 'N/A')
+            
+            with st.container():
+                st.markdown("### 🛠️ Skills")
+                if resume_data.skills:
+                    skills_cols = st.columns(3)
+                    for idx, skill in enumerate(resume_data.skills):
+                        with skills_cols[idx % 3]:
+                            st.markdown(f"✓ {skill}")
+            
+            with st.container():
+                st.markdown("### 💼 Experience")
+                for exp in resume_data.experience:
+                    with st.expander(f"{exp.title or 'Position'} at {exp.company or 'Company'}"):
+                        st.write(f"**Duration:** {exp.duration or 'N/A'}")
+                        st.write("**Responsibilities:**")
+                        for resp in exp.responsibilities:
+                            st.write(f"• {resp}")
         
-        with st.container():
-            st.markdown("### 💼 Experience")
-            for exp in resume_data.get('experience', []):
-                with st.expander(f"{exp.get('title', 'Position')} at {exp.get('company', 'Company')}"):
-                    st.write(f"**Duration:** {exp.get('duration', 'N/A')}")
-                    st.write("**Responsibilities:**")
-                    for resp in exp.get('responsibilities', []):
-                        st.write(f"• {resp}")
+        # ATS-style keyword check: skills named in the job description vs. the resume, no LLM involved
+        if st.session_state.get('job_requirements'):
+            coverage = keyword_coverage(st.session_state.job_requirements, resume_data,
+                                        original_text=st.session_state.get('original_text'))
+            st.markdown("### 🎯 Job Keyword Coverage")
+            if coverage.wanted:
+                st.metric("Job keywords covered", f"{len(coverage.covered)} / {len(coverage.wanted)}",
+                          delta=f"+{len(coverage.added)} from optimization" if coverage.added else None)
+                covered_col, missing_col = st.columns(2)
+                with covered_col:
+                    st.markdown("**✅ Covered**")
+                    for name in coverage.covered:
+                        st.markdown(f"- {name}" + (" 🆕" if name in coverage.added else ""))
+                with missing_col:
+                    st.markdown("**❌ Missing**")
+                    for name in coverage.missing:
+                        st.markdown(f"- {name}")
+                    if not coverage.missing:
+                        st.markdown("Nothing - every listed skill is mentioned")
+            else:
+                st.caption("No known skills found in the job description.")
         
-        # Download section
+        # Download section - files are only rendered when a download is clicked
         st.markdown("---")
         st.markdown('<div class="download-section">', unsafe_allow_html=True)
         st.subheader("📥 Download Your Resume")
         
-        col1, col2 = st.columns(2)
+        brand = load_brand()
+        # Renders are cached per resume, template and brand across server processes in shared mode
+        variant = (resume_theme, DEFAULT_BRAND_PATH)
+        render_pdf_file = profile_calls('render-pdf', partial(generate_stylish_pdf, resume_data, brand, resume_theme, fit_pages), profile_runs)
+        render_docx_file = profile_calls('render-docx', partial(generate_stylish_docx, resume_data, brand, resume_theme), profile_runs)
+        file_stem = f"optimized_resume_{(resume_data.name or 'candidate').replace(' ', '_')}"
+        col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            try:
-                pdf_buffer = generate_stylish_pdf(resume_data)
-                
-                st.download_button(
-                    label="📄 Download as PDF",
-                    data=pdf_buffer,
-                    file_name=f"optimized_resume_{resume_data.get('name', 'candidate').replace(' ', '_')}.pdf",
-                    mime="application/pdf",
-                    use_container_width=True,
-                    type="primary"
-                )
-                
-            except Exception as e:
-                st.error(f"Error generating PDF: {str(e)}")
+            st.download_button(
+                label="📄 Download as PDF",
+                data=partial(cached_render, 'pdf', render_pdf_file, resume_data, *variant, fit_pages),
+                file_name=f"{file_stem}.pdf",
+                mime=MIME_TYPES['pdf'],
+                use_container_width=True,
+                type="primary"
+            )
         
         with col2:
-            try:
-                docx_buffer = generate_stylish_docx(resume_data)
-                
-                st.download_button(
-                    label="📝 Download as DOCX",
-                    data=docx_buffer,
-                    file_name=f"optimized_resume_{resume_data.get('name', 'candidate').replace(' ', '_')}.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                    use_container_width=True,
-                    type="primary"
-                )
-                
-            except Exception as e:
-                st.error(f"Error generating DOCX: {str(e)}")
+            st.download_button(
+                label="📝 Download as DOCX",
+                data=partial(cached_render, 'docx', render_docx_file, resume_data, *variant),
+                file_name=f"{file_stem}.docx",
+                mime=MIME_TYPES['docx'],
+                use_container_width=True,
+                type="primary"
+            )
+        
+        with col3:
+            st.download_button(
+                label="🌐 Download as HTML",
+                data=partial(cached_render, 'html', partial(generate_html, resume_data, brand, resume_theme), resume_data, *variant),
+                file_name=f"{file_stem}.html",
+                mime=MIME_TYPES['html'],
+                use_container_width=True
+            )
+        
+        with col4:
+            st.download_button(
+                label="🗒️ Download as Markdown",
+                data=partial(cached_render, 'md', partial(generate_markdown, resume_data, resume_theme), resume_data, *variant),
+                file_name=f"{file_stem}.md",
+                mime=MIME_TYPES['md'],
+                use_container_width=True
+            )
         
         st.markdown('</div>', unsafe_allow_html=True)
         
-        st.success("✅ Your resume is ready for download in both formats!")
+        st.success("✅ Your resume is ready for download in every format!")
+        
+        if profile_runs and recent_reports():
+            with st.expander("🔬 Recent profiles"):
+                for report in recent_reports()[:3]:
+                    show_profile_report(report)
     
     else:
         st.info("👆 Upload your resume and job requirements in the 'Upload & Optimize' tab to get started!")
 
+def data_retention_note():
+    """What this server keeps of uploaded resumes, and for how long"""
+    if isinstance(resume_store, SharedResumeStore):
+        kept = (f"in a cache file on this server, shared by its processes and kept across restarts, "
+                f"until pushed out by the {resume_store.store.max_entries} most recent uploads")
+    else:
+        kept = f"in this server's memory until pushed out by the {resume_store.max_entries} most recent uploads or the server restarts"
+    note = f"Uploaded resumes and the text and structure extracted from them are kept {kept}, so a repeat upload skips the AI call."
+    if shared_store() is not None:
+        note += " Rendered downloads are cached in the same file."
+    return note + (f" With reuse turned on, optimized resumes are also kept in memory "
+                   f"(the {optimization_cache.max_entries} most recent) until the server restarts.")
+
 # Footer
 st.markdown("---")
 st.markdown(
-    """
+    f"""
     <div style='text-align: center; color: #7f8c8d; padding: 2rem 0;'>
         <p>🚀 Built with Streamlit, LangChain & Google Gemini AI</p>
-        <p style='font-size: 0.8rem;'>Your privacy matters: We don't store your resume data</p>
+        <p style='font-size: 0.8rem;'>🔒 {html.escape(data_retention_note())}</p>
     </div>
     """,
     unsafe_allow_html=True
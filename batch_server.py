@@ -0,0 +1,179 @@
+import argparse
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import orjson
+
+from bench_render import synthetic_corpus
+
+BATCH_PATH = re.compile(r"^/v1beta/models/(?P<model>[^/:]+):batchGenerateContent$")
+
+
+class MockBatchServer:
+    """Local stand-in for the Gemini Files + Batch APIs, for tests and load runs without a key"""
+
+    # Batches finish `delay` seconds after creation. Each request is answered with
+    # reply(request) - a synthetic resume by default - or fails with probability failure_rate
+
+    def __init__(self, host="127.0.0.1", port=0, delay=2.0, failure_rate=0.0, reply=None, seed=0):
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        corpus = [orjson.dumps(resume).decode() for resume in synthetic_corpus(20, seed)]
+        self.reply = reply or (lambda request: self._rng.choice(corpus))
+        self.files = {}
+        self.batches = {}
+        self.requests_answered = 0
+        self._uploads = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-batch-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # API operations; each returns (status, json body, extra headers)
+    def start_upload(self, body):
+        with self._lock:
+            upload_id = str(len(self._uploads) + 1)
+            self._uploads[upload_id] = orjson.loads(body or b"{}").get('file', {}).get('display_name', "")
+        return 200, {}, {'x-goog-upload-url': f"{self.url}/upload/v1beta/files?upload_id={upload_id}"}
+
+    def finish_upload(self, upload_id, body):
+        with self._lock:
+            display_name = self._uploads.pop(upload_id, None)
+            if display_name is None:
+                return 404, {'error': {'message': "unknown upload"}}, {}
+            name = f"files/{len(self.files) + 1}"
+            self.files[name] = body
+        return 200, {'file': {'name': name, 'displayName': display_name, 'sizeBytes': str(len(body))}}, {}
+
+    def create_batch(self, model, body):
+        config = orjson.loads(body)['batch']
+        file_name = config['input_config']['file_name']
+        with self._lock:
+            if file_name not in self.files:
+                return 400, {'error': {'message': f"unknown input file {file_name}"}}, {}
+            name = f"batches/{len(self.batches) + 1}"
+            self.batches[name] = {'model': model, 'input': file_name, 'created': time.monotonic(), 'output': None}
+        return 200, {'name': name, 'metadata': {'state': 'BATCH_STATE_PENDING', 'model': f"models/{model}"}}, {}
+
+    def get_batch(self, name):
+        with self._lock:
+            batch = self.batches.get(name)
+            if batch is None:
+                return 404, {'error': {'message': f"unknown batch {name}"}}, {}
+            if time.monotonic() - batch['created'] < self.delay:
+                return 200, {'name': name, 'metadata': {'state': 'BATCH_STATE_RUNNING'}}, {}
+            if batch['output'] is None:
+                batch['output'] = f"files/{len(self.files) + 1}"
+                self.files[batch['output']] = self._answer(self.files[batch['input']])
+        return 200, {
+            'name': name,
+            'metadata': {'state': 'BATCH_STATE_SUCCEEDED'},
+            'done': True,
+            'response': {'responsesFile': batch['output']},
+        }, {}
+
+    def _answer(self, requests):
+        lines = []
+        for line in requests.splitlines():
+            if not line.strip():
+                continue
+            entry = orjson.loads(line)
+            if self._rng.random() < self.failure_rate:
+                result = {'key': entry['key'], 'error': {'code': 500, 'message': "mock failure"}}
+            else:
+                text = self.reply(entry['request'])
+                result = {'key': entry['key'], 'response': {
+                    'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}, 'finishReason': 'STOP'}],
+                }}
+            self.requests_answered += 1
+            lines.append(orjson.dumps(result))
+        return b"\n".join(lines) + b"\n"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, headers=None, raw=None):
+                data = raw if raw is not None else orjson.dumps(body)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/octet-stream' if raw is not None else 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if url.path == "/upload/v1beta/files":
+                    upload_id = parse_qs(url.query).get('upload_id', [None])[0]
+                    if upload_id is None:
+                        return self._send(*server.start_upload(body))
+                    return self._send(*server.finish_upload(upload_id, body))
+                match = BATCH_PATH.match(url.path)
+                if match:
+                    return self._send(*server.create_batch(match['model'], body))
+                self._send(404, {'error': {'message': f"no route for POST {url.path}"}})
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path.startswith("/v1beta/batches/"):
+                    return self._send(*server.get_batch(url.path[len("/v1beta/"):]))
+                if url.path.startswith("/download/v1beta/") and url.path.endswith(":download"):
+                    data = server.files.get(url.path[len("/download/v1beta/"):-len(":download")])
+                    if data is not None:
+                        return self._send(200, None, raw=data)
+                self._send(404, {'error': {'message': f"no route for GET {url.path}"}})
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock Gemini batch API locally (point --batch-api at it)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=5.0, help="Seconds before each batch completes")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with an error")
+    args = parser.parse_args()
+    server = MockBatchServer(port=args.port, delay=args.delay, failure_rate=args.failure_rate)
+    print(f"Mock batch API on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import argparse
+import copy
+import random
+import time
+
+from resume_model import SAMPLE_RESUME, normalize_resume
+from renderers import FAST_MAX_PAGES, generate_pdf, generate_pdf_fast, generate_stylish_docx, generate_stylish_pdf, render_pdf
+
+FILLER = [
+    "Designed and shipped features used by thousands of customers",
+    "Partnered with product and design to define quarterly roadmaps",
+    "Improved test coverage and cut regression bugs in half",
+    "Automated reporting that saved the team ten hours per week",
+    "Presented technical proposals to senior leadership",
+]
+
+
+def synthetic_corpus(count, seed=0):
+    """Resumes of varying length so some overflow the fast path page budget"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        resume = copy.deepcopy(SAMPLE_RESUME)
+        resume['name'] = f"{resume['name']} {i}"
+        for exp in resume['experience']:
+            exp['responsibilities'] += rng.sample(FILLER, rng.randint(0, 3))
+        if rng.random() < 0.3:
+            resume['experience'].append(copy.deepcopy(resume['experience'][0]))
+        corpus.append(normalize_resume(resume))
+    return corpus
+
+
+def bench(label, render, corpus):
+    start = time.perf_counter()
+    for resume in corpus:
+        render(resume)
+    elapsed = time.perf_counter() - start
+    print(f"{label:>10}: {len(corpus) / elapsed:8.1f} resumes/s ({elapsed:.2f}s for {len(corpus)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the PDF and DOCX rendering engines")
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-pages", type=int, default=FAST_MAX_PAGES, help="Page budget before falling back to platypus")
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.count, args.seed)
+    fast_hits = sum(generate_pdf_fast(resume, args.max_pages) is not None for resume in corpus)
+    print(f"fast path fits {fast_hits}/{len(corpus)} resumes")
+
+    bench("platypus", generate_pdf, corpus)
+    bench("auto", lambda resume: render_pdf(resume, engine="auto", max_pages=args.max_pages), corpus)
+    bench("fit 1 page", lambda resume: generate_stylish_pdf(resume, fit_pages=1), corpus)
+    bench("docx runs", lambda resume: generate_stylish_docx(resume, engine="runs"), corpus)
+    bench("docx tmpl", lambda resume: generate_stylish_docx(resume, engine="template"), corpus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import os
+import threading
+import uuid
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+
+import orjson
+
+from resume_model import normalize_resume
+
+DEFAULT_CHECKPOINT_DIR = os.environ.get("RESUME_CHECKPOINT_DIR", "checkpoints")
+
+
+@dataclass(slots=True)
+class ItemPlan:
+    """Everything needed to (re)issue one generation call identically"""
+    index: int
+    seed: str
+    name_hint: str
+    experience: int
+    # Allocated up front (identities.py); None in plans written before that
+    name: str = None
+    email: str = None
+    phone: str = None
+
+
+def read_items(items_path):
+    """Every complete, parseable record of an items.jsonl (read-only; a missing file has none)"""
+    try:
+        f = open(items_path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                return  # torn last line from a crash mid-write (or a write still in progress)
+            try:
+                yield orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue
+
+
+def ends_torn(items_path):
+    """True when the file's last byte isn't a newline, i.e. a write was cut short"""
+    try:
+        with open(items_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if not f.tell():
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+    except FileNotFoundError:
+        return False
+
+
+# <root>/<batch_id>/manifest.json holds the spec and the per-item plan;
+# items.jsonl gets one line per finished or failed item as it happens
+class BatchCheckpoint:
+    """Append-only, per-item record of a generation batch on disk"""
+
+    def __init__(self, path, manifest):
+        self.path = path
+        self.manifest = manifest
+        self.batch_id = manifest['batch_id']
+        self._lock = threading.Lock()
+        self._done = {}
+        self._failed = {}
+        items_path = os.path.join(path, "items.jsonl")
+        for record in read_items(items_path):
+            self._apply(record)
+        self._items = open(items_path, "ab")
+        if ends_torn(items_path):
+            self._items.write(b"\n")  # seal a crash's partial last line so the next record starts on its own
+            self._items.flush()
+
+    @classmethod
+    def create(cls, spec, plan, root=DEFAULT_CHECKPOINT_DIR):
+        batch_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+        path = os.path.join(root, batch_id)
+        os.makedirs(path, exist_ok=True)
+        manifest = {
+            'batch_id': batch_id,
+            'created_at': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            'spec': asdict(spec),
+            'plan': [asdict(item) for item in plan],
+        }
+        # Written then renamed, so a concurrent list_batches never sees a half-written manifest
+        tmp_path = os.path.join(path, "manifest.json.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_path, os.path.join(path, "manifest.json"))
+        return cls(path, manifest)
+
+    @classmethod
+    def open(cls, batch_id, root=DEFAULT_CHECKPOINT_DIR):
+        path = os.path.join(root, batch_id)
+        with open(os.path.join(path, "manifest.json"), "rb") as f:
+            return cls(path, orjson.loads(f.read()))
+
+    def _apply(self, record):
+        index = record['index']
+        if record['status'] == 'done':
+            self._done[index] = (normalize_resume(record['resume']), record['meta'])
+            self._failed.pop(index, None)
+        elif index not in self._done:
+            self._failed[index] = record.get('error', "")
+
+    def _append(self, record):
+        with self._lock:
+            self._apply(record)
+            self._items.write(orjson.dumps(record) + b"\n")
+            self._items.flush()
+
+    def record_done(self, index, resume, meta):
+        self._append({'index': index, 'status': 'done', 'resume': normalize_resume(resume), 'meta': meta,
+                      'at': datetime.now(timezone.utc).isoformat(timespec="seconds")})
+
+    def record_failed(self, index, error):
+        self._append({'index': index, 'status': 'failed', 'error': error,
+                      'at': datetime.now(timezone.utc).isoformat(timespec="seconds")})
+
+    @property
+    def plan(self):
+        return [ItemPlan(**item) for item in self.manifest['plan']]
+
+    @property
+    def total(self):
+        return len(self.manifest['plan'])
+
+    def completed(self):
+        """{index: (resume, meta)} for every item that already succeeded"""
+        with self._lock:
+            return dict(self._done)
+
+    def missing(self):
+        """Plan entries still without a successful result (never tried or failed)"""
+        with self._lock:
+            return [item for item in self.plan if item.index not in self._done]
+
+    def summary(self):
+        with self._lock:
+            return {
+                'batch_id': self.batch_id,
+                'created_at': self.manifest['created_at'],
+                'spec': self.manifest['spec'],
+                'total': self.total,
+                'done': len(self._done),
+                'failed': len(self._failed),
+            }
+
+    def close(self):
+        self._items.close()
+
+
+def read_summary(path):
+    """A batch's summary straight from disk: no resume is normalized and nothing is opened for writing"""
+    with open(os.path.join(path, "manifest.json"), "rb") as f:
+        manifest = orjson.loads(f.read())
+    done, failed = set(), set()
+    for record in read_items(os.path.join(path, "items.jsonl")):
+        if record.get('status') == 'done':
+            done.add(record.get('index'))
+        else:
+            failed.add(record.get('index'))
+    return {
+        'batch_id': manifest['batch_id'],
+        'created_at': manifest['created_at'],
+        'spec': manifest['spec'],
+        'total': len(manifest['plan']),
+        'done': len(done),
+        'failed': len(failed - done),
+    }
+
+
+def list_batches(root=DEFAULT_CHECKPOINT_DIR, incomplete_only=False):
+    """Summaries of checkpointed batches, newest first (read-only, safe while batches are being written)"""
+    if not os.path.isdir(root):
+        return []
+    summaries = []
+    for batch_id in sorted(os.listdir(root), reverse=True):
+        try:
+            summary = read_summary(os.path.join(root, batch_id))
+        except (OSError, orjson.JSONDecodeError, KeyError):
+            continue  # not a batch directory, or its manifest is unreadable
+        if not incomplete_only or summary['done'] < summary['total']:
+            summaries.append(summary)
+    return summaries
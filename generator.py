@@ -0,0 +1,503 @@
+import os
+os.environ.setdefault('GRPC_VERBOSITY', 'ERROR')
+os.environ.setdefault('GLOG_minloglevel', '2')
+
+import argparse
+import json
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass, replace
+
+from faker import Faker
+from langchain_core.prompts import PromptTemplate
+from langchain_google_genai import ChatGoogleGenerativeAI
+import httpx
+import orjson
+
+from bulk import BatchClient, BatchFailed, DEFAULT_BATCH_API, DEFAULT_POLL_SECONDS, reply_text, request_line
+from jobs import BackgroundJob, ProgressChannel
+from checkpoints import BatchCheckpoint, ItemPlan, DEFAULT_CHECKPOINT_DIR, list_batches
+from identities import IdentitySpaceExhausted, identity_allocator, run_key
+from rate_control import AdaptiveRateController, MAX_CONCURRENCY, MAX_RETRIES, controller_for, is_rate_limit, stage_budget
+from response_log import ResponseLog, RESPONSE_MODES, DEFAULT_RESPONSE_LOG
+from shared_store import DEFAULT_SHARED_STORE, cache_key, shared_store
+from profiling import PROFILE_BY_DEFAULT, find_report, format_report, profiled
+from resume_model import normalize_resume
+from pipeline import DEFAULT_QUEUE_SIZE, DEFAULT_RENDER_WORKERS, Pipeline, Stage, format_stage_stats, in_executor, process_pool
+from renderers import render_pdf_bytes
+
+fake = Faker()
+
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+GENERATION_TEMPERATURE = 1.0
+
+NAME_LETTERS = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'J', 'K', 'L', 'M', 'N', 'P', 'R', 'S', 'T', 'V', 'W', 'Z']
+
+resume_prompt = PromptTemplate(
+    input_variables=["department", "sub_department", "experience", "seed", "name_hint"],
+    template="""Generate a detailed professional resume for a candidate with the following profile:
+
+Department: {department}
+Sub-Department: {sub_department}
+Years of Experience: {experience}
+Unique Identifier: {seed}
+Name must start with letter: {name_hint}
+
+CRITICAL REQUIREMENTS:
+1. MUST use a COMPLETELY DIFFERENT name starting with the letter "{name_hint}"
+2. MUST use DIFFERENT companies than previous resumes
+3. MUST use DIFFERENT universities
+4. Generate UNIQUE and DIVERSE content - no repetition
+
+Create a complete resume with the following sections in JSON format:
+1. Full Name (MUST start with "{name_hint}" - be creative with first and last names)
+2. Professional Summary (3-4 sentences, unique achievements)
+3. Skills (8-12 relevant technical and soft skills)
+4. Work Experience (2-3 positions with DIFFERENT company names, job titles, dates, and 4-5 bullet points each)
+5. Education (degree, DIFFERENT university name, graduation year)
+6. Certifications (2-3 relevant certifications)
+
+Return ONLY a valid JSON object with this structure:
+{{
+    "name": "Full Name starting with {name_hint}",
+    "summary": "Professional summary text",
+    "skills": ["skill1", "skill2", ...],
+    "experience": [
+        {{
+            "title": "Job Title",
+            "company": "Company Name",
+            "duration": "Start Date - End Date",
+            "responsibilities": ["resp1", "resp2", ...]
+        }}
+    ],
+    "education": {{
+        "degree": "Degree Name",
+        "university": "University Name",
+        "year": "Year"
+    }},
+    "certifications": ["cert1", "cert2", ...]
+}}
+
+Make it realistic and professional for the specified department and experience level."""
+)
+
+
+@dataclass(slots=True)
+class BatchSpec:
+    department: str
+    sub_department: str
+    experience: int
+    quantity: int
+    seed: int = None  # run-level seed; drives every random choice in the batch
+
+
+def new_run_seed():
+    return random.SystemRandom().randrange(1, 2**31)
+
+
+def build_chain(api_key, model=DEFAULT_MODEL, temperature=GENERATION_TEMPERATURE):
+    # The client's own timeout matches the stage deadline, so abandoned requests end too
+    llm = ChatGoogleGenerativeAI(model=model, google_api_key=api_key, temperature=temperature,
+                                 timeout=stage_budget('generate').deadline)
+    return resume_prompt | llm
+
+
+def generate_fake_phone(faker=fake):
+    return faker.phone_number()
+
+
+def generate_fake_email(name, faker=fake):
+    return faker.email()
+
+
+def generate_unique_name(index, department, name_hint=None, faker=fake):
+    if name_hint:
+        for _ in range(10):
+            name = faker.name()
+            if name[0].upper() == name_hint.upper():
+                return name
+        return faker.name()
+    else:
+        return faker.name()
+
+
+def parse_resume_response(resume_text):
+    """Strip markdown fences from an LLM reply and parse it into a Resume"""
+    if "```json" in resume_text:
+        resume_text = resume_text.split("```json")[1].split("```")[0]
+    elif "```" in resume_text:
+        resume_text = resume_text.split("```")[1].split("```")[0]
+    return normalize_resume(json.loads(resume_text.strip()))
+
+
+def plan_batch(spec, identities=None):
+    """Derive each item's prompt seed, name letter and experience from the run seed
+
+    With an IdentityAllocator, each item also gets a name, email and phone no other run has used.
+    """
+    rng = random.Random(spec.seed)
+    letters = rng.sample(NAME_LETTERS, len(NAME_LETTERS))
+    plan = []
+    for index in range(spec.quantity):
+        plan.append(ItemPlan(
+            index=index,
+            seed=f"RESUME-{spec.seed}-{index}-{rng.randint(10000, 99999)}",
+            name_hint=letters[index % len(letters)],
+            experience=max(spec.experience + rng.randint(-1, 2), 0),
+        ))
+    if identities is not None:
+        for item, identity in zip(plan, identities.reserve(run_key(asdict(spec)), [item.name_hint for item in plan])):
+            item.name, item.email, item.phone = identity.name, identity.email, identity.phone
+    return plan
+
+
+def item_inputs(spec, item):
+    """resume_prompt variables for one planned item"""
+    return {
+        "department": spec.department,
+        "sub_department": spec.sub_department,
+        "experience": item.experience,
+        "seed": item.seed,
+        "name_hint": item.name_hint
+    }
+
+
+def _fail(channel, checkpoint, index, error):
+    channel.failed(index, error)
+    if checkpoint:
+        checkpoint.record_failed(index, error)
+
+
+async def call_model(chain, spec, item, channel, controller, checkpoint=None, responses=None):
+    """LLM stage: the reply text for one planned item, or None (reported as failed) when the call fails"""
+    label = f"resume {item.index+1} of {spec.quantity}"
+
+    def on_retry(attempt, wait_time):
+        channel.note(f"Rate limit hit on {label}. Retrying in ~{wait_time:.0f} seconds ({attempt}/{MAX_RETRIES - 1})...", 'warning')
+
+    channel.status(f"Generating {label}... Calling API...")
+    try:
+        inputs = item_inputs(spec, item)
+        if responses is not None:
+            response = await responses.ainvoke(controller, chain, inputs, model=DEFAULT_MODEL, on_retry=on_retry, stage='generate')
+        else:
+            response = await controller.ainvoke(chain, inputs, on_retry=on_retry, stage='generate')
+    except Exception as e:
+        if is_rate_limit(e):
+            _fail(channel, checkpoint, item.index, f"Rate limit exceeded on {label} after {MAX_RETRIES} attempts.")
+        else:
+            _fail(channel, checkpoint, item.index, f"Error on {label}: {str(e)}")
+        return None
+    return response.content
+
+
+def finish_resume(spec, item, resume_text, channel, checkpoint=None, faker=fake):
+    """Parse stage: validate a reply, give it the item's identity and checkpoint it; returns (resume, meta) or None"""
+    index = item.index
+    try:
+        resume_data = parse_resume_response(resume_text)
+    except json.JSONDecodeError as je:
+        _fail(channel, checkpoint, index, f"JSON Parse Error on resume {index+1} of {spec.quantity}: {str(je)}\n{resume_text[:500]}")
+        return None
+    except Exception as e:
+        _fail(channel, checkpoint, index, f"Error on resume {index+1} of {spec.quantity}: {str(e)}")
+        return None
+
+    if item.name:
+        resume_data.name, resume_data.email, resume_data.phone = item.name, item.email, item.phone
+    else:
+        # Plans checkpointed before identities were allocated: Faker seeded per item, not unique
+        faker.seed_instance(item.seed)
+        resume_data.name = generate_unique_name(index, spec.department, item.name_hint, faker)
+        resume_data.email = generate_fake_email(resume_data.name, faker)
+        resume_data.phone = generate_fake_phone(faker)
+    meta = {
+        "department": spec.department,
+        "sub_department": spec.sub_department,
+        "experience_years": item.experience
+    }
+    if checkpoint:
+        checkpoint.record_done(index, resume_data, meta)
+    channel.finished(index, (resume_data, meta), f"✅ Resume {index+1} completed!")
+    return resume_data, meta
+
+
+async def generate_batch(chain, spec, channel, controller, items=None, checkpoint=None, responses=None,
+                         max_concurrency=MAX_CONCURRENCY, render_pdfs=False, queue_size=DEFAULT_QUEUE_SIZE, shared=None):
+    """Generate the planned items (all of spec by default) as a pipeline: LLM calls -> parse -> PDF render
+
+    The controller decides how many calls are in flight. With render_pdfs, each finished resume is
+    rendered in the process pool (and shared through the render cache) while later calls are still
+    waiting on the network; bounded queues between the stages hold the calls back if rendering lags.
+    """
+    items = plan_batch(spec) if items is None else items
+    faker = Faker()
+
+    async def call(item):
+        channel.started(item.index, f"Generating resume {item.index+1} of {spec.quantity}...")
+        resume_text = await call_model(chain, spec, item, channel, controller, checkpoint, responses)
+        return (item, resume_text) if resume_text is not None else None
+
+    async def parse(reply):
+        item, resume_text = reply
+        result = finish_resume(spec, item, resume_text, channel, checkpoint, faker)
+        return (item.index, result[0]) if result else None
+
+    stages = [Stage('llm', call, min(max_concurrency, len(items)), queue_size), Stage('parse', parse, 1, queue_size)]
+    if render_pdfs:
+        render = in_executor(process_pool(), render_pdf_bytes)
+
+        async def render_pdf_stage(done):
+            index, resume = done
+            try:
+                data = await render(resume)
+            except Exception as e:
+                channel.note(f"Could not pre-render the PDF of resume {index+1}: {e}", 'warning')
+                raise
+            channel.rendered(index, data)
+            if shared:
+                shared.put('renders', cache_key('pdf', resume), data)
+            return data
+
+        stages.append(Stage('render', render_pdf_stage, DEFAULT_RENDER_WORKERS, queue_size))
+    await Pipeline(stages, on_progress=channel.stages).run(items)
+    return channel.results()
+
+
+def start_batch(chain, spec, controller, responses=None, max_concurrency=MAX_CONCURRENCY, checkpoint_dir=DEFAULT_CHECKPOINT_DIR,
+                shared=None, identities=None, profile=False, render_pdfs=False, queue_size=DEFAULT_QUEUE_SIZE):
+    """Plan and checkpoint a new batch, then run it on a background event loop"""
+    checkpoint = create_batch(spec, checkpoint_dir, identities)
+    spec = BatchSpec(**checkpoint.manifest['spec'])
+    return _start(chain, spec, controller, checkpoint.plan, checkpoint, responses, max_concurrency, shared, profile,
+                  render_pdfs, queue_size)
+
+
+def create_batch(spec, checkpoint_dir=DEFAULT_CHECKPOINT_DIR, identities=None):
+    """Seed, plan and checkpoint a new batch without generating anything yet"""
+    if spec.seed is None:
+        spec = replace(spec, seed=new_run_seed())
+    return BatchCheckpoint.create(spec, plan_batch(spec, identities or identity_allocator()), checkpoint_dir)
+
+
+def continue_batch(chain, batch_id, controller, responses=None, max_concurrency=MAX_CONCURRENCY,
+                   checkpoint_dir=DEFAULT_CHECKPOINT_DIR, shared=None, profile=False, render_pdfs=False,
+                   queue_size=DEFAULT_QUEUE_SIZE):
+    """Re-run only the items of a checkpointed batch that have no result yet, with their original plan"""
+    checkpoint = BatchCheckpoint.open(batch_id, checkpoint_dir)
+    spec = BatchSpec(**checkpoint.manifest['spec'])
+    return _start(chain, spec, controller, checkpoint.missing(), checkpoint, responses, max_concurrency, shared, profile,
+                  render_pdfs, queue_size)
+
+
+def bulk_generate(checkpoint, client, responses, poll_seconds=DEFAULT_POLL_SECONDS, on_poll=None):
+    """Send a checkpointed batch's missing items to the provider as one batch job, wait, and log the replies
+
+    Replies land in the response log, so replaying the batch afterwards parses, enriches and
+    checkpoints them exactly like interactive ones. Items the log already answers are not sent.
+    The submitted job is remembered in the checkpoint, so an interrupted run resumes polling it.
+    Returns (replies received, requests that failed).
+    """
+    spec = BatchSpec(**checkpoint.manifest['spec'])
+    state_path = os.path.join(checkpoint.path, "bulk.json")
+    try:
+        with open(state_path, "rb") as f:
+            state = orjson.loads(f.read())
+    except OSError:
+        state = None
+    if state is None:
+        pending = [item for item in checkpoint.missing() if responses.get(item_inputs(spec, item)) is None]
+        if not pending:
+            return 0, 0
+        requests_path = os.path.join(checkpoint.path, "bulk_requests.jsonl")
+        with open(requests_path, "wb") as f:
+            for item in pending:
+                f.write(request_line(str(item.index), resume_prompt.format(**item_inputs(spec, item)), GENERATION_TEMPERATURE))
+        state = {'batch': client.submit(requests_path, f"resumes-{checkpoint.batch_id}"), 'requests': len(pending)}
+        tmp_path = f"{state_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(state))
+        os.replace(tmp_path, state_path)
+    try:
+        results_file = client.wait(state['batch'], poll_seconds, on_poll)
+    except BatchFailed:
+        os.remove(state_path)  # nothing to resume; the next run submits afresh
+        raise
+    plan = {str(item.index): item for item in checkpoint.plan}
+    received = 0
+    for result in client.results(results_file):
+        item, text = plan.get(result.get('key')), reply_text(result)
+        if item is not None and text is not None:
+            responses.record(item_inputs(spec, item), text, client.model)
+            received += 1
+    os.remove(state_path)
+    return received, state['requests'] - received
+
+
+def batch_profile_label(batch_id):
+    return f"batch-{batch_id}"
+
+
+def _start(chain, spec, controller, items, checkpoint, responses, max_concurrency, shared, profile, render_pdfs=False,
+           queue_size=DEFAULT_QUEUE_SIZE):
+    channel = ProgressChannel(spec.quantity)
+    channel.restore(checkpoint.completed())
+    channel.note(f"Run seed {spec.seed} - reuse it with the same spec to reproduce this batch")
+
+    async def run(channel):
+        try:
+            # Profiles the job's event-loop thread: API waits, parsing and Faker all run there
+            with profiled(batch_profile_label(checkpoint.batch_id), profile):
+                return await generate_batch(chain, spec, channel, controller, items, checkpoint, responses, max_concurrency,
+                                            render_pdfs, queue_size, shared)
+        finally:
+            checkpoint.close()
+
+    # With a shared store, progress is published so every server process can see the batch
+    job = BackgroundJob(run, channel, name=checkpoint.batch_id, publish=shared.publish_job if shared else None)
+    return job.start()
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "estimating..."
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"~{minutes}m {seconds:02d}s" if minutes else f"~{seconds}s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a batch of resumes without the Streamlit UI")
+    parser.add_argument("--department")
+    parser.add_argument("--sub-department")
+    parser.add_argument("--experience", type=int, default=3)
+    parser.add_argument("--count", type=int, default=3)
+    parser.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENCY, help="Upper bound for the adaptive rate controller")
+    parser.add_argument("--api-key", default=os.environ.get("GOOGLE_API_KEY"), help="Defaults to $GOOGLE_API_KEY")
+    parser.add_argument("--output", default="-", help="JSON Lines output path ('-' for stdout)")
+    parser.add_argument("--checkpoint-dir", default=DEFAULT_CHECKPOINT_DIR)
+    parser.add_argument("--profile", action="store_true", default=PROFILE_BY_DEFAULT,
+                        help="Profile the batch and save pstats plus a speedscope flame graph (or set RESUME_PROFILE=1)")
+    parser.add_argument("--shared-store", default=DEFAULT_SHARED_STORE,
+                        help="SQLite file shared with the app servers for cached replies and batch status")
+    parser.add_argument("--continue", dest="continue_batch", metavar="BATCH_ID", help="Generate only the missing items of a checkpointed batch")
+    parser.add_argument("--list-batches", action="store_true", help="List incomplete checkpointed batches and exit")
+    parser.add_argument("--seed", type=int, help="Run seed; the same seed, spec and response log reproduce a batch exactly")
+    parser.add_argument("--response-log", default=DEFAULT_RESPONSE_LOG, help="JSON Lines log of LLM replies")
+    parser.add_argument("--response-mode", choices=RESPONSE_MODES, default='cache',
+                        help="live: always call the API; cache: reuse logged replies; replay: offline, logged replies only")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Submit the batch through the provider's batch API: slower to finish, cheaper, far higher limits")
+    parser.add_argument("--batch-api", default=DEFAULT_BATCH_API, help="Batch API base URL (e.g. a local batch_server.py)")
+    parser.add_argument("--poll-seconds", type=float, default=DEFAULT_POLL_SECONDS, help="How often to check a bulk batch")
+    parser.add_argument("--pdf-dir", help="Also render each resume's PDF here, overlapped with the remaining API calls")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Items allowed to wait between pipeline stages before the earlier stage pauses")
+    args = parser.parse_args()
+
+    shared = shared_store(args.shared_store)
+    if args.list_batches:
+        running = {job['job_id']: job['owner'] for job in shared.jobs(running_only=True)} if shared else {}
+        for summary in list_batches(args.checkpoint_dir, incomplete_only=True):
+            spec = summary['spec']
+            owner = f"  (running on {running[summary['batch_id']]})" if summary['batch_id'] in running else ""
+            print(f"{summary['batch_id']}  {summary['done']}/{summary['total']} done  "
+                  f"{spec['department']} / {spec['sub_department']}{owner}")
+        return 0
+    replay = args.response_mode == 'replay'
+    if not args.api_key and not replay:
+        parser.error("an API key is required (--api-key or $GOOGLE_API_KEY) unless --response-mode replay")
+    if not args.continue_batch and not (args.department and args.sub_department):
+        parser.error("--department and --sub-department are required for a new batch")
+
+    if args.bulk and not args.api_key:
+        parser.error("an API key is required for --bulk")
+
+    # Bulk replies are logged first and then replayed, so the generation run itself is offline
+    responses = ResponseLog(args.response_log, resume_prompt, 'replay' if args.bulk else args.response_mode, shared)
+    if args.bulk:
+        batch_id = args.continue_batch
+        if not batch_id:
+            try:
+                checkpoint = create_batch(BatchSpec(args.department, args.sub_department, args.experience, args.count, args.seed),
+                                          args.checkpoint_dir)
+            except IdentitySpaceExhausted as e:
+                print(f"Cannot plan batch: {e}", file=sys.stderr)
+                return 2
+            batch_id = checkpoint.batch_id
+        else:
+            checkpoint = BatchCheckpoint.open(batch_id, args.checkpoint_dir)
+        client = BatchClient(args.api_key, DEFAULT_MODEL, args.batch_api)
+        print(f"Batch {batch_id}: submitting missing items to {args.batch_api}", file=sys.stderr)
+        try:
+            received, failed = bulk_generate(checkpoint, client, responses, args.poll_seconds,
+                                             on_poll=lambda state, batch: print(f"[bulk] {batch['name']}: {state}", file=sys.stderr))
+        except (BatchFailed, httpx.HTTPError) as e:
+            print(f"Bulk submission failed: {e}\nRun again with --continue {batch_id} --bulk to resume", file=sys.stderr)
+            return 1
+        finally:
+            checkpoint.close()
+            client.close()
+        print(f"[bulk] {received} replies logged, {failed} requests failed", file=sys.stderr)
+        args.continue_batch = batch_id
+        replay = True
+
+    if replay:
+        # Nothing leaves the machine, so there is no rate to respect
+        chain, controller = None, AdaptiveRateController(state={'limit': args.max_concurrency, 'spacing': 0.0})
+    else:
+        chain, controller = build_chain(args.api_key), controller_for(args.api_key)
+    if args.continue_batch:
+        job = continue_batch(chain, args.continue_batch, controller, responses, args.max_concurrency, args.checkpoint_dir,
+                             shared, args.profile, bool(args.pdf_dir), args.queue_size)
+    else:
+        spec = BatchSpec(args.department, args.sub_department, args.experience, args.count, args.seed)
+        try:
+            job = start_batch(chain, spec, controller, responses, args.max_concurrency, args.checkpoint_dir, shared,
+                              profile=args.profile, render_pdfs=bool(args.pdf_dir), queue_size=args.queue_size)
+        except IdentitySpaceExhausted as e:
+            print(f"Cannot plan batch: {e}", file=sys.stderr)
+            return 2
+    print(f"Batch {job.name} (checkpointed in {args.checkpoint_dir}/, {len(responses)} logged responses)", file=sys.stderr)
+    started = time.monotonic()
+    seen_messages = 0
+    while not job.join(timeout=1):
+        progress = job.channel.snapshot()
+        for level, text in progress.messages[seen_messages:]:
+            print(f"[{level}] {text}", file=sys.stderr)
+        seen_messages = len(progress.messages)
+        print(f"queued {progress.queued} | in flight {progress.in_flight} | done {progress.done} | "
+              f"failed {progress.failed} | ETA {format_eta(progress.eta_seconds)}", file=sys.stderr)
+
+    elapsed = time.monotonic() - started
+    progress = job.channel.snapshot()
+    for level, text in progress.messages[seen_messages:]:
+        print(f"[{level}] {text}", file=sys.stderr)
+    if args.pdf_dir:
+        os.makedirs(args.pdf_dir, exist_ok=True)
+        for (resume, meta), pdf in zip(job.channel.results(), job.channel.renders()):
+            path = os.path.join(args.pdf_dir, f"resume_{resume.name.replace(' ', '_')}.pdf")
+            with open(path, "wb") as f:
+                f.write(pdf if pdf is not None else render_pdf_bytes(resume))
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        for resume, meta in job.channel.results():
+            out.write(orjson.dumps(dict(resume.to_dict(), meta=meta)) + b"\n")
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(f"Generated {progress.done} of {progress.total} resumes (rate: {controller.describe()}, "
+          f"log hits: {responses.hits})", file=sys.stderr)
+    if progress.stages:
+        print(format_stage_stats(progress.stages, elapsed), file=sys.stderr)
+    report = find_report(batch_profile_label(job.name)) if args.profile else None
+    if report:
+        print(format_report(report), file=sys.stderr)
+    if progress.done < progress.total:
+        print(f"Run again with --continue {job.name}{' --bulk' if args.bulk else ''} to generate the rest", file=sys.stderr)
+    return 0 if progress.done == progress.total else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
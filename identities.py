@@ -0,0 +1,237 @@
+import hashlib
+import math
+import os
+import random
+import string
+import threading
+from contextlib import nullcontext
+from dataclasses import dataclass
+
+import orjson
+from faker.providers.person.en_US import Provider as PersonProvider
+
+try:
+    import fcntl
+except ImportError:  # no cross-process locking on Windows; the thread lock still applies
+    fcntl = None
+
+# Slot counters and per-run reservations live here; "" keeps them in memory only
+DEFAULT_IDENTITY_STATE = os.environ.get("RESUME_IDENTITY_STATE", ".identity_state.json")
+EMAIL_DOMAINS = ('example.com', 'example.org', 'example.net')
+# Once every first/last pair of a letter is used, names gain a middle initial (tier 1 = "A.", ...)
+MIDDLE_INITIALS = string.ascii_uppercase
+# Phone numbers are NANP-shaped: area and exchange 200-999, line 0000-9999
+PHONE_SPACE = 800 * 800 * 10000
+
+
+class IdentitySpaceExhausted(RuntimeError):
+    """Raised when a name letter has no unused combinations left"""
+
+
+@dataclass(slots=True)
+class Identity:
+    name: str
+    email: str
+    phone: str
+
+
+def name_pools():
+    """First names bucketed by initial, plus all last names, de-duplicated in locale order"""
+    first_by_letter = {}
+    for first in dict.fromkeys(PersonProvider.first_names):
+        first_by_letter.setdefault(first[0].upper(), []).append(first)
+    return first_by_letter, list(dict.fromkeys(PersonProvider.last_names))
+
+
+def run_key(spec):
+    """Reservations are keyed by the whole spec (seed included), so a replayed run gets its identities back"""
+    return hashlib.sha256(orjson.dumps(spec, option=orjson.OPT_SORT_KEYS)).hexdigest()[:16]
+
+
+class AffinePermutation:
+    """Bijection k -> (a*k + b) mod n: never-repeating values in O(1), but consecutive slots differ by a constant"""
+
+    # Kept for state files that handed out slots with it; new state uses FeistelPermutation
+
+    def __init__(self, n, salt):
+        rng = random.Random(salt)
+        self.n = n
+        self.a = rng.randrange(1, n) if n > 1 else 1
+        while math.gcd(self.a, n) != 1:
+            self.a += 1
+        self.b = rng.randrange(n)
+
+    def __call__(self, k):
+        return (self.a * k + self.b) % self.n
+
+
+class FeistelPermutation:
+    """Keyed bijection on [0, n): a balanced Feistel network with cycle-walking, so adjacent slots land far apart"""
+
+    def __init__(self, n, salt, rounds=4):
+        self.n = n
+        self.rounds = rounds
+        self._half_bits = max(1, (max(n - 1, 1).bit_length() + 1) // 2)
+        self._mask = (1 << self._half_bits) - 1
+        self._key = hashlib.sha256(str(salt).encode("utf-8")).digest()[:32]
+
+    def _round(self, number, value):
+        digest = hashlib.blake2b(value.to_bytes(8, "big"), key=self._key, digest_size=8,
+                                 person=number.to_bytes(16, "big")).digest()
+        return int.from_bytes(digest, "big") & self._mask
+
+    def _encrypt(self, value):
+        left, right = value >> self._half_bits, value & self._mask
+        for number in range(self.rounds):
+            left, right = right, left ^ self._round(number, right)
+        return (left << self._half_bits) | right
+
+    def __call__(self, k):
+        # The network permutes [0, 4**half_bits); re-applying it until the value falls
+        # inside [0, n) keeps the result a bijection on [0, n)
+        value = self._encrypt(k)
+        while value >= self.n:
+            value = self._encrypt(value)
+        return value
+
+
+# Slot -> value mapping recorded in the state file; files written before "feistel" existed stay "affine"
+PERMUTATIONS = {'affine': AffinePermutation, 'feistel': FeistelPermutation}
+
+
+class IdentityAllocator:
+    """Hands out names, emails and phones that never repeat across runs sharing the same state file"""
+
+    def __init__(self, path=DEFAULT_IDENTITY_STATE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.first_by_letter, self.last_names = name_pools()
+        self._state = self._load()
+        self._use_state()
+
+    def _use_state(self):
+        """Build the name and phone permutations for the state's salt and permutation scheme"""
+        salt, permutation = self._salt, self._permutation = self._state['salt'], self._state['permutation']
+        self._names = {
+            letter: PERMUTATIONS[permutation](len(firsts) * len(self.last_names), f"{salt}-{letter}")
+            for letter, firsts in self.first_by_letter.items()
+        }
+        self._phones = PERMUTATIONS[permutation](PHONE_SPACE, f"{salt}-phone")
+
+    def _load(self, salt=None):
+        state = {}
+        if self.path:
+            try:
+                with open(self.path, "rb") as f:
+                    state = orjson.loads(f.read())
+            except (OSError, orjson.JSONDecodeError):
+                pass
+        state.setdefault('permutation', 'affine' if 'salt' in state else 'feistel')
+        state.setdefault('salt', salt or random.SystemRandom().randrange(2**63))
+        state.setdefault('next', {})
+        state.setdefault('next_phone', 0)
+        state.setdefault('runs', {})
+        return state
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(self._state))
+        os.replace(tmp_path, self.path)
+
+    def capacity(self, letter):
+        return len(self.first_by_letter.get(letter, ())) * len(self.last_names) * (1 + len(MIDDLE_INITIALS))
+
+    def identity(self, letter, slot, phone_slot):
+        """The identity at a letter's slot - a pure function of the slot numbers and the salt"""
+        pairs = len(self.first_by_letter[letter]) * len(self.last_names)
+        tier, index = divmod(slot, pairs)
+        first_index, last_index = divmod(self._names[letter](index), len(self.last_names))
+        first, last = self.first_by_letter[letter][first_index], self.last_names[last_index]
+        middle = MIDDLE_INITIALS[tier - 1] if tier else None
+        name = f"{first} {middle}. {last}" if middle else f"{first} {last}"
+        # Distinct (first, middle, last) triples give distinct local parts, whatever the domain
+        local = ".".join(part.lower() for part in (first, middle, last) if part)
+        domain = EMAIL_DOMAINS[(first_index + last_index) % len(EMAIL_DOMAINS)]
+        area, rest = divmod(self._phones(phone_slot), 800 * 10000)
+        exchange, line = divmod(rest, 10000)
+        return Identity(name, f"{local}@{domain}", f"{area + 200}-{exchange + 200}-{line:04d}")
+
+    def reserve(self, key, letters):
+        """Identities for items whose names start with letters[i]; the same key always gets the same ones back"""
+        with self._lock, self._file_lock():
+            if self.path:
+                # Another process may have reserved slots (or created the file) since we last looked
+                self._state = self._load(self._salt)
+                if (self._state['salt'], self._state['permutation']) != (self._salt, self._permutation):
+                    self._use_state()
+            run = self._state['runs'].get(key)
+            if run is None:
+                run = self._allocate(letters)
+                self._state['runs'][key] = run
+                self._save()
+        offsets = dict(run['letters'])
+        identities = []
+        for i, letter in enumerate(letters):
+            identities.append(self.identity(letter, offsets[letter], run['phone'] + i))
+            offsets[letter] += 1
+        return identities
+
+    def _allocate(self, letters):
+        counts = {}
+        for letter in letters:
+            counts[letter] = counts.get(letter, 0) + 1
+        for letter, count in counts.items():
+            left = self.capacity(letter) - self._state['next'].get(letter, 0)
+            if count > left:
+                raise IdentitySpaceExhausted(f"Only {left} unused names left for {letter!r}, {count} requested")
+        if self._state['next_phone'] + len(letters) > PHONE_SPACE:
+            raise IdentitySpaceExhausted("Phone number space exhausted")
+        starts = {letter: self._state['next'].get(letter, 0) for letter in counts}
+        for letter, count in counts.items():
+            self._state['next'][letter] = starts[letter] + count
+        run = {'letters': starts, 'phone': self._state['next_phone']}
+        self._state['next_phone'] += len(letters)
+        return run
+
+    def _file_lock(self):
+        """Exclusive lock on <path>.lock so server processes sharing the state don't hand out the same slots"""
+        if not self.path or fcntl is None:
+            return nullcontext()
+        return _FileLock(f"{self.path}.lock")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'runs': len(self._state['runs']),
+                'names': sum(self._state['next'].values()),
+                'phones': self._state['next_phone'],
+            }
+
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        self._file = open(self.path, "a")
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+
+def identity_allocator(path=DEFAULT_IDENTITY_STATE):
+    """Process-wide allocator for a state file"""
+    with _allocators_lock:
+        if path not in _allocators:
+            _allocators[path] = IdentityAllocator(path)
+        return _allocators[path]
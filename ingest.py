@@ -0,0 +1,180 @@
+import io
+import mmap
+import tempfile
+import zipfile
+from contextlib import contextmanager
+
+import filetype
+import PyPDF2
+from docx import Document
+
+# Upload limits - checked before any parser touches the file
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+MAX_PDF_PAGES = 20
+MAX_DOCX_PARAGRAPHS = 5000
+MAX_DOCX_XML_BYTES = 20 * 1024 * 1024
+# Uploads larger than this are spooled to a memory-mapped temp file
+SPOOL_THRESHOLD_BYTES = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+# A PDF whose first pages carry no text layer is treated as a scan
+IMAGE_ONLY_PROBE_PAGES = 3
+
+SUPPORTED_TYPES = ('pdf', 'docx')
+
+
+class UploadRejected(ValueError):
+    """Raised when an uploaded resume fails validation or cannot be parsed"""
+
+
+def sniff_file_type(stream):
+    """Detect the real file type from content, ignoring the file name"""
+    stream.seek(0)
+    head = stream.read(8192)
+    stream.seek(0)
+    kind = filetype.guess(head)
+    if kind is None:
+        return None
+    if kind.extension == 'zip':
+        # Some writers order zip members so the header probe misses "word/"
+        try:
+            with zipfile.ZipFile(stream) as archive:
+                if 'word/document.xml' in archive.namelist():
+                    return 'docx'
+        except zipfile.BadZipFile:
+            return None
+        finally:
+            stream.seek(0)
+    return kind.extension
+
+
+class MappedFile(io.RawIOBase):
+    """Seekable read-only file object over a memory map (mmap lacks seekable() before 3.13)"""
+
+    def __init__(self, mapped):
+        self._mapped = mapped
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._mapped.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._mapped.seek(offset, whence)
+        return self._mapped.tell()
+
+    def tell(self):
+        return self._mapped.tell()
+
+
+@contextmanager
+def spool_upload(uploaded_file, max_bytes=MAX_UPLOAD_BYTES, threshold=SPOOL_THRESHOLD_BYTES):
+    """Copy an upload in chunks under a byte cap and yield a seekable read-only buffer"""
+    size = getattr(uploaded_file, 'size', None)
+    if size is not None and size > max_bytes:
+        raise UploadRejected(f"File is too large ({size / 1024 / 1024:.1f} MB). Maximum is {max_bytes // 1024 // 1024} MB.")
+
+    uploaded_file.seek(0)
+    buffer = io.BytesIO()
+    spool_file = None
+    total = 0
+    try:
+        while True:
+            chunk = uploaded_file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            total += len(chunk)
+            if total > max_bytes:
+                raise UploadRejected(f"File is too large. Maximum is {max_bytes // 1024 // 1024} MB.")
+            if spool_file is None and total > threshold:
+                spool_file = tempfile.TemporaryFile()
+                spool_file.write(buffer.getbuffer())
+                buffer = None
+            (spool_file or buffer).write(chunk)
+
+        if spool_file is None:
+            buffer.seek(0)
+            yield buffer
+        else:
+            spool_file.flush()
+            with mmap.mmap(spool_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield MappedFile(mapped)
+    finally:
+        uploaded_file.seek(0)
+        if spool_file is not None:
+            spool_file.close()
+
+
+def extract_text_from_pdf(stream, max_pages=MAX_PDF_PAGES):
+    """Extract text from a PDF, rejecting encrypted, oversized and image-only files"""
+    try:
+        pdf_reader = PyPDF2.PdfReader(stream)
+        if pdf_reader.is_encrypted:
+            # Files protected only by an owner password open with an empty user password
+            try:
+                decrypted = pdf_reader.decrypt("")
+            except Exception:
+                decrypted = 0
+            if not decrypted:
+                raise UploadRejected("PDF is password protected. Please upload an unprotected copy.")
+
+        page_count = len(pdf_reader.pages)
+        if page_count > max_pages:
+            raise UploadRejected(f"PDF has {page_count} pages. Resumes are limited to {max_pages} pages.")
+
+        text_parts = []
+        for page_number, page in enumerate(pdf_reader.pages, start=1):
+            text_parts.append(page.extract_text() or "")
+            if page_number == IMAGE_ONLY_PROBE_PAGES and not "".join(text_parts).strip():
+                break
+        text = "".join(text_parts)
+    except UploadRejected:
+        raise
+    except Exception as e:
+        raise UploadRejected(f"Error reading PDF: {str(e)}")
+
+    if not text.strip():
+        raise UploadRejected("PDF contains no selectable text (it looks like a scanned image). Please upload a text-based PDF or DOCX.")
+    return text
+
+
+def extract_text_from_docx(stream, max_paragraphs=MAX_DOCX_PARAGRAPHS, max_xml_bytes=MAX_DOCX_XML_BYTES):
+    """Extract text from a DOCX after checking its size and paragraph count"""
+    try:
+        with zipfile.ZipFile(stream) as archive:
+            info = archive.getinfo('word/document.xml')
+            if info.file_size > max_xml_bytes:
+                raise UploadRejected("DOCX content is too large to process.")
+            document_xml = archive.read(info)
+        # Cheap byte scan so huge documents are rejected before the XML parse
+        paragraph_count = document_xml.count(b'<w:p>') + document_xml.count(b'<w:p ')
+        if paragraph_count > max_paragraphs:
+            raise UploadRejected(f"DOCX has {paragraph_count} paragraphs. Resumes are limited to {max_paragraphs}.")
+        del document_xml
+
+        stream.seek(0)
+        doc = Document(stream)
+        text = ""
+        for paragraph in doc.paragraphs:
+            text += paragraph.text + "\n"
+        return text
+    except UploadRejected:
+        raise
+    except Exception as e:
+        raise UploadRejected(f"Error reading DOCX: {str(e)}")
+
+
+def ingest_upload(uploaded_file):
+    """Validate an uploaded resume and return (file_type, text)"""
+    with spool_upload(uploaded_file) as stream:
+        file_type = sniff_file_type(stream)
+        if file_type not in SUPPORTED_TYPES:
+            raise UploadRejected("Unsupported file. Please upload a PDF or DOCX resume.")
+        if file_type == 'pdf':
+            return file_type, extract_text_from_pdf(stream)
+        return file_type, extract_text_from_docx(stream)
@@ -0,0 +1,176 @@
+import asyncio
+import threading
+import time
+from dataclasses import asdict, dataclass, field, replace
+
+
+@dataclass(slots=True)
+class Progress:
+    """Point-in-time view of a job, safe to hand to the UI thread"""
+    total: int = 0
+    queued: int = 0
+    in_flight: int = 0
+    done: int = 0
+    failed: int = 0
+    eta_seconds: float = None
+    status: str = ""
+    messages: list = field(default_factory=list)  # (level, text), oldest first
+    finished: bool = False
+    cancelled: bool = False
+    stages: list = field(default_factory=list)  # per-stage pipeline counters (pipeline.StageStats as dicts)
+
+    @property
+    def fraction(self):
+        return (self.done + self.failed) / self.total if self.total else 1.0
+
+
+class ProgressChannel:
+    """Thread-safe counters and messages a worker publishes and the UI polls"""
+
+    def __init__(self, total, max_messages=50):
+        self._lock = threading.Lock()
+        self._progress = Progress(total=total, queued=total)
+        self._max_messages = max_messages
+        self._results = {}
+        self._renders = {}
+        self._started_at = time.monotonic()
+
+    def _message(self, level, text):
+        self._progress.messages.append((level, text))
+        del self._progress.messages[:-self._max_messages]
+
+    def restore(self, results):
+        """Count results carried over from an earlier run as already done"""
+        with self._lock:
+            self._results.update(results)
+            self._progress.done += len(results)
+            self._progress.queued -= len(results)
+
+    def started(self, index, status=""):
+        with self._lock:
+            self._progress.queued -= 1
+            self._progress.in_flight += 1
+            self._progress.status = status
+
+    def status(self, text):
+        with self._lock:
+            self._progress.status = text
+
+    def note(self, text, level='info'):
+        with self._lock:
+            self._message(level, text)
+
+    def finished(self, index, result, status=""):
+        with self._lock:
+            self._progress.in_flight -= 1
+            self._progress.done += 1
+            self._progress.status = status
+            self._results[index] = result
+
+    def rendered(self, index, data):
+        """Attach a pre-rendered file (e.g. PDF bytes) to a finished result"""
+        with self._lock:
+            self._renders[index] = data
+
+    def stages(self, stats):
+        with self._lock:
+            self._progress.stages = stats
+
+    def failed(self, index, error):
+        with self._lock:
+            self._progress.in_flight -= 1
+            self._progress.failed += 1
+            self._message('error', error)
+
+    def close(self, cancelled=False):
+        with self._lock:
+            self._progress.finished = True
+            self._progress.cancelled = cancelled
+            self._progress.in_flight = 0
+
+    def snapshot(self):
+        """Copy of the current progress with a throughput-based ETA"""
+        with self._lock:
+            progress = replace(self._progress, messages=list(self._progress.messages), stages=list(self._progress.stages))
+        completed = progress.done + progress.failed
+        remaining = progress.queued + progress.in_flight
+        if completed and remaining and not progress.finished:
+            elapsed = time.monotonic() - self._started_at
+            progress.eta_seconds = elapsed / completed * remaining
+        return progress
+
+    def results(self):
+        """Finished results in submission order"""
+        with self._lock:
+            return [self._results[index] for index in sorted(self._results)]
+
+    def renders(self):
+        """Pre-rendered files aligned with results(); None where an item has none"""
+        with self._lock:
+            return [self._renders.get(index) for index in sorted(self._results)]
+
+
+class BackgroundJob:
+    """Run a coroutine on its own event loop in a daemon thread, reporting through a ProgressChannel"""
+
+    def __init__(self, coroutine_fn, channel, name=None, publish=None, publish_every=1.0):
+        self.channel = channel
+        self.name = name
+        self._publish = publish  # publish(name, progress_dict), e.g. SharedStore.publish_job
+        self._publish_every = publish_every
+        self._coroutine_fn = coroutine_fn
+        self._loop = None
+        self._task = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self._coroutine_fn(self.channel))
+        publisher = self._loop.create_task(self._publish_periodically()) if self._publish else None
+        self._ready.set()
+        cancelled = False
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            cancelled = True
+        except Exception as e:
+            self.channel.note(f"Job crashed: {e}", 'error')
+        finally:
+            self.channel.close(cancelled)
+            if publisher:
+                publisher.cancel()
+                self._loop.run_until_complete(asyncio.gather(publisher, return_exceptions=True))
+                self._publish_progress()
+            self._loop.close()
+
+    def _publish_progress(self):
+        try:
+            self._publish(self.name, asdict(self.channel.snapshot()))
+        except Exception:
+            pass  # status sharing is best effort; the job itself carries on
+
+    async def _publish_periodically(self):
+        while True:
+            self._publish_progress()
+            await asyncio.sleep(self._publish_every)
+
+    def cancel(self):
+        """Ask the job to stop; in-flight work is abandoned"""
+        if self.is_running():
+            try:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                pass  # loop already closed - the job just finished
+
+    def is_running(self):
+        return self._thread.is_alive()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+        return not self.is_running()
@@ -0,0 +1,161 @@
+import os
+import re
+import threading
+from collections import Counter, deque
+from dataclasses import asdict, dataclass, field, is_dataclass
+
+import orjson
+
+TAXONOMIES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "taxonomies")
+# Skill taxonomy JSON: {"skills": {category: {canonical name: [aliases, ...]}}, "case_sensitive": [terms, ...]}
+DEFAULT_SKILL_TAXONOMY = os.environ.get("RESUME_SKILL_TAXONOMY", os.path.join(TAXONOMIES_DIR, "skills.json"))
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Case-fold and collapse whitespace, so a skill split over two lines still matches"""
+    return WHITESPACE.sub(" ", text.casefold())
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+class SkillMatcher:
+    """Aho-Corasick automaton over every skill name and alias: one linear pass finds them all"""
+
+    # Matches must sit on word boundaries, so "java" is not found in "javascript"
+    # and "sql" is not found in "nosql"; symbols like the "+" in "c++" count as part of the word.
+    # Names that are also ordinary words ("Spring", "Swift", "Express") are listed under
+    # case_sensitive and only count when written exactly so; they are matched by one regex
+
+    def __init__(self, taxonomy):
+        self.categories = {}
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        case_sensitive = {normalize_text(term).strip(): term for term in taxonomy.get('case_sensitive', ())}
+        self._cased_names = {}
+        for category, skills in taxonomy['skills'].items():
+            for name, aliases in skills.items():
+                self.categories[name] = category
+                for pattern in dict.fromkeys(normalize_text(term).strip() for term in (name, *aliases)):
+                    if pattern in case_sensitive:
+                        self._cased_names[case_sensitive[pattern]] = name
+                    elif pattern:
+                        self._add(pattern, name)
+        self._link()
+        self._cased = re.compile(
+            r"(?<!\w)(?:" + "|".join(map(re.escape, sorted(self._cased_names, key=len, reverse=True))) + r")(?!\w)"
+        ) if self._cased_names else None
+
+    def _add(self, pattern, name):
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            node = next_node
+        self._output[node] += ((pattern, name),)
+
+    def _link(self):
+        """Breadth-first failure links; each node also inherits the outputs of its failure node"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] += self._output[self._fail[child]]
+
+    def __len__(self):
+        return len(self.categories)
+
+    def scan(self, text):
+        """Counter of canonical skill names mentioned in text"""
+        original, text = text, normalize_text(text)
+        goto, fail, output = self._goto, self._fail, self._output
+        found = Counter()
+        node = 0
+        for end, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for pattern, name in output[node]:
+                start = end - len(pattern) + 1
+                if _is_word_char(pattern[0]) and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if _is_word_char(pattern[-1]) and end + 1 < len(text) and _is_word_char(text[end + 1]):
+                    continue
+                found[name] += 1
+        if self._cased is not None:
+            found.update(self._cased_names[match.group()] for match in self._cased.finditer(original))
+        return found
+
+
+def load_taxonomy(path=DEFAULT_SKILL_TAXONOMY):
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+
+def skill_matcher(path=DEFAULT_SKILL_TAXONOMY):
+    """Process-wide matcher for a taxonomy file, compiled on first use"""
+    with _matchers_lock:
+        if path not in _matchers:
+            _matchers[path] = SkillMatcher(load_taxonomy(path))
+        return _matchers[path]
+
+
+def resume_plain_text(resume):
+    """Every string value of a resume (dict or Resume), without the JSON keys that could match a skill"""
+    data = asdict(resume) if is_dataclass(resume) else resume
+    parts = []
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            parts.append(value)
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return "\n".join(parts)
+
+
+@dataclass(slots=True)
+class KeywordCoverage:
+    """Job-description skills split by whether the resume mentions them"""
+    wanted: Counter = field(default_factory=Counter)  # skill -> mentions in the job description
+    covered: list = field(default_factory=list)
+    missing: list = field(default_factory=list)
+    added: list = field(default_factory=list)  # covered now, but absent from the original resume
+
+    @property
+    def ratio(self):
+        return len(self.covered) / len(self.wanted) if self.wanted else 1.0
+
+
+def keyword_coverage(job_text, resume, original_text=None, matcher=None):
+    """Which skills named in job_text the resume (text, dict or Resume) covers, most-mentioned first"""
+    matcher = matcher or skill_matcher()
+    wanted = matcher.scan(job_text)
+    present = matcher.scan(resume if isinstance(resume, str) else resume_plain_text(resume))
+    before = matcher.scan(original_text) if original_text is not None else present
+    ranked = [name for name, _ in wanted.most_common()]
+    return KeywordCoverage(
+        wanted=wanted,
+        covered=[name for name in ranked if name in present],
+        missing=[name for name in ranked if name not in present],
+        added=[name for name in ranked if name in present and name not in before],
+    )
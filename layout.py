@@ -0,0 +1,223 @@
+import copy
+import json
+import os
+from dataclasses import dataclass, field
+
+from resume_model import normalize_resume
+
+THEMES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "themes")
+DEFAULT_THEME = os.environ.get("RESUME_THEME", "modern")
+
+# Run styles; None means "use the role's own font"
+BOLD, ITALIC = 'bold', 'italic'
+# A run with this text forces a line break
+LINE_BREAK = "\n"
+
+
+@dataclass(slots=True)
+class Run:
+    text: str
+    style: str = None
+
+
+@dataclass(slots=True)
+class Block:
+    """One paragraph-level element: role picks the theme style, kind picks the shape"""
+    kind: str  # 'paragraph', 'bullet', 'rule', 'spacer' or 'logo'
+    role: str = 'body'
+    runs: tuple = ()
+    inches: float = 0.0  # spacer height or logo width
+
+
+@dataclass(slots=True)
+class Section:
+    key: str
+    heading: str
+    blocks: list = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class DocumentTree:
+    """A resume compiled once into a backend-neutral layout"""
+    theme: object
+    header: list = field(default_factory=list)
+    sections: list = field(default_factory=list)
+    title: str = ""
+
+    def blocks(self):
+        """Every block in reading order, with section headings as 'heading' paragraphs"""
+        yield from self.header
+        for section in self.sections:
+            yield Block('paragraph', 'heading', (Run(section.heading),))
+            yield from section.blocks
+
+
+class Theme:
+    """Styling data for one template, loaded from themes/<name>.json"""
+
+    def __init__(self, config):
+        self.name = config['name']
+        self.config = config
+        self.roles = config['roles']
+        self.sections = config['sections']
+        self.margins = config.get('margins_inches', {})
+        self.bullet = config.get('bullet', "•")
+        self.skills_separator = config.get('skills_separator', " • ")
+        self.uppercase_name = config.get('uppercase_name', False)
+        self.experience_layout = config.get('experience_layout', 'stacked')
+        self.education_layout = config.get('education_layout', 'stacked')
+
+    def role(self, name):
+        """Style dict for a role; roles a theme doesn't define fall back to body"""
+        return self.roles.get(name) or self.roles['body']
+
+    def __repr__(self):
+        return f"Theme({self.name!r})"
+
+
+_themes = {}
+
+
+def load_theme(theme=None):
+    """Return a Theme by name or path (cached); Theme instances pass through"""
+    if isinstance(theme, Theme):
+        return theme
+    theme = theme or DEFAULT_THEME
+    if theme not in _themes:
+        path = theme if theme.endswith(".json") else os.path.join(THEMES_DIR, f"{theme}.json")
+        with open(path) as f:
+            _themes[theme] = Theme(json.load(f))
+    return _themes[theme]
+
+
+def scale_theme(theme, font_scale=1.0, spacing_scale=1.0, leading_scale=1.0):
+    """A theme with type scaled by font_scale, line spacing also by leading_scale and paragraph gaps by spacing_scale (cached)"""
+    theme = load_theme(theme)
+    if font_scale == spacing_scale == leading_scale == 1:
+        return theme
+    name = f"{theme.name}@{font_scale:g}x{spacing_scale:g}x{leading_scale:g}"
+    if name not in _themes:
+        config = copy.deepcopy(theme.config)
+        config['name'] = name
+        for spec in config['roles'].values():
+            if 'size' in spec:
+                # Same default as the renderers' role_leading, made explicit so it scales separately
+                spec['leading'] = spec.get('leading', spec['size'] * 1.2) * font_scale * leading_scale
+                spec['size'] *= font_scale
+            for key in ('space_before', 'space_after'):
+                if key in spec:
+                    spec[key] *= spacing_scale
+        for section in config['sections']:
+            for key in ('gap_inches', 'entry_gap_inches'):
+                if key in section:
+                    section[key] *= spacing_scale
+        _themes[name] = Theme(config)
+    return _themes[name]
+
+
+def available_themes():
+    return sorted(name[:-5] for name in os.listdir(THEMES_DIR) if name.endswith(".json"))
+
+
+# === Section compilers - one walk over the canonical Resume ===
+
+def _paragraph(role, *runs):
+    return Block('paragraph', role, tuple(run if isinstance(run, Run) else Run(run) for run in runs))
+
+
+def _gap(inches):
+    return [Block('spacer', inches=inches)] if inches else []
+
+
+def _summary(resume, theme, section):
+    if not resume.summary:
+        return []
+    return [_paragraph('body', resume.summary)] + _gap(section.get('gap_inches'))
+
+
+def _skills(resume, theme, section):
+    if not resume.skills:
+        return []
+    return [_paragraph('skills', theme.skills_separator.join(resume.skills))] + _gap(section.get('gap_inches'))
+
+
+def _experience(resume, theme, section):
+    blocks = []
+    for exp in resume.experience:
+        if theme.experience_layout == 'inline':
+            blocks.append(_paragraph('body', Run(exp.title, BOLD), Run(f" - {exp.company}")))
+            blocks.append(_paragraph('body', Run(exp.duration, ITALIC)))
+        else:
+            blocks.append(_paragraph('job_title', exp.title or 'Position'))
+            blocks.append(_paragraph('company', exp.company or 'Company'))
+            if exp.duration:
+                blocks.append(_paragraph('duration', exp.duration))
+        blocks.extend(Block('bullet', 'bullet', (Run(resp),)) for resp in exp.responsibilities)
+        blocks.extend(_gap(section.get('entry_gap_inches')))
+    return blocks + _gap(section.get('gap_inches')) if blocks else []
+
+
+def _projects(resume, theme, section):
+    blocks = []
+    for project in resume.projects:
+        project_name = project.name or 'Project'
+        if project.duration:
+            project_name += f" ({project.duration})"
+        blocks.append(_paragraph('job_title', project_name))
+        if project.description:
+            blocks.append(_paragraph('body', project.description))
+        if project.technologies:
+            blocks.append(_paragraph('skills', Run("Technologies: ", BOLD), Run(", ".join(project.technologies))))
+        blocks.extend(_gap(section.get('entry_gap_inches')))
+    return blocks + _gap(section.get('gap_inches')) if blocks else []
+
+
+def _education(resume, theme, section):
+    blocks = []
+    for edu in resume.education:
+        if theme.education_layout == 'inline':
+            blocks.append(_paragraph('body', Run(edu.degree, BOLD), Run(LINE_BREAK), Run(edu.university),
+                                     Run(LINE_BREAK), Run(edu.year)))
+        else:
+            blocks.append(_paragraph('job_title', Run(edu.degree or 'Degree', BOLD)))
+            blocks.append(_paragraph('company', edu.university or 'University'))
+            year_details = [part for part in (edu.year, edu.details) if part]
+            if year_details:
+                blocks.append(_paragraph('duration', " | ".join(year_details)))
+        blocks.extend(_gap(section.get('entry_gap_inches')))
+    return blocks + _gap(section.get('gap_inches')) if blocks else []
+
+
+def _certifications(resume, theme, section):
+    return [Block('bullet', 'bullet', (Run(cert),)) for cert in resume.certifications]
+
+
+SECTION_COMPILERS = {
+    'summary': _summary,
+    'skills': _skills,
+    'experience': _experience,
+    'projects': _projects,
+    'education': _education,
+    'certifications': _certifications,
+}
+
+
+def compile_resume(resume_data, theme=None, brand=None):
+    """Normalize a resume and compile it into a DocumentTree for the given theme"""
+    resume = normalize_resume(resume_data)
+    theme = load_theme(theme)
+    tree = DocumentTree(theme=theme, title=resume.name)
+
+    if brand and brand.logo:
+        tree.header.append(Block('logo', 'logo', inches=brand.logo_width_inches))
+    tree.header.append(_paragraph('name', resume.name.upper() if theme.uppercase_name else resume.name))
+    contact_parts = [part for part in (resume.email, resume.phone) if part]
+    if contact_parts:
+        tree.header.append(_paragraph('contact', " | ".join(contact_parts)))
+    tree.header.append(Block('rule', 'rule'))
+
+    for section in theme.sections:
+        blocks = SECTION_COMPILERS[section['key']](resume, theme, section)
+        if blocks:
+            tree.sections.append(Section(section['key'], section['heading'], blocks))
+    return tree
@@ -0,0 +1,357 @@
+import os
+import tempfile
+
+# Keep load-test state away from the real checkpoints, response log, learned rates and identities
+LOAD_TEST_DIR = tempfile.mkdtemp(prefix="resume-load-")
+os.environ.setdefault("RESUME_CHECKPOINT_DIR", os.path.join(LOAD_TEST_DIR, "checkpoints"))
+os.environ.setdefault("RESUME_RESPONSE_LOG", os.path.join(LOAD_TEST_DIR, "llm_responses.jsonl"))
+os.environ.setdefault("RESUME_RATE_STATE", "")
+os.environ.setdefault("RESUME_IDENTITY_STATE", os.path.join(LOAD_TEST_DIR, "identities.json"))
+
+import argparse
+import asyncio
+import math
+import random
+import resource
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import langchain_google_genai
+import orjson
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from streamlit.runtime.runtime import Runtime
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest, local_script_runner
+
+import generator
+from bench_render import synthetic_corpus
+from rate_control import MAX_CONCURRENCY, controller_for
+from renderers import MIME_TYPES, generate_stylish_docx, generate_stylish_pdf, render_pdf
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SCENARIOS = ('optimizer', 'generator')
+SCENARIO_APPS = {'optimizer': "app1.py", 'generator': "app.py"}
+PERCENTILES = (50, 95, 99)
+# Seconds a generator session may wait for its batch before it counts as failed
+BATCH_TIMEOUT_SECONDS = 120
+JOB_REQUIREMENTS = (
+    "Senior backend engineer. Python, Go, PostgreSQL, Kubernetes and AWS. "
+    "Own services end to end, mentor engineers and improve reliability."
+)
+
+
+class MockLLM:
+    """Stand-in for ChatGoogleGenerativeAI: answers every prompt with a resume JSON after a simulated delay"""
+
+    def __init__(self, latency=0.5, jitter=0.2, seed=0, tail_rate=0.0, tail_latency=10.0):
+        self.latency = latency
+        self.jitter = jitter
+        # A tail_rate fraction of replies straggle for tail_latency seconds, like a slow backend
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._corpus = [orjson.dumps(resume).decode() for resume in synthetic_corpus(20, seed)]
+        # Built once: RunnableLambda parses its functions' source, and concurrent ast.parse is unsafe on 3.11
+        self._runnable = RunnableLambda(self._invoke, afunc=self._ainvoke)
+
+    def _reply(self):
+        with self._lock:
+            self.calls += 1
+            delay = max(self.latency + self._rng.uniform(-self.jitter, self.jitter), 0.0)
+            if self._rng.random() < self.tail_rate:
+                delay = self.tail_latency
+            content = self._rng.choice(self._corpus)
+        return delay, AIMessage(content=content)
+
+    def _invoke(self, prompt_value):
+        delay, message = self._reply()
+        time.sleep(delay)
+        return message
+
+    async def _ainvoke(self, prompt_value):
+        delay, message = self._reply()
+        await asyncio.sleep(delay)
+        return message
+
+    def __call__(self, **kwargs):
+        """Called in place of ChatGoogleGenerativeAI(model=..., google_api_key=..., temperature=...)"""
+        return self._runnable
+
+
+@contextmanager
+def mock_llm(llm):
+    """Route both apps' model construction to llm for the duration"""
+    originals = langchain_google_genai.ChatGoogleGenerativeAI, generator.ChatGoogleGenerativeAI
+    langchain_google_genai.ChatGoogleGenerativeAI = generator.ChatGoogleGenerativeAI = llm
+    try:
+        yield llm
+    finally:
+        langchain_google_genai.ChatGoogleGenerativeAI, generator.ChatGoogleGenerativeAI = originals
+
+
+@contextmanager
+def concurrent_app_tests():
+    """Let AppTests run in parallel threads, the way a server runs sessions
+
+    Each AppTest run installs a mock Runtime and clears it when done, which pulls
+    it out from under runs still going in other threads; keep the last one visible.
+    Runs also share one ScriptCache, so each script is compiled once as on a server.
+    """
+    last = {}
+    script_cache = ScriptCache()
+    original_instance, original_exists = Runtime.__dict__['instance'], Runtime.__dict__['exists']
+
+    def current(cls):
+        if cls._instance is not None:
+            last['runtime'] = cls._instance
+        return last.get('runtime')
+
+    def instance(cls):
+        runtime = current(cls)
+        if runtime is None:
+            raise RuntimeError("Runtime hasn't been created!")
+        return runtime
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: current(cls) is not None)
+    local_script_runner.ScriptCache = lambda: script_cache
+    try:
+        yield
+    finally:
+        Runtime.instance, Runtime.exists = original_instance, original_exists
+        local_script_runner.ScriptCache = ScriptCache
+
+
+def session_key(session):
+    """Each simulated user brings their own key; its controller starts fully open since the mock never rate limits"""
+    api_key = f"load-test-{session}"
+    controller = controller_for(api_key)
+    controller.limit = MAX_CONCURRENCY
+    controller.spacing = 0.0
+    return api_key
+
+
+# Process resource usage
+def rss_bytes():
+    """Current resident set size (Linux), falling back to the peak reported by getrusage"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class RssSampler:
+    """Background thread tracking peak RSS while a round runs"""
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak = rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+# Simulated sessions
+class Timings:
+    """Per-operation latencies collected from every session thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    @contextmanager
+    def measure(self, op):
+        start = time.perf_counter()
+        yield
+        with self._lock:
+            self.latencies[op].append(time.perf_counter() - start)
+
+    def error(self, op):
+        with self._lock:
+            self.errors[op] += 1
+
+
+def run_optimizer_session(session, upload, timings, theme):
+    """Upload a resume to app1, optimize it against a job description, then render the downloads"""
+    at = AppTest.from_file(os.path.join(APP_DIR, SCENARIO_APPS['optimizer']), default_timeout=BATCH_TIMEOUT_SECONDS)
+    with timings.measure('app1 load'):
+        at.run()
+    at.sidebar.text_input[0].input(session_key(session))
+    with timings.measure('app1 upload'):
+        at.file_uploader[0].upload(f"resume_{session}.docx", upload, MIME_TYPES['docx']).run()
+    at.text_area[0].input(JOB_REQUIREMENTS)
+    optimize = next(button for button in at.button if button.label.startswith("✨"))
+    with timings.measure('app1 optimize'):
+        optimize.click().run()
+    resume = at.session_state.optimized_resume if 'optimized_resume' in at.session_state else None
+    if at.exception or resume is None:
+        timings.error('app1 optimize')
+        return False
+    # Download callables run outside the script rerun, so time the renderers they wrap
+    with timings.measure('app1 download'):
+        generate_stylish_pdf(resume, None, theme)
+        generate_stylish_docx(resume, None, theme)
+    return True
+
+
+def run_generator_session(session, batch_size, timings):
+    """Generate a batch in app.py, wait for the background job, then render every PDF"""
+    at = AppTest.from_file(os.path.join(APP_DIR, SCENARIO_APPS['generator']), default_timeout=BATCH_TIMEOUT_SECONDS)
+    with timings.measure('app load'):
+        at.run()
+    at.sidebar.text_input[0].input(session_key(session))
+    at.sidebar.text_input[1].input("Information Technology")
+    at.sidebar.text_input[2].input("Software Development")
+    at.sidebar.number_input[1].set_value(batch_size)
+    with timings.measure('app batch'):
+        at.sidebar.button[0].click().run()
+        job = at.session_state.generation_job
+        if job is None or not job.join(BATCH_TIMEOUT_SECONDS):
+            timings.error('app batch')
+            return False
+        at.run()
+    resumes = at.session_state.generated_resumes
+    if at.exception or len(resumes) < batch_size:
+        timings.error('app batch')
+        return False
+    # PDFs the batch pipeline already rendered are served as they are
+    with timings.measure('app download'):
+        for resume, pdf in zip(resumes, at.session_state.generated_pdfs):
+            if pdf is None:
+                render_pdf(resume)
+    return True
+
+
+def run_round(sessions, scenario, iterations, batch_size, uploads, theme):
+    """Run `sessions` concurrent simulated users, each doing `iterations` passes of the scenario"""
+    timings = Timings()
+    completed = []
+
+    def user(session):
+        for _ in range(iterations):
+            try:
+                if scenario == 'optimizer':
+                    ok = run_optimizer_session(session, uploads[session % len(uploads)], timings, theme)
+                else:
+                    ok = run_generator_session(session, batch_size, timings)
+            except Exception as e:
+                print(f"session {session}: {e!r}", file=sys.stderr)
+                timings.error(scenario)
+                ok = False
+            if ok:
+                completed.append(session)
+
+    threads = [threading.Thread(target=user, args=(session,), daemon=True) for session in range(sessions)]
+    cpu_start = cpu_seconds()
+    rss_start = rss_bytes()
+    start = time.perf_counter()
+    with RssSampler() as sampler:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        'scenario': scenario,
+        'sessions': sessions,
+        'completed': len(completed),
+        'elapsed': elapsed,
+        'throughput': len(completed) / elapsed if elapsed else 0.0,
+        'cpu_percent': 100 * (cpu_seconds() - cpu_start) / elapsed if elapsed else 0.0,
+        'rss_start_mb': rss_start / 2**20,
+        'rss_peak_mb': sampler.peak / 2**20,
+        'latency': {op: summarize(values) for op, values in sorted(timings.latencies.items())},
+        'errors': dict(timings.errors),
+    }
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+def summarize(values):
+    summary = {'count': len(values)}
+    for pct in PERCENTILES:
+        summary[f"p{pct}"] = percentile(values, pct)
+    return summary
+
+
+def print_round(result):
+    print(f"\n{result['scenario']} x {result['sessions']} sessions: "
+          f"{result['completed']} passes in {result['elapsed']:.1f}s = {result['throughput']:.2f}/s, "
+          f"CPU {result['cpu_percent']:.0f}%, RSS {result['rss_start_mb']:.0f} -> {result['rss_peak_mb']:.0f} MB peak")
+    for op, summary in result['latency'].items():
+        percentiles = "  ".join(f"p{pct} {summary[f'p{pct}'] * 1000:7.0f}ms" for pct in PERCENTILES)
+        print(f"  {op:>14}: n={summary['count']:<4} {percentiles}")
+    for op, count in result['errors'].items():
+        print(f"  {op:>14}: {count} failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent users of app.py and app1.py against a mock LLM")
+    parser.add_argument("--scenario", choices=SCENARIOS + ('both',), default='both')
+    parser.add_argument("--sessions", default="1,2,4,8", help="Comma-separated concurrent session counts to step through")
+    parser.add_argument("--iterations", type=int, default=2, help="Passes per session at each step")
+    parser.add_argument("--batch-size", type=int, default=3, help="Resumes per generator batch")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Mean mock LLM response time in seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.2)
+    parser.add_argument("--llm-tail-rate", type=float, default=0.0, help="Fraction of mock replies that straggle")
+    parser.add_argument("--llm-tail-latency", type=float, default=10.0, help="Seconds a straggling reply takes")
+    parser.add_argument("--theme", default='modern')
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="Also write the results here")
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS if args.scenario == 'both' else (args.scenario,)
+    session_counts = [int(count) for count in args.sessions.split(",")]
+    # One distinct resume per session, so extraction isn't served from the upload cache across users
+    uploads = [generate_stylish_docx(resume, None, args.theme).getvalue()
+               for resume in synthetic_corpus(max(session_counts), args.seed)]
+    print(f"Mock LLM {args.llm_latency:.2f}s ± {args.llm_jitter:.2f}s; state in {LOAD_TEST_DIR}")
+
+    results = []
+    with mock_llm(MockLLM(args.llm_latency, args.llm_jitter, args.seed, args.llm_tail_rate, args.llm_tail_latency)) as llm, concurrent_app_tests():
+        # Untimed first run of each app pays for imports and cache_resource set-up
+        for scenario in scenarios:
+            AppTest.from_file(os.path.join(APP_DIR, SCENARIO_APPS[scenario]), default_timeout=BATCH_TIMEOUT_SECONDS).run()
+        for scenario in scenarios:
+            for sessions in session_counts:
+                result = run_round(sessions, scenario, args.iterations, args.batch_size, uploads, args.theme)
+                print_round(result)
+                results.append(result)
+    print(f"\n{llm.calls} mock LLM calls")
+
+    if args.json_path:
+        with open(args.json_path, "wb") as f:
+            f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+    return 0 if not any(result['errors'] for result in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
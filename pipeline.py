@@ -0,0 +1,139 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+
+# Items allowed to wait between two stages; a full queue pauses the stage feeding it,
+# so a slow renderer holds back new LLM calls instead of piling up replies
+DEFAULT_QUEUE_SIZE = int(os.environ.get("RESUME_PIPELINE_QUEUE", "4"))
+DEFAULT_RENDER_WORKERS = int(os.environ.get("RESUME_RENDER_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+_DONE = object()
+
+
+@dataclass(slots=True)
+class StageStats:
+    """Counters for one pipeline stage; busy and blocked seconds are summed over its workers"""
+    name: str
+    workers: int
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0  # inside the stage function
+    blocked_seconds: float = 0.0  # waiting for room in the next stage's queue
+    active_seconds: float = 0.0  # first item started to last item finished
+
+    @property
+    def throughput(self):
+        """Items per second while the stage had work"""
+        return self.processed / self.active_seconds if self.active_seconds else 0.0
+
+
+class Stage:
+    """One step of a Pipeline: `workers` coroutines each awaiting fn(item); None drops the item"""
+
+    def __init__(self, name, fn, workers=1, queue_size=DEFAULT_QUEUE_SIZE):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.queue_size = queue_size  # bound of this stage's input queue
+        self.stats = StageStats(name, self.workers)
+        self._first_started = None
+
+
+class Pipeline:
+    """Stages connected by bounded asyncio queues, so every stage works on a different item at once"""
+
+    # A stage function that raises counts as failed for that item and the item is dropped;
+    # stage functions are expected to report their own errors (e.g. to a ProgressChannel)
+
+    def __init__(self, stages, on_progress=None):
+        self.stages = stages
+        self.on_progress = on_progress  # on_progress(stats dicts), after every item
+        self.elapsed = 0.0
+
+    async def run(self, items):
+        queues = [asyncio.Queue(stage.queue_size) for stage in self.stages]
+        started = time.monotonic()
+
+        async def feed():
+            for item in items:
+                await queues[0].put(item)
+            for _ in range(self.stages[0].workers):
+                await queues[0].put(_DONE)
+
+        async def run_stage(position, stage):
+            downstream = queues[position + 1] if position + 1 < len(queues) else None
+            await asyncio.gather(*(self._work(stage, queues[position], downstream) for _ in range(stage.workers)))
+            if downstream is not None:
+                for _ in range(self.stages[position + 1].workers):
+                    await downstream.put(_DONE)
+
+        try:
+            await asyncio.gather(feed(), *(run_stage(position, stage) for position, stage in enumerate(self.stages)))
+        finally:
+            self.elapsed = time.monotonic() - started
+
+    async def _work(self, stage, queue, downstream):
+        stats = stage.stats
+        while (item := await queue.get()) is not _DONE:
+            begun = time.monotonic()
+            if stage._first_started is None:
+                stage._first_started = begun
+            try:
+                result = await stage.fn(item)
+            except Exception:
+                result = None
+                stats.failed += 1
+            else:
+                stats.processed += 1
+            finished = time.monotonic()
+            stats.busy_seconds += finished - begun
+            stats.active_seconds = finished - stage._first_started
+            if self.on_progress:
+                self.on_progress(self.stats())
+            if result is not None and downstream is not None:
+                await downstream.put(result)
+                stats.blocked_seconds += time.monotonic() - finished
+
+    def stats(self):
+        """Per-stage counters (with throughput) as plain dicts, in stage order"""
+        return [dict(asdict(stage.stats), throughput=stage.stats.throughput) for stage in self.stages]
+
+
+def in_executor(executor, fn):
+    """Async wrapper running fn(item) on an executor, e.g. to give a Stage CPU-bound work"""
+    async def run(item):
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, item)
+    return run
+
+
+def format_stage_stats(stats, elapsed=None):
+    """One line per stage, plus how the wall time compares with the stages run back to back"""
+    lines = [
+        f"{stage['name']:>8}: {stage['processed']} done, {stage['failed']} failed, "
+        f"{stage['throughput']:.2f}/s, busy {stage['busy_seconds']:.1f}s over {stage['workers']} worker(s), "
+        f"blocked {stage['blocked_seconds']:.1f}s"
+        for stage in stats
+    ]
+    if elapsed is not None:
+        serial = sum(stage['busy_seconds'] / stage['workers'] for stage in stats)
+        slowest = max(stats, key=lambda stage: stage['busy_seconds'] / stage['workers'])
+        lines.append(f"    wall: {elapsed:.1f}s (slowest stage {slowest['name']}: "
+                     f"{slowest['busy_seconds'] / slowest['workers']:.1f}s, all stages back to back: {serial:.1f}s)")
+    return "\n".join(lines)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def process_pool(workers=DEFAULT_RENDER_WORKERS):
+    """Process-wide pool for CPU-bound stages, started on first use"""
+    # Spawned rather than forked: the server and the batch jobs run many threads
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pools[workers]
@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Set RESUME_PREFETCH=0 to only call the model once the user asks for it
+PREFETCH_BY_DEFAULT = os.environ.get("RESUME_PREFETCH", "1").lower() not in ("0", "false", "no")
+MAX_WORKERS = int(os.environ.get("RESUME_PREFETCH_WORKERS", "4"))
+# After a failed attempt, work for the same key is not started speculatively again for this long
+FAILURE_RETRY_SECONDS = float(os.environ.get("RESUME_PREFETCH_RETRY_SECONDS", "120"))
+
+
+class Prefetcher:
+    """Runs work speculatively on a thread pool, at most one pending future per key across all sessions"""
+
+    # Work is expected to store its own result (e.g. in the ResumeStore); a future is
+    # forgotten as soon as it finishes, so a caller waits on it and then reads the store
+
+    def __init__(self, max_workers=MAX_WORKERS, retry_after=FAILURE_RETRY_SECONDS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self.retry_after = retry_after
+        self._futures = {}
+        self._failed = {}  # key -> monotonic time its failed attempt may be retried; until then the caller does the work
+        self._lock = threading.Lock()
+        self.started = 0
+        self.failed = 0
+
+    def submit(self, key, fn, *args, **kwargs):
+        """Start fn(*args, **kwargs) unless work for key is pending or recently failed; returns the future"""
+        with self._lock:
+            if key in self._failed:
+                if time.monotonic() < self._failed[key]:
+                    return None
+                del self._failed[key]
+            future = self._futures.get(key)
+            if future is not None:
+                return future
+            future = self._executor.submit(fn, *args, **kwargs)
+            self._futures[key] = future
+            self.started += 1
+        # Outside the lock: a future that is already done runs the callback right here
+        future.add_done_callback(lambda done: self._finished(key, done))
+        return future
+
+    def _finished(self, key, future):
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+            if future.exception() is not None:
+                self._failed[key] = time.monotonic() + self.retry_after
+                self.failed += 1
+            else:
+                self._failed.pop(key, None)
+
+    def forget(self, key):
+        """Clear a failed attempt for key, e.g. once the caller has done the work itself"""
+        with self._lock:
+            self._failed.pop(key, None)
+
+    def pending(self, key):
+        """The unfinished future for key, or None"""
+        with self._lock:
+            return self._futures.get(key)
+
+    def wait(self, key, timeout=None):
+        """Block until pending work for key is done; True if there was any to wait for"""
+        future = self.pending(key)
+        if future is None:
+            return False
+        try:
+            future.result(timeout)
+        except Exception:
+            pass  # the caller finds no result in the store and does the work itself
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {'pending': len(self._futures), 'started': self.started, 'failed': self.failed}
@@ -0,0 +1,115 @@
+import copy
+import html
+import threading
+import time
+
+from layout import compile_resume
+from renderers import render_html
+
+
+# Lightweight HTML preview of a resume (no PDF layout, no network)
+def render_resume_html(resume_data, theme='modern'):
+    """Render a resume to a self-contained HTML snippet"""
+    return render_html(compile_resume(resume_data, theme))
+
+
+def preview_error_html(error):
+    """Error message shown in place of the preview; never raises, so the worker thread survives"""
+    try:
+        message = html.escape(str(error))
+    except Exception:  # str() of the error itself failed
+        message = type(error).__name__
+    return f"<p style='color: #c0392b;'>Preview error: {message}</p>"
+
+
+# Seconds a renderer's worker thread waits for a new submission before exiting
+IDLE_SECONDS = 30.0
+
+
+class DebouncedRenderer:
+    """Render the most recent submission on a worker thread once edits settle"""
+
+    # The worker is started by submit() and exits after idle_timeout seconds without work
+    # (or on close()), so renderers left behind in finished sessions hold no threads
+
+    def __init__(self, render_fn, delay=0.3, idle_timeout=IDLE_SECONDS):
+        self.render_fn = render_fn
+        self.delay = delay
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Condition()
+        self._pending = None
+        self._deadline = 0.0
+        self._version = 0
+        self._result = None
+        self._result_version = 0
+        self._thread = None
+        self._closing = False
+
+    def submit(self, payload):
+        """Queue a snapshot of payload; earlier pending snapshots are dropped"""
+        with self._lock:
+            self._version += 1
+            self._pending = copy.deepcopy(payload)
+            self._deadline = time.monotonic() + self.delay
+            self._closing = False
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._lock.notify_all()
+            return self._version
+
+    def close(self):
+        """Drop any pending snapshot and let the worker exit; a later submit starts it again"""
+        with self._lock:
+            self._pending = None
+            self._result_version = self._version  # nothing left to wait for
+            self._closing = True
+            self._lock.notify_all()
+
+    def latest(self):
+        """Return the most recently rendered output (or None)"""
+        with self._lock:
+            return self._result
+
+    def is_stale(self):
+        """True while a newer snapshot is still waiting to be rendered"""
+        with self._lock:
+            return self._result_version != self._version
+
+    def wait(self, timeout=None):
+        """Block until the latest submission has been rendered or timeout expires"""
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._result_version != self._version:
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._lock.wait(remaining)
+            return self._result
+
+    def _run(self):
+        while True:
+            with self._lock:
+                idle_until = time.monotonic() + self.idle_timeout
+                while self._pending is None:
+                    remaining = idle_until - time.monotonic()
+                    if self._closing or remaining <= 0:
+                        self._thread = None  # submit() starts a new worker from here on
+                        return
+                    self._lock.wait(remaining)
+                # Debounce: keep waiting while newer submissions keep arriving
+                while self._pending is not None and time.monotonic() < self._deadline:
+                    self._lock.wait(self._deadline - time.monotonic())
+                if self._pending is None:  # closed while debouncing
+                    continue
+                payload, version = self._pending, self._version
+                self._pending = None
+            try:
+                result = self.render_fn(payload)
+            except Exception as e:
+                result = preview_error_html(e)
+            with self._lock:
+                if version >= self._result_version:
+                    self._result = result
+                    self._result_version = version
+                self._lock.notify_all()
@@ -0,0 +1,206 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import orjson
+
+DEFAULT_PROFILE_DIR = os.environ.get("RESUME_PROFILE_DIR", "profiles")
+# Set RESUME_PROFILE=1 to start with profiling switched on (the apps also have a sidebar toggle)
+PROFILE_BY_DEFAULT = os.environ.get("RESUME_PROFILE", "").lower() in ("1", "true", "yes")
+SAMPLE_INTERVAL_SECONDS = 0.001
+TOP_FUNCTIONS = 25
+MAX_RECENT_REPORTS = 20
+# cProfile hooks are interpreter-wide on newer Pythons, so only one profile runs at a time;
+# anything asking while one is active just runs unprofiled
+_active = threading.Lock()
+
+
+@dataclass(slots=True)
+class ProfileReport:
+    """Where a profile was saved, plus the functions that took the most time"""
+    label: str
+    elapsed: float
+    pstats_path: str
+    speedscope_path: str
+    samples: int
+    top: list = field(default_factory=list)  # dicts: function, location, calls, self_seconds, total_seconds
+
+
+class StackSampler:
+    """Background thread recording one thread's Python stack every interval, for a flame graph"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames = []
+        self.samples = []
+        self.weights = []
+        self._frame_index = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _index(self, code):
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self.frames)
+            self.frames.append({'name': code.co_name, 'file': code.co_filename, 'line': code.co_firstlineno})
+        return index
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._index(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()  # speedscope wants root first
+            self.samples.append(stack)
+            self.weights.append(now - last)
+            last = now
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def speedscope(self, label):
+        """Sampled profile in speedscope's file format (open at https://www.speedscope.app)"""
+        return {
+            '$schema': "https://www.speedscope.app/file-format-schema.json",
+            'name': label,
+            'exporter': "resume-generator",
+            'activeProfileIndex': 0,
+            'shared': {'frames': self.frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': label,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(self.weights),
+                'samples': self.samples,
+                'weights': self.weights,
+            }],
+        }
+
+
+def top_functions(profile, limit=TOP_FUNCTIONS):
+    """Most expensive functions by cumulative time, with their own (self) time alongside"""
+    stats = pstats.Stats(profile)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+    rows = []
+    for func in stats.fcn_list:
+        filename, line, name = func
+        if filename == __file__:
+            continue  # the profiler's own context manager
+        primitive_calls, calls, self_time, total_time, callers = stats.stats[func]
+        rows.append({
+            'function': name,
+            'location': f"{os.path.basename(filename)}:{line}" if line else filename,
+            'calls': calls,
+            'self_seconds': round(self_time, 4),
+            'total_seconds': round(total_time, 4),
+        })
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+_recent = deque(maxlen=MAX_RECENT_REPORTS)
+_recent_lock = threading.Lock()
+
+
+def recent_reports():
+    """Reports saved by this process, newest first"""
+    with _recent_lock:
+        return list(reversed(_recent))
+
+
+def find_report(label):
+    return next((report for report in recent_reports() if report.label == label), None)
+
+
+class Profiler:
+    """Profile the calling thread between enter and exit: cProfile for pstats, a stack sampler for the flame graph"""
+
+    def __init__(self, label, directory=DEFAULT_PROFILE_DIR, interval=SAMPLE_INTERVAL_SECONDS):
+        self.label = label
+        self.directory = directory
+        self.interval = interval
+        self.report = None
+
+    def __enter__(self):
+        self.active = _active.acquire(blocking=False)
+        if not self.active:
+            return self
+        self._profile = cProfile.Profile()
+        self._sampler = StackSampler(threading.get_ident(), self.interval)
+        self._sampler.start()
+        self._started = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if not self.active:
+            return False
+        self._profile.disable()
+        elapsed = time.perf_counter() - self._started
+        self._sampler.stop()
+        _active.release()
+        os.makedirs(self.directory, exist_ok=True)
+        stem = os.path.join(self.directory, f"{datetime.now():%Y%m%dT%H%M%S}-{self.label}")
+        self._profile.dump_stats(f"{stem}.pstats")
+        with open(f"{stem}.speedscope.json", "wb") as f:
+            f.write(orjson.dumps(self._sampler.speedscope(self.label)))
+        self.report = ProfileReport(
+            label=self.label,
+            elapsed=elapsed,
+            pstats_path=f"{stem}.pstats",
+            speedscope_path=f"{stem}.speedscope.json",
+            samples=len(self._sampler.samples),
+            top=top_functions(self._profile),
+        )
+        with _recent_lock:
+            _recent.append(self.report)
+        return False
+
+
+def profiled(label, enabled=True, directory=DEFAULT_PROFILE_DIR):
+    """A Profiler when enabled, otherwise a no-op context - disabled profiling costs nothing"""
+    return Profiler(label, directory) if enabled else nullcontext()
+
+
+def profile_calls(label, fn, enabled=True):
+    """fn itself when disabled, otherwise a wrapper that profiles each call"""
+    if not enabled:
+        return fn
+
+    def wrapper(*args, **kwargs):
+        with Profiler(label):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def format_report(report, limit=10):
+    """Plain-text summary for the CLI"""
+    lines = [f"Profile '{report.label}': {report.elapsed:.2f}s, {report.samples} samples",
+             f"  pstats:      {report.pstats_path}",
+             f"  flame graph: {report.speedscope_path} (speedscope)"]
+    for row in report.top[:limit]:
+        lines.append(f"  {row['total_seconds']:8.3f}s total {row['self_seconds']:8.3f}s self  "
+                     f"{row['function']} ({row['location']})")
+    return "\n".join(lines)
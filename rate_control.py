@@ -0,0 +1,459 @@
+import asyncio
+import atexit
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+
+import orjson
+
+# Learned per-key rates survive restarts here (keys are stored hashed)
+DEFAULT_STATE_PATH = os.environ.get("RESUME_RATE_STATE", ".rate_state.json")
+# Routine updates (smoothed latency, fractional growth) are written at most this often;
+# a change of the whole-number limit or of the 429 ceiling is written straight away
+SAVE_INTERVAL_SECONDS = 5.0
+
+# Starting point for a key we haven't seen: one call at a time, 4s apart (free-tier safe)
+INITIAL_CONCURRENCY = 1.0
+INITIAL_SPACING_SECONDS = 4.0
+MAX_CONCURRENCY = 8
+MAX_SPACING_SECONDS = 60.0
+# Additive step: spacing shrinks by this much per success (and doubles on a 429)
+SPACING_STEP_SECONDS = 0.5
+# Pause applied on a 429 that carries no Retry-After hint; doubles per consecutive 429
+DEFAULT_BACKOFF_SECONDS = 10.0
+MAX_BACKOFF_SECONDS = 120.0
+# Growth slows to this fraction once concurrency passes the level of the last 429
+PROBE_FRACTION = 0.25
+# Hold (don't grow) while smoothed latency is this many times the best seen
+LATENCY_TOLERANCE = 2.0
+LATENCY_SMOOTHING = 0.2
+MAX_RETRIES = 3
+
+# A call outliving its stage's deadline is cancelled and retried (RESUME_DEADLINE_<STAGE>
+# overrides the seconds, 0 disables). With hedging on (RESUME_HEDGE=1), a call outliving the
+# observed p95 latency of its stage on that key gets one duplicate request - only if the
+# controller has a spare slot for it. Off by default: a hedge is a second billed request
+HEDGE_BY_DEFAULT = os.environ.get("RESUME_HEDGE", "0").lower() in ("1", "true", "yes")
+HEDGE_QUANTILE = 0.95
+MIN_HEDGE_SAMPLES = 20
+LATENCY_WINDOW = 200
+STAGE_DEADLINES = {'extract': 60.0, 'optimize': 90.0, 'generate': 45.0}
+
+RETRY_AFTER_PATTERNS = [
+    re.compile(r"retry[- ]after[\"']?\s*[:=]?\s*[\"']?(\d+(?:\.\d+)?)", re.I),
+    re.compile(r"retry in (\d+(?:\.\d+)?)\s*s", re.I),
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.I),
+    re.compile(r"retryDelay[\"']?\s*:\s*[\"']?(\d+(?:\.\d+)?)s", re.I),
+]
+
+
+@dataclass(frozen=True, slots=True)
+class CallBudget:
+    deadline: float = None  # seconds per attempt; None waits forever
+    hedge: bool = HEDGE_BY_DEFAULT
+
+
+STAGE_BUDGETS = {
+    stage: CallBudget(deadline=float(os.environ.get(f"RESUME_DEADLINE_{stage.upper()}", seconds)) or None)
+    for stage, seconds in STAGE_DEADLINES.items()
+}
+NO_BUDGET = CallBudget(deadline=None, hedge=False)
+
+
+def stage_budget(stage):
+    return STAGE_BUDGETS.get(stage, NO_BUDGET)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when an LLM call (and any hedge of it) outlives its stage's deadline"""
+
+
+def is_rate_limit(error):
+    error_msg = str(error)
+    return "429" in error_msg or "quota" in error_msg.lower()
+
+
+def retry_after_seconds(error):
+    """Server-suggested wait from a rate-limit error (Retry-After header or Gemini retry_delay), if any"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    value = headers.get('Retry-After') or headers.get('retry-after')
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+    text = str(error)
+    for pattern in RETRY_AFTER_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class AdaptiveRateController:
+    """AIMD limiter: grows concurrency and shrinks spacing on success, halves/doubles them on 429s"""
+
+    def __init__(self, key_id=None, state=None, on_change=None):
+        state = state or {}
+        self.key_id = key_id
+        self.limit = state.get('limit', INITIAL_CONCURRENCY)
+        self.spacing = state.get('spacing', INITIAL_SPACING_SECONDS)
+        self.latency = state.get('latency')
+        self.best_latency = state.get('best_latency')
+        self.ceiling = state.get('ceiling')
+        self.in_flight = 0
+        self.successes = 0
+        self.rate_limits = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.deadline_misses = 0
+        self._latencies = {}  # stage -> recent latencies; stages differ too much to share a p95
+        self._consecutive_limits = 0
+        self._next_start = 0.0
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._on_change = on_change
+
+    # Slots - safe to share between threads and event loops
+    def try_acquire(self):
+        """Take a slot if one is free now; otherwise return how long to wait before asking again"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self._next_start - now, self._blocked_until - now, 0.0)
+            if wait == 0.0 and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                self._next_start = now + self.spacing
+                return 0.0
+            return wait or 0.05
+
+    def acquire(self):
+        while (delay := self.try_acquire()) > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        while (delay := self.try_acquire()) > 0:
+            await asyncio.sleep(delay)
+
+    def release(self, latency=None, rate_limited=False, retry_after=None, stage=None):
+        """Return a slot and feed the outcome of the call (made for stage) back into the controller"""
+        with self._lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+            if rate_limited:
+                self._decrease(retry_after)
+            elif latency is not None:
+                self._increase(latency, stage)
+            else:
+                return
+            state = self.state()
+        if self._on_change:
+            self._on_change(self.key_id, state)
+
+    def _increase(self, latency, stage):
+        self.successes += 1
+        self._consecutive_limits = 0
+        if stage not in self._latencies:
+            self._latencies[stage] = deque(maxlen=LATENCY_WINDOW)
+        self._latencies[stage].append(latency)
+        self.latency = latency if self.latency is None else (
+            LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * self.latency
+        )
+        self.best_latency = min(self.best_latency or self.latency, self.latency)
+        if self.latency > LATENCY_TOLERANCE * self.best_latency:
+            return  # the endpoint is slowing down - hold the current rate
+        self.spacing = max(self.spacing - SPACING_STEP_SECONDS, 0.0)
+        step = 1 / self.limit
+        if self.ceiling and self.limit + step >= self.ceiling:
+            step *= PROBE_FRACTION
+        self.limit = min(self.limit + step, MAX_CONCURRENCY)
+
+    def _decrease(self, retry_after):
+        self.rate_limits += 1
+        self._consecutive_limits += 1
+        self.ceiling = self.limit
+        self.limit = max(self.limit / 2, 1.0)
+        self.spacing = min(max(self.spacing * 2, SPACING_STEP_SECONDS), MAX_SPACING_SECONDS)
+        if retry_after is None:
+            retry_after = min(DEFAULT_BACKOFF_SECONDS * 2 ** (self._consecutive_limits - 1), MAX_BACKOFF_SECONDS)
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+    def state(self):
+        return {
+            'limit': self.limit,
+            'spacing': self.spacing,
+            'ceiling': self.ceiling,
+            'latency': self.latency,
+            'best_latency': self.best_latency,
+        }
+
+    def describe(self):
+        text = f"{int(self.limit)} concurrent, {self.spacing:.1f}s apart"
+        if self.hedges or self.deadline_misses:
+            text += f"; {self.hedge_wins}/{self.hedges} hedges won, {self.deadline_misses} deadlines missed"
+        return text
+
+    def counters(self):
+        with self._lock:
+            return {
+                'successes': self.successes,
+                'rate_limits': self.rate_limits,
+                'hedges': self.hedges,
+                'hedge_wins': self.hedge_wins,
+                'deadline_misses': self.deadline_misses,
+            }
+
+    def hedge_delay(self, stage=None):
+        """Observed p95 latency of the stage's recent calls, or None until there are enough to trust"""
+        with self._lock:
+            latencies = self._latencies.get(stage, ())
+            if len(latencies) < MIN_HEDGE_SAMPLES:
+                return None
+            ordered = sorted(latencies)
+        return ordered[min(int(HEDGE_QUANTILE * len(ordered)), len(ordered) - 1)]
+
+    # Calls with rate-limit retries, deadlines and hedging
+    def invoke(self, chain, inputs, retries=MAX_RETRIES, on_retry=None, stage=None):
+        """chain.invoke under the controller and the stage's budget, retrying 429s and missed deadlines"""
+        budget = stage_budget(stage)
+        for attempt in range(1, retries + 1):
+            self.acquire()
+            try:
+                response, latency = self._race(chain, inputs, budget, stage)
+            except Exception as e:
+                self._handle_error(e, attempt, retries, on_retry)
+                continue
+            self.release(latency=latency, stage=stage)
+            return response
+
+    async def ainvoke(self, chain, inputs, retries=MAX_RETRIES, on_retry=None, stage=None):
+        """Async counterpart of invoke, for chain.ainvoke"""
+        budget = stage_budget(stage)
+        for attempt in range(1, retries + 1):
+            await self.acquire_async()
+            try:
+                response, latency = await self._race_async(chain, inputs, budget, stage)
+            except asyncio.CancelledError:
+                self.release()
+                raise
+            except Exception as e:
+                self._handle_error(e, attempt, retries, on_retry)
+                continue
+            self.release(latency=latency, stage=stage)
+            return response
+
+    def _race(self, chain, inputs, budget, stage=None):
+        """One attempt on the call pool. A blocking call can't be interrupted, so a cancelled
+        request is abandoned (its reply discarded); the model client's own timeout ends it"""
+        race = Race(self, budget, stage)
+        if race.timeout() is None:  # no deadline and nothing to hedge against yet
+            return chain.invoke(inputs), time.monotonic() - race.start
+        pending = {race.launch(_call_pool.submit(chain.invoke, inputs))}
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=race.timeout(), return_when=FIRST_COMPLETED)
+                winner = race.settle(done)
+                if winner is not None:
+                    return winner
+                if race.expired():
+                    raise race.deadline_exceeded()
+                if race.hedge_due() and race.claim_hedge_slot():
+                    pending.add(race.launch(_call_pool.submit(chain.invoke, inputs), hedge=True))
+            raise race.error
+        finally:
+            for future in pending:
+                future.cancel()
+            race.finish()
+
+    async def _race_async(self, chain, inputs, budget, stage=None):
+        """One attempt: the call, plus a hedge once it outlives p95; losers and late calls are cancelled"""
+        race = Race(self, budget, stage)
+        if race.timeout() is None:
+            return await chain.ainvoke(inputs), time.monotonic() - race.start
+        pending = {race.launch(asyncio.ensure_future(chain.ainvoke(inputs)))}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=race.timeout(), return_when=asyncio.FIRST_COMPLETED)
+                winner = race.settle(done)
+                if winner is not None:
+                    return winner
+                if race.expired():
+                    raise race.deadline_exceeded()
+                if race.hedge_due() and race.claim_hedge_slot():
+                    pending.add(race.launch(asyncio.ensure_future(chain.ainvoke(inputs)), hedge=True))
+            raise race.error
+        finally:
+            for task in pending:
+                task.cancel()
+            # Let the cancellations land before returning, so no task outlives the batch's event loop
+            await asyncio.gather(*pending, return_exceptions=True)
+            race.finish()
+
+    def _handle_error(self, error, attempt, retries, on_retry):
+        if isinstance(error, DeadlineExceeded):
+            self.release()  # a slow call says nothing about the rate limit; just try again
+            if attempt >= retries:
+                raise error
+            return
+        if not is_rate_limit(error):
+            self.release()
+            raise error
+        retry_after = retry_after_seconds(error)
+        self.release(rate_limited=True, retry_after=retry_after)
+        if attempt >= retries:
+            raise error
+        if on_retry:
+            on_retry(attempt, max(self._blocked_until - time.monotonic(), self.spacing))
+
+
+class Race:
+    """Bookkeeping for one attempt: the primary request, an optional hedge and the deadline"""
+
+    # Works on concurrent.futures futures and asyncio tasks alike. The primary's slot belongs
+    # to the caller; the hedge's slot is taken by the caller and handed back in finish()
+
+    def __init__(self, controller, budget, stage=None):
+        self.controller = controller
+        self.budget = budget
+        self.start = time.monotonic()
+        self.deadline = self.start + budget.deadline if budget.deadline else None
+        delay = controller.hedge_delay(stage) if budget.hedge else None
+        self.hedge_at = self.start + delay if delay is not None else None
+        self.started = {}
+        self.hedge = None
+        self.error = None
+
+    def launch(self, future, hedge=False):
+        self.started[future] = time.monotonic()
+        if hedge:
+            self.hedge = future
+            with self.controller._lock:
+                self.controller.hedges += 1
+        return future
+
+    def timeout(self):
+        """Seconds until the hedge is due or the deadline passes, whichever is sooner; None = no limit"""
+        times = [t for t in (self.deadline, self.hedge_at) if t is not None]
+        return max(min(times) - time.monotonic(), 0.0) if times else None
+
+    def hedge_due(self):
+        return self.hedge_at is not None and time.monotonic() >= self.hedge_at
+
+    def claim_hedge_slot(self):
+        """Take a spare controller slot for the hedge; without one, look again when one may be free"""
+        delay = self.controller.try_acquire()
+        if delay:
+            self.hedge_at = time.monotonic() + delay
+            return False
+        self.hedge_at = None  # at most one hedge per attempt
+        return True
+
+    def expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def deadline_exceeded(self):
+        with self.controller._lock:
+            self.controller.deadline_misses += 1
+        return DeadlineExceeded(f"LLM call exceeded its {self.budget.deadline:g}s deadline")
+
+    def settle(self, done):
+        """(response, latency of the request that produced it) for the first success in done, else None"""
+        for future in done:
+            if future.exception() is None:
+                if future is self.hedge:
+                    with self.controller._lock:
+                        self.controller.hedge_wins += 1
+                return future.result(), time.monotonic() - self.started[future]
+            self.error = self.error or future.exception()
+        return None
+
+    def finish(self):
+        if self.hedge is None:
+            return
+        error = self.hedge.exception() if self.hedge.done() and not self.hedge.cancelled() else None
+        if error is not None and is_rate_limit(error):
+            self.controller.release(rate_limited=True, retry_after=retry_after_seconds(error))
+        else:
+            self.controller.release()
+
+
+# Threads for blocking calls; sized for abandoned stragglers as well as live calls
+_call_pool = ThreadPoolExecutor(max_workers=4 * MAX_CONCURRENCY, thread_name_prefix="llm-call")
+
+
+class RateLimitRegistry:
+    """One controller per API key, persisted so the learned rate outlives the process"""
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._controllers = {}
+        self._state = self._load()
+        self._written = {key_id: self._milestone(state) for key_id, state in self._state.items()}
+        self._timer = None
+        if self.path:
+            atexit.register(self.flush)
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                return orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            return {}
+
+    @staticmethod
+    def _milestone(state):
+        """The part of a key's state worth an immediate write"""
+        return int(state.get('limit') or 0), state.get('ceiling')
+
+    def _save(self, key_id, state):
+        """Called on every release: keep the state, and write it now or on the next timer tick"""
+        with self._lock:
+            self._state[key_id] = dict(state, updated_at=datetime.now().isoformat(timespec="seconds"))
+            if not self.path:
+                return
+            if self._written.get(key_id) != self._milestone(state):
+                self._write()
+            elif self._timer is None:
+                self._timer = threading.Timer(SAVE_INTERVAL_SECONDS, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Write any state changed since the last write"""
+        with self._lock:
+            if self._timer is not None:  # a write is pending
+                self._write()
+
+    def _write(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(orjson.dumps(self._state, option=orjson.OPT_INDENT_2))
+            os.replace(tmp_path, self.path)
+        except OSError:
+            return  # persistence is best effort; the in-memory rate still applies
+        self._written = {key_id: self._milestone(state) for key_id, state in self._state.items()}
+
+    def controller(self, api_key):
+        key_id = hashlib.sha256((api_key or "").encode()).hexdigest()[:16]
+        with self._lock:
+            if key_id not in self._controllers:
+                self._controllers[key_id] = AdaptiveRateController(key_id, self._state.get(key_id), self._save)
+            return self._controllers[key_id]
+
+
+rate_limits = RateLimitRegistry()
+
+
+def controller_for(api_key):
+    """Process-wide controller for an API key, seeded from its persisted state"""
+    return rate_limits.controller(api_key)
@@ -0,0 +1,705 @@
+import base64
+import html
+import io
+import os
+import re
+import zipfile
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib.colors import HexColor
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable
+from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from docx import Document
+from docx.oxml.ns import qn
+from docx.shared import Inches, Pt, RGBColor
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+from layout import compile_resume, load_theme, scale_theme, BOLD, ITALIC, LINE_BREAK, THEMES_DIR
+from resources import BASE_FONTS, SharedImage
+from resume_model import normalize_resume
+
+# "auto" tries the direct-to-canvas renderer and falls back to platypus on overflow
+DEFAULT_PDF_ENGINE = os.environ.get("RESUME_PDF_ENGINE", "auto")
+# "template" clones a cached, pre-styled base document; "runs" styles each run via python-docx
+DEFAULT_DOCX_ENGINE = os.environ.get("RESUME_DOCX_ENGINE", "template")
+
+MIME_TYPES = {
+    'pdf': "application/pdf",
+    'docx': "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    'html': "text/html",
+    'md': "text/markdown",
+    'txt': "text/plain",
+}
+
+
+# === Shared style helpers ===
+
+def role_font(spec, fonts, run_style=None):
+    """Resolve a role/run style to a concrete PDF font name"""
+    weight = run_style or spec.get('font', 'regular')
+    return {'bold': fonts.bold, 'italic': fonts.italic}.get(weight, fonts.regular)
+
+
+def role_leading(spec):
+    return spec.get('leading', spec['size'] * 1.2)
+
+
+def block_runs(block, theme):
+    """Runs of a block, with the theme's bullet glyph prefixed to bullets"""
+    if block.kind == 'bullet':
+        first = block.runs[0]
+        return (type(first)(f"{theme.bullet} {first.text}", first.style),) + block.runs[1:]
+    return block.runs
+
+
+# === PDF backend (platypus) ===
+
+PDF_ALIGNMENTS = {'left': TA_LEFT, 'center': TA_CENTER, 'justify': TA_JUSTIFY}
+_pdf_styles = {}
+
+
+def pdf_styles(theme, fonts=BASE_FONTS):
+    """ParagraphStyles for every role in a theme, built once per theme and font family"""
+    key = (theme.name, fonts)
+    if key not in _pdf_styles:
+        styles = {}
+        for role, spec in theme.roles.items():
+            if 'size' not in spec:
+                continue
+            styles[role] = ParagraphStyle(
+                f"{theme.name}-{role}",
+                fontName=role_font(spec, fonts),
+                fontSize=spec['size'],
+                leading=role_leading(spec),
+                textColor=HexColor(spec['color']),
+                alignment=PDF_ALIGNMENTS[spec.get('align', 'left')],
+                spaceBefore=spec.get('space_before', 0),
+                spaceAfter=spec.get('space_after', 0),
+                leftIndent=spec.get('indent', 0),
+            )
+        _pdf_styles[key] = styles
+    return _pdf_styles[key]
+
+
+def pdf_markup(runs):
+    """Paragraph markup for a run sequence, escaping the text itself"""
+    parts = []
+    for run in runs:
+        if run.text == LINE_BREAK:
+            parts.append("<br/>")
+        elif run.style == BOLD:
+            parts.append(f"<b>{escape(run.text)}</b>")
+        elif run.style == ITALIC:
+            parts.append(f"<i>{escape(run.text)}</i>")
+        else:
+            parts.append(escape(run.text))
+    return "".join(parts)
+
+
+def render_pdf_platypus(tree, brand=None):
+    """Lay out a DocumentTree with platypus flowables"""
+    theme = tree.theme
+    fonts = brand.fonts if brand else BASE_FONTS
+    styles = pdf_styles(theme, fonts)
+    margins = theme.margins
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        topMargin=margins.get('top', 1)*inch,
+        bottomMargin=margins.get('bottom', 1)*inch,
+        leftMargin=margins.get('left', 1)*inch,
+        rightMargin=margins.get('right', 1)*inch
+    )
+    story = []
+    for block in tree.blocks():
+        if block.kind in ('paragraph', 'bullet'):
+            story.append(Paragraph(pdf_markup(block_runs(block, theme)), styles.get(block.role, styles['body'])))
+        elif block.kind == 'spacer':
+            story.append(Spacer(1, block.inches*inch))
+        elif block.kind == 'rule':
+            rule = theme.role('rule')
+            story.append(HRFlowable(
+                width="100%",
+                thickness=rule.get('thickness', 1),
+                color=HexColor(rule['color']),
+                spaceAfter=rule.get('space_after', 0),
+                spaceBefore=0
+            ))
+        elif block.kind == 'logo' and brand and brand.logo:
+            story.append(SharedImage(brand.logo, block.inches*inch, spaceAfter=8))
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+
+# === PDF backend (direct to canvas) ===
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+# SimpleDocTemplate frames pad their content by 6pt on every side
+FRAME_PADDING = 6
+
+# Page budget for the fast path; anything longer falls back to platypus
+FAST_MAX_PAGES = 2
+
+
+class LayoutOverflow(Exception):
+    """Raised when content does not fit the fast renderer's page budget"""
+
+
+@lru_cache(maxsize=65536)
+def text_width(text, font, size):
+    """Cached stringWidth"""
+    return stringWidth(text, font, size)
+
+
+@lru_cache(maxsize=16384)
+def wrap_runs(runs, size, width):
+    """Greedy word wrap of (text, font) runs; returns lines of (text, font) segments"""
+    lines = []
+    line = []
+    line_width = 0.0
+    for text, font in runs:
+        if text == LINE_BREAK:
+            lines.append(_merge_segments(line))
+            line, line_width = [], 0.0
+            continue
+        for word in text.split():
+            word_width = text_width(word, font, size)
+            gap = text_width(" ", line[-1][1], size) if line else 0.0
+            if line and line_width + gap + word_width > width:
+                lines.append(_merge_segments(line))
+                line, line_width, gap = [], 0.0, 0.0
+            line.append((word, font))
+            line_width += gap + word_width
+    if line:
+        lines.append(_merge_segments(line))
+    return tuple(lines)
+
+
+def _merge_segments(tokens):
+    segments = []
+    for word, font in tokens:
+        if segments and segments[-1][1] == font:
+            segments[-1][0].append(word)
+        else:
+            segments.append(([word], font))
+    return tuple((" ".join(words), font) for words, font in segments)
+
+
+class CanvasWriter:
+    """Minimal top-down text flow over a reportlab canvas; with no buffer it only measures"""
+
+    def __init__(self, buffer, margins, max_pages=1):
+        self.canvas = canvas.Canvas(buffer, pagesize=letter) if buffer is not None else None
+        self.max_pages = max_pages
+        self.left = margins.get('left', 1)*inch + FRAME_PADDING
+        self.width = PAGE_WIDTH - (margins.get('left', 1) + margins.get('right', 1))*inch - 2*FRAME_PADDING
+        self.top = PAGE_HEIGHT - margins.get('top', 1)*inch - FRAME_PADDING
+        self.bottom = margins.get('bottom', 1)*inch + FRAME_PADDING
+        self.page = 1
+        self.y = self.top
+        # Like platypus frames, spaceBefore only adds what the previous spaceAfter didn't
+        self._space_after = 0
+
+    def _reserve(self, height):
+        if self.y - height >= self.bottom:
+            return
+        if self.page >= self.max_pages:
+            raise LayoutOverflow()
+        if self.canvas:
+            self.canvas.showPage()
+        self.page += 1
+        self.y = self.top
+
+    def paragraph(self, runs, spec):
+        size, leading = spec['size'], role_leading(spec)
+        indent = spec.get('indent', 0)
+        lines = wrap_runs(runs, size, self.width - indent)
+        if self.y < self.top:
+            self.y -= max(spec.get('space_before', 0) - self._space_after, 0)
+        if self.canvas:
+            self.canvas.setFillColor(HexColor(spec['color']))
+        for segments in lines:
+            self._reserve(leading)
+            if self.canvas:
+                self._draw_line(segments, spec, size, indent)
+            self.y -= leading
+        self.y -= spec.get('space_after', 0)
+        self._space_after = spec.get('space_after', 0)
+
+    def _draw_line(self, segments, spec, size, indent):
+        baseline = self.y - size
+        x = self.left + indent
+        if spec.get('align') == 'center':
+            line_width = sum(text_width(text, font, size) for text, font in segments)
+            line_width += sum(text_width(" ", font, size) for _, font in segments[:-1])
+            x += (self.width - indent - line_width) / 2
+        for text, font in segments:
+            self.canvas.setFont(font, size)
+            self.canvas.drawString(x, baseline, text)
+            x += text_width(text, font, size) + text_width(" ", font, size)
+
+    def rule(self, spec):
+        thickness = spec.get('thickness', 1)
+        self._reserve(thickness)
+        if self.canvas:
+            self.canvas.setStrokeColor(HexColor(spec['color']))
+            self.canvas.setLineWidth(thickness)
+            self.canvas.line(self.left, self.y, self.left + self.width, self.y)
+        self.y -= thickness + spec.get('space_after', 0)
+        self._space_after = spec.get('space_after', 0)
+
+    def image(self, image, width, space_after=8):
+        width, height = image.size_for_width(width)
+        self._reserve(height)
+        self.y -= height
+        if self.canvas:
+            self.canvas.drawImage(image.reader, self.left + (self.width - width) / 2, self.y, width, height, mask='auto')
+        self.y -= space_after
+        self._space_after = space_after
+
+    def space(self, height):
+        self.y -= height
+        self._space_after = 0
+
+    def save(self):
+        if self.canvas:
+            self.canvas.save()
+
+
+def flow_blocks(writer, tree, brand=None):
+    """Feed every block of a DocumentTree to a CanvasWriter"""
+    theme = tree.theme
+    fonts = brand.fonts if brand else BASE_FONTS
+    for block in tree.blocks():
+        if block.kind in ('paragraph', 'bullet'):
+            spec = theme.role(block.role)
+            runs = tuple((run.text, role_font(spec, fonts, run.style)) for run in block_runs(block, theme))
+            writer.paragraph(runs, spec)
+        elif block.kind == 'spacer':
+            writer.space(block.inches*inch)
+        elif block.kind == 'rule':
+            writer.rule(theme.role('rule'))
+        elif block.kind == 'logo' and brand and brand.logo:
+            writer.image(brand.logo, block.inches*inch)
+
+
+def render_pdf_canvas(tree, brand=None, max_pages=FAST_MAX_PAGES):
+    """Draw a DocumentTree straight onto a canvas; returns None if it overflows max_pages"""
+    buffer = io.BytesIO()
+    writer = CanvasWriter(buffer, tree.theme.margins, max_pages)
+    try:
+        flow_blocks(writer, tree, brand)
+    except LayoutOverflow:
+        return None
+    writer.save()
+    buffer.seek(0)
+    return buffer
+
+
+# === Auto-fit to a page count ===
+
+# (font, spacing, leading) scales tried in order, least visible first: paragraph gaps
+# tighten to 60%, then line spacing to 90%, and only then does the type shrink, to 85%
+FIT_STEPS = (
+    tuple((1.0, round(1 - 0.05*i, 2), 1.0) for i in range(9))
+    + tuple((1.0, 0.6, round(1 - 0.02*i, 2)) for i in range(1, 6))
+    + tuple((round(1 - 0.01*i, 2), 0.6, 0.9) for i in range(1, 16))
+)
+
+
+def layout_fits(tree, brand=None, pages=1):
+    """Whether a DocumentTree fits in pages, measured with the cached text metrics alone - nothing is drawn"""
+    writer = CanvasWriter(None, tree.theme.margins, pages)
+    try:
+        flow_blocks(writer, tree, brand)
+    except LayoutOverflow:
+        return False
+    return True
+
+
+def fit_theme(resume_data, theme=None, brand=None, pages=1):
+    """The least-scaled FIT_STEPS variant of theme that fits pages (binary search); the tightest if none does"""
+    resume = normalize_resume(resume_data)
+
+    def fits(step):
+        return layout_fits(compile_resume(resume, scale_theme(theme, *FIT_STEPS[step]), brand), brand, pages)
+
+    if fits(0):
+        return load_theme(theme)
+    low, high = 1, len(FIT_STEPS) - 1
+    if not fits(high):
+        return scale_theme(theme, *FIT_STEPS[high])
+    while low < high:
+        middle = (low + high) // 2
+        if fits(middle):
+            high = middle
+        else:
+            low = middle + 1
+    return scale_theme(theme, *FIT_STEPS[low])
+
+
+# === DOCX backend ===
+
+DOCX_ALIGNMENTS = {'center': WD_ALIGN_PARAGRAPH.CENTER, 'justify': WD_ALIGN_PARAGRAPH.JUSTIFY}
+
+
+def docx_color(hex_color):
+    return RGBColor.from_string(hex_color.lstrip('#').upper())
+
+
+def set_document_font(doc, font_name):
+    """Make font_name the default font for the whole document"""
+    normal_font = doc.styles['Normal'].font
+    normal_font.name = font_name
+    normal_font.element.rPr.rFonts.set(qn('w:eastAsia'), font_name)
+
+
+def add_docx_block(doc, block, theme):
+    """Append one paragraph or bullet block, styling each run from its role"""
+    spec = theme.role(block.role)
+    paragraph = doc.add_paragraph(style='List Bullet' if block.kind == 'bullet' else None)
+    if spec.get('align') in DOCX_ALIGNMENTS:
+        paragraph.alignment = DOCX_ALIGNMENTS[spec['align']]
+    weight = spec.get('font', 'regular')
+    for run in block.runs:
+        if run.text == LINE_BREAK:
+            paragraph.add_run().add_break()
+            continue
+        docx_run = paragraph.add_run(run.text)
+        docx_run.font.size = Pt(spec.get('docx_size', spec['size']))
+        docx_run.font.color.rgb = docx_color(spec['color'])
+        if weight == 'bold' or run.style == BOLD:
+            docx_run.font.bold = True
+        if weight == 'italic' or run.style == ITALIC:
+            docx_run.font.italic = True
+    return paragraph
+
+
+def set_document_margins(doc, margins):
+    for section in doc.sections:
+        section.top_margin = Inches(margins.get('top', 1))
+        section.bottom_margin = Inches(margins.get('bottom', 1))
+        section.left_margin = Inches(margins.get('left', 1))
+        section.right_margin = Inches(margins.get('right', 1))
+
+
+def render_docx_runs(tree, brand=None):
+    """Build a DOCX document from a DocumentTree, styling every run through python-docx"""
+    theme = tree.theme
+    doc = Document()
+    set_document_margins(doc, theme.margins)
+
+    # Brand font (referenced by name) and shared logo bytes
+    if brand and brand.fonts.docx_name:
+        set_document_font(doc, brand.fonts.docx_name)
+
+    for block in tree.blocks():
+        if block.kind in ('paragraph', 'bullet'):
+            add_docx_block(doc, block, theme)
+        elif block.kind == 'spacer':
+            doc.add_paragraph()
+        elif block.kind == 'rule':
+            doc.add_paragraph("_" * 80)
+        elif block.kind == 'logo' and brand and brand.logo:
+            logo_paragraph = doc.add_paragraph()
+            logo_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            logo_paragraph.add_run().add_picture(io.BytesIO(brand.logo.data), width=Inches(block.inches))
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+# === DOCX backend (cached template + bulk XML) ===
+
+# Placeholder paragraph marking where the resume body goes in a template's document.xml
+DOCX_CONTENT_MARKER = "RESUME-CONTENT-MARKER"
+# Characters XML 1.0 can't carry; python-docx rejects them too
+XML_ILLEGAL_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_docx_templates = {}
+
+
+def docx_style_name(role):
+    return "Resume " + role.replace('_', ' ').title()
+
+
+def add_role_styles(doc, theme):
+    """Named paragraph styles for every role; styles a custom template already defines are kept"""
+    existing = {style.name for style in doc.styles}
+    style_ids = {}
+    for role, spec in theme.roles.items():
+        if 'size' not in spec:
+            continue
+        name = docx_style_name(role)
+        if name not in existing:
+            style = doc.styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+            style.base_style = doc.styles['List Bullet' if role == 'bullet' else 'Normal']
+            style.font.size = Pt(spec.get('docx_size', spec['size']))
+            style.font.color.rgb = docx_color(spec['color'])
+            style.font.bold = spec.get('font') == 'bold' or None
+            style.font.italic = spec.get('font') == 'italic' or None
+            if spec.get('align') in DOCX_ALIGNMENTS:
+                style.paragraph_format.alignment = DOCX_ALIGNMENTS[spec['align']]
+        style_ids[role] = doc.styles[name].style_id
+    return style_ids
+
+
+def docx_template(theme, brand=None):
+    """Build (once per theme and brand) a styled base document, split around the content marker"""
+    key = (theme.name, brand)
+    if key in _docx_templates:
+        return _docx_templates[key]
+
+    # Themes may point at a designer-made .docx whose "Resume ..." styles take precedence
+    base_path = theme.config.get('docx_template')
+    doc = Document(os.path.join(THEMES_DIR, base_path) if base_path else None)
+    set_document_margins(doc, theme.margins)
+    if brand and brand.fonts.docx_name:
+        set_document_font(doc, brand.fonts.docx_name)
+    style_ids = add_role_styles(doc, theme)
+    if brand and brand.logo:
+        logo_paragraph = doc.add_paragraph()
+        logo_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        logo_paragraph.add_run().add_picture(io.BytesIO(brand.logo.data), width=Inches(brand.logo_width_inches))
+    doc.add_paragraph(DOCX_CONTENT_MARKER)
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    with zipfile.ZipFile(buffer) as package:
+        members = [(info, package.read(info.filename)) for info in package.infolist()]
+    document_xml = dict((info.filename, data) for info, data in members)['word/document.xml'].decode('utf-8')
+    marker = re.search(r'<w:p>(?:(?!</w:p>).)*' + DOCX_CONTENT_MARKER + r'.*?</w:p>', document_xml, re.S)
+    template = {
+        'members': members,
+        'head': document_xml[:marker.start()],
+        'tail': document_xml[marker.end():],
+        'style_ids': style_ids,
+    }
+    _docx_templates[key] = template
+    return template
+
+
+def docx_text(text):
+    return escape(XML_ILLEGAL_CHARS.sub('', text))
+
+
+def docx_block_xml(block, style_ids):
+    """WordprocessingML for one block; run formatting comes from the role's named style"""
+    if block.kind == 'spacer':
+        return '<w:p/>'
+    if block.kind == 'rule':
+        return '<w:p><w:r><w:t>' + '_' * 80 + '</w:t></w:r></w:p>'
+    parts = [f'<w:p><w:pPr><w:pStyle w:val="{style_ids.get(block.role, style_ids["body"])}"/></w:pPr>']
+    for run in block.runs:
+        if run.text == LINE_BREAK:
+            parts.append('<w:r><w:br/></w:r>')
+            continue
+        props = {BOLD: '<w:rPr><w:b/></w:rPr>', ITALIC: '<w:rPr><w:i/></w:rPr>'}.get(run.style, '')
+        parts.append(f'<w:r>{props}<w:t xml:space="preserve">{docx_text(run.text)}</w:t></w:r>')
+    parts.append('</w:p>')
+    return ''.join(parts)
+
+
+def render_docx_template(tree, brand=None):
+    """Clone the cached template and splice the resume in as one XML string"""
+    template = docx_template(tree.theme, brand)
+    body = ''.join(docx_block_xml(block, template['style_ids']) for block in tree.blocks() if block.kind != 'logo')
+    document_xml = (template['head'] + body + template['tail']).encode('utf-8')
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as package:
+        for info, data in template['members']:
+            package.writestr(info, document_xml if info.filename == 'word/document.xml' else data)
+    buffer.seek(0)
+    return buffer
+
+
+def render_docx(tree, brand=None, engine=None):
+    """Render a DocumentTree to DOCX with the configured engine ("template" or "runs")"""
+    if (engine or DEFAULT_DOCX_ENGINE) == "template":
+        return render_docx_template(tree, brand)
+    return render_docx_runs(tree, brand)
+
+
+# === HTML backend ===
+
+def html_runs(runs):
+    parts = []
+    for run in runs:
+        if run.text == LINE_BREAK:
+            parts.append("<br>")
+        elif run.style == BOLD:
+            parts.append(f"<b>{html.escape(run.text)}</b>")
+        elif run.style == ITALIC:
+            parts.append(f"<i>{html.escape(run.text)}</i>")
+        else:
+            parts.append(html.escape(run.text))
+    return "".join(parts)
+
+
+def html_style(spec):
+    css = [f"font-size: {spec['size']}pt", f"line-height: {role_leading(spec)}pt", f"color: {spec['color']}",
+           f"margin: {spec.get('space_before', 0)}pt 0 {spec.get('space_after', 0)}pt {spec.get('indent', 0)}pt"]
+    if spec.get('font') == 'bold':
+        css.append("font-weight: bold")
+    elif spec.get('font') == 'italic':
+        css.append("font-style: italic")
+    if spec.get('align'):
+        css.append(f"text-align: {spec['align']}")
+    return "; ".join(css)
+
+
+def render_html(tree, brand=None):
+    """Self-contained HTML snippet for a DocumentTree"""
+    theme = tree.theme
+    parts = ['<div style="font-family: Helvetica, Arial, sans-serif; background: white; '
+             'padding: 1.5rem 2rem; border-radius: 8px;">']
+    for block in tree.blocks():
+        if block.kind in ('paragraph', 'bullet'):
+            parts.append(f'<p style="{html_style(theme.role(block.role))}">{html_runs(block_runs(block, theme))}</p>')
+        elif block.kind == 'spacer':
+            parts.append(f'<div style="height: {block.inches}in;"></div>')
+        elif block.kind == 'rule':
+            rule = theme.role('rule')
+            parts.append(f'<hr style="border: none; border-top: {rule.get("thickness", 1)}px solid {rule["color"]}; '
+                         f'margin: 0 0 {rule.get("space_after", 0)}pt;">')
+        elif block.kind == 'logo' and brand and brand.logo:
+            logo = base64.b64encode(brand.logo.data).decode("ascii")
+            parts.append(f'<div style="text-align: center;"><img src="data:image/png;base64,{logo}" '
+                         f'style="width: {block.inches}in;"></div>')
+    parts.append('</div>')
+    return "".join(parts)
+
+
+# === Markdown / plain text backends ===
+
+MARKDOWN_EMPHASIS = {BOLD: "**", ITALIC: "*"}
+
+
+def markdown_runs(runs, role_style=None, plain=False):
+    """Inline text for a run sequence; runs styled like their role are left bare"""
+    text = ""
+    for run in runs:
+        if run.text == LINE_BREAK:
+            text += "\n" if plain else "  \n"
+        elif plain or run.style in (None, role_style) or not run.text.strip():
+            text += run.text
+        else:
+            marker = MARKDOWN_EMPHASIS[run.style]
+            stripped = run.text.strip()
+            text += run.text.replace(stripped, f"{marker}{stripped}{marker}", 1)
+    return text
+
+
+def render_markdown(tree, brand=None, plain=False):
+    """Markdown (or plain text with plain=True) for a DocumentTree"""
+    theme = tree.theme
+    lines = []
+    for block in tree.blocks():
+        if block.kind not in ('paragraph', 'bullet'):
+            if block.kind == 'rule' and not plain:
+                lines.append("---")
+            if lines and lines[-1] != "":
+                lines.append("")
+            continue
+        role_style = theme.role(block.role).get('font')
+        text = markdown_runs(block.runs, role_style, plain)
+        if block.role in ('name', 'heading'):
+            if lines and lines[-1] != "":
+                lines.append("")
+            lines.append(text if plain else f"{'#' if block.role == 'name' else '##'} {text}")
+        elif block.kind == 'bullet':
+            lines.append(f"{theme.bullet} {text}" if plain else f"- {text}")
+        elif plain:
+            lines.append(text)
+        else:
+            marker = MARKDOWN_EMPHASIS.get(role_style, "")
+            lines.append(f"{marker}{text}{marker}  ")
+    return "\n".join(lines).strip() + "\n"
+
+
+def render_text(tree, brand=None):
+    return render_markdown(tree, brand, plain=True)
+
+
+# === Front door: compile once, render to any format ===
+
+BACKENDS = {
+    'pdf': render_pdf_platypus,
+    'docx': render_docx,
+    'html': render_html,
+    'md': render_markdown,
+    'txt': render_text,
+}
+
+
+def render_document(tree, fmt, brand=None):
+    """Render a compiled DocumentTree with one backend"""
+    return BACKENDS[fmt](tree, brand)
+
+
+def export_formats(resume_data, formats=('pdf', 'docx', 'html', 'md'), theme=None, brand=None):
+    """Compile a resume once and render it to several formats"""
+    tree = compile_resume(resume_data, theme, brand)
+    return {fmt: render_document(tree, fmt, brand) for fmt in formats}
+
+
+def generate_pdf(resume_data):
+    """Classic PDF layout used by the bulk generator"""
+    return render_pdf_platypus(compile_resume(resume_data, 'classic'))
+
+
+def generate_pdf_fast(resume_data, max_pages=FAST_MAX_PAGES, theme='classic', brand=None):
+    """Canvas rendering of a resume; returns None if it overflows max_pages"""
+    return render_pdf_canvas(compile_resume(resume_data, theme, brand), brand, max_pages)
+
+
+def render_pdf(resume_data, engine=None, max_pages=FAST_MAX_PAGES, theme='classic', brand=None):
+    """Render with the configured engine ("auto" or "platypus")"""
+    engine = engine or DEFAULT_PDF_ENGINE
+    tree = compile_resume(resume_data, theme, brand)
+    if engine == "auto":
+        buffer = render_pdf_canvas(tree, brand, max_pages)
+        if buffer is not None:
+            return buffer
+    return render_pdf_platypus(tree, brand)
+
+
+def render_pdf_bytes(resume_data):
+    """render_pdf as bytes, for process pools (a BytesIO can't be sent back to the parent)"""
+    return render_pdf(resume_data).getvalue()
+
+
+def generate_stylish_pdf(resume_data, brand=None, theme='modern', fit_pages=None):
+    """Generate a modern, stylish PDF resume, tightened to fit_pages pages when given"""
+    if fit_pages:
+        theme = fit_theme(resume_data, theme, brand, fit_pages)
+    return render_pdf_platypus(compile_resume(resume_data, theme, brand), brand)
+
+
+def generate_stylish_docx(resume_data, brand=None, theme='modern', engine=None):
+    """Generate a modern, stylish DOCX resume"""
+    return render_docx(compile_resume(resume_data, theme, brand), brand, engine)
+
+
+def generate_html(resume_data, brand=None, theme='modern'):
+    """Standalone HTML page for a resume"""
+    tree = compile_resume(resume_data, theme, brand)
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{html.escape(tree.title)}</title></head>'
+            f'<body style="background: #f5f5f5;">{render_html(tree, brand)}</body></html>')
+
+
+def generate_markdown(resume_data, theme='modern'):
+    """Markdown version of a resume, e.g. for pasting into job portals"""
+    return render_markdown(compile_resume(resume_data, theme))
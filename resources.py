@@ -0,0 +1,161 @@
+import io
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+
+from PIL import Image as PILImage
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Flowable
+
+# Branding config (JSON) used by the stylish renderers when set
+DEFAULT_BRAND_PATH = os.environ.get("RESUME_BRAND")
+# Logos are downscaled to this many pixels on the long edge before embedding
+MAX_LOGO_PIXELS = 600
+
+
+@dataclass(frozen=True)
+class FontFamily:
+    """Registered PDF font names for one family, plus the name DOCX should reference"""
+    regular: str = 'Helvetica'
+    bold: str = 'Helvetica-Bold'
+    italic: str = 'Helvetica-Oblique'
+    bold_italic: str = 'Helvetica-BoldOblique'
+    docx_name: str = None
+
+
+BASE_FONTS = FontFamily()
+
+
+@dataclass(frozen=True)
+class ImageResource:
+    """An image decoded once and shared by every document in the process"""
+    data: bytes
+    width: int
+    height: int
+    reader: ImageReader = field(compare=False, repr=False)
+
+    def size_for_width(self, width):
+        return width, width * self.height / self.width
+
+
+class SharedImage(Flowable):
+    """Platypus flowable that draws a pooled ImageResource without re-reading it"""
+
+    def __init__(self, image, width, hAlign='CENTER', spaceAfter=0):
+        Flowable.__init__(self)
+        self.image = image
+        self.drawWidth, self.drawHeight = image.size_for_width(width)
+        self.hAlign = hAlign
+        self.spaceAfter = spaceAfter
+
+    def wrap(self, availWidth, availHeight):
+        return self.drawWidth, self.drawHeight
+
+    def draw(self):
+        self.canv.drawImage(self.image.reader, 0, 0, self.drawWidth, self.drawHeight, mask='auto')
+
+
+class ResourcePool:
+    """Process-wide registry of embedded fonts and decoded images"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fonts = {}
+        self._images = {}
+
+    def font_family(self, name, regular, bold=None, italic=None, bold_italic=None):
+        """Register a TTF family once; ReportLab embeds only the glyphs each PDF uses"""
+        key = (name, regular, bold, italic, bold_italic)
+        with self._lock:
+            if key in self._fonts:
+                return self._fonts[key]
+            faces = {}
+            for suffix, path in (('', regular), ('-Bold', bold), ('-Italic', italic), ('-BoldItalic', bold_italic)):
+                if path:
+                    face = f"{name}{suffix}"
+                    pdfmetrics.registerFont(TTFont(face, path))
+                    faces[suffix] = face
+            family = FontFamily(
+                regular=faces[''],
+                bold=faces.get('-Bold', faces['']),
+                italic=faces.get('-Italic', faces['']),
+                bold_italic=faces.get('-BoldItalic', faces.get('-Bold', faces[''])),
+                docx_name=name,
+            )
+            # Lets <b>/<i> markup inside Paragraphs resolve to the embedded faces
+            pdfmetrics.registerFontFamily(
+                family.regular, normal=family.regular, bold=family.bold,
+                italic=family.italic, boldItalic=family.bold_italic
+            )
+            self._fonts[key] = family
+            return family
+
+    def image(self, path, max_pixels=MAX_LOGO_PIXELS):
+        """Load, downscale and re-encode an image once per process"""
+        key = (os.path.abspath(path), max_pixels)
+        with self._lock:
+            if key in self._images:
+                return self._images[key]
+            with PILImage.open(path) as img:
+                img.load()
+                if max(img.size) > max_pixels:
+                    img.thumbnail((max_pixels, max_pixels))
+                if img.mode not in ('RGB', 'RGBA'):
+                    img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+                out = io.BytesIO()
+                img.save(out, format='PNG', optimize=True)
+            data = out.getvalue()
+            resource = ImageResource(data, img.width, img.height, ImageReader(io.BytesIO(data)))
+            self._images[key] = resource
+            return resource
+
+    def stats(self):
+        with self._lock:
+            return {
+                'fonts': len(self._fonts),
+                'images': len(self._images),
+                'image_bytes': sum(len(image.data) for image in self._images.values()),
+            }
+
+
+resource_pool = ResourcePool()
+
+
+@dataclass(frozen=True)
+class Brand:
+    """Fonts and logo for branded output"""
+    fonts: FontFamily = BASE_FONTS
+    logo: ImageResource = None
+    logo_width_inches: float = 1.5
+
+
+_brands = {}
+
+
+def load_brand(path=DEFAULT_BRAND_PATH, pool=resource_pool):
+    """Load a brand JSON (font_name, font_regular/bold/italic/bold_italic, logo, logo_width_inches)"""
+    if not path:
+        return None
+    path = os.path.abspath(path)
+    if path in _brands:
+        return _brands[path]
+
+    with open(path) as f:
+        config = json.load(f)
+    base_dir = os.path.dirname(path)
+    resolve = lambda key: os.path.join(base_dir, config[key]) if config.get(key) else None
+
+    fonts = BASE_FONTS
+    if config.get('font_regular'):
+        fonts = pool.font_family(
+            config.get('font_name', 'BrandFont'),
+            resolve('font_regular'), resolve('font_bold'), resolve('font_italic'), resolve('font_bold_italic')
+        )
+    logo = pool.image(resolve('logo')) if config.get('logo') else None
+
+    brand = Brand(fonts=fonts, logo=logo, logo_width_inches=config.get('logo_width_inches', 1.5))
+    _brands[path] = brand
+    return brand
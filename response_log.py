@@ -0,0 +1,170 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import orjson
+
+try:
+    import fcntl
+except ImportError:  # no cross-process locking on Windows; the thread lock still applies
+    fcntl = None
+
+from resume_store import prompt_fingerprint
+
+DEFAULT_RESPONSE_LOG = os.environ.get("RESUME_RESPONSE_LOG", "llm_responses.jsonl")
+
+# live: always call the model; cache: reuse a logged reply when the inputs match;
+# replay: never call the model - a missing reply is an error
+RESPONSE_MODES = ('live', 'cache', 'replay')
+
+
+class MissingResponse(LookupError):
+    """Raised in replay mode when the log has no reply for a prompt"""
+
+
+class LoggedResponse:
+    """Stand-in for an AIMessage read back from the log"""
+
+    def __init__(self, content):
+        self.content = content
+
+
+class ResponseLog:
+    """Append-only JSONL of LLM replies, indexed by a hash of the prompt template and its inputs"""
+
+    # With a SharedStore, replies are also published there so other server
+    # processes get cache hits for calls this one made (and vice versa).
+    # Several processes may append to the same file: appends hold an flock, and
+    # lines they wrote are picked up by re-scanning from where this process stopped
+    SHARED_NAMESPACE = 'llm'
+
+    def __init__(self, path=DEFAULT_RESPONSE_LOG, prompt=None, mode='cache', shared=None):
+        if mode not in RESPONSE_MODES:
+            raise ValueError(f"mode must be one of {RESPONSE_MODES}, got {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.shared = shared
+        self.prompt_key = prompt_fingerprint(prompt) if prompt else ""
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._offsets = {}
+        self._scanned = 0  # the file is indexed up to here
+        self._file = open(path, "a+b")
+        with self._locked():
+            self._scan()
+            self._file.seek(0, os.SEEK_END)
+            if self._file.tell() > self._scanned:
+                self._file.write(b"\n")  # seal a torn last line so the next record starts cleanly
+                self._file.flush()
+                self._scanned = self._file.tell()
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive flock on the log, so appends from other processes can't land mid-record"""
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def _scan(self):
+        """Index every complete line after the scanned offset by key; later entries for the same key win"""
+        self._file.seek(self._scanned)
+        offset = self._scanned
+        for line in self._file:
+            if not line.endswith(b"\n"):
+                break  # another process is still writing it
+            try:
+                self._offsets[orjson.loads(line)['key']] = offset
+            except (orjson.JSONDecodeError, KeyError, TypeError):
+                pass
+            offset += len(line)
+        self._scanned = offset
+
+    def _read(self, key):
+        """Logged content for key, or None; an index that points at the wrong line is rebuilt on the next scan"""
+        offset = self._offsets.get(key)
+        if offset is None:
+            return None
+        self._file.seek(offset)
+        try:
+            record = orjson.loads(self._file.readline())
+            if record['key'] == key:
+                return record['content']
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            pass
+        self._offsets.clear()
+        self._scanned = 0
+        return None
+
+    def key(self, inputs):
+        payload = orjson.dumps({'prompt': self.prompt_key, 'inputs': inputs}, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, inputs):
+        """Logged reply text for these inputs, or None"""
+        key = self.key(inputs)
+        with self._lock:
+            content = self._read(key)
+            if content is None:
+                self._scan()  # picks up lines other processes appended since the last look
+                content = self._read(key)
+            if content is not None:
+                self.hits += 1
+                return content
+        content = self.shared.get(self.SHARED_NAMESPACE, key) if self.shared else None
+        with self._lock:
+            if content is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return content.decode("utf-8")
+
+    def record(self, inputs, content, model=None):
+        key = self.key(inputs)
+        entry = orjson.dumps({
+            'key': key,
+            'prompt': self.prompt_key,
+            'inputs': inputs,
+            'model': model,
+            'content': content,
+            'at': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }) + b"\n"
+        with self._lock, self._locked():
+            self._scan()
+            self._file.seek(0, os.SEEK_END)
+            if self._file.tell() > self._scanned:
+                self._file.write(b"\n")  # a writer died mid-line; start ours on a fresh one
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            self._file.write(entry)
+            self._file.flush()
+            self._offsets[key] = offset
+            self._scanned = offset + len(entry)
+        if self.shared:
+            self.shared.put(self.SHARED_NAMESPACE, key, content.encode("utf-8"))
+
+    async def ainvoke(self, controller, chain, inputs, model=None, **kwargs):
+        """Serve from the log according to mode, otherwise call chain through the rate controller and log the reply"""
+        if self.mode != 'live':
+            content = self.get(inputs)
+            if content is not None:
+                return LoggedResponse(content)
+            if self.mode == 'replay':
+                raise MissingResponse(f"No logged response for seed {inputs.get('seed', '?')} in {self.path}")
+        response = await controller.ainvoke(chain, inputs, **kwargs)
+        self.record(inputs, response.content, model)
+        return response
+
+    def __len__(self):
+        with self._lock:
+            return len(self._offsets)
+
+    def close(self):
+        self._file.close()
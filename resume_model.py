@@ -0,0 +1,168 @@
+import tracemalloc
+from dataclasses import dataclass, field
+
+import orjson
+
+
+@dataclass(slots=True)
+class Experience:
+    title: str = ""
+    company: str = ""
+    duration: str = ""
+    responsibilities: list = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Education:
+    degree: str = ""
+    university: str = ""
+    year: str = ""
+    details: str = ""
+
+
+@dataclass(slots=True)
+class Project:
+    name: str = ""
+    description: str = ""
+    technologies: list = field(default_factory=list)
+    duration: str = ""
+
+
+@dataclass(slots=True)
+class Resume:
+    name: str = ""
+    email: str = ""
+    phone: str = ""
+    summary: str = ""
+    skills: list = field(default_factory=list)
+    experience: list = field(default_factory=list)
+    education: list = field(default_factory=list)
+    projects: list = field(default_factory=list)
+    certifications: list = field(default_factory=list)
+
+    def to_dict(self):
+        """Plain-dict form, e.g. for prompts and JSON widgets"""
+        return orjson.loads(orjson.dumps(self))
+
+
+# Normalization - the one place that knows about the LLM's loose JSON shapes
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(_text(v) for v in value if v)
+    return str(value).strip()
+
+
+def _text_list(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        separator = "\n" if "\n" in value else ","
+        value = value.split(separator)
+    return [text for text in (_text(v) for v in value) if text]
+
+
+def _entries(value):
+    if not value:
+        return []
+    if isinstance(value, dict):
+        return [value]
+    return [entry for entry in value if isinstance(entry, dict)]
+
+
+def normalize_resume(data):
+    """Coerce a resume dict (or Resume) into the canonical Resume shape"""
+    if isinstance(data, Resume):
+        return data
+    return Resume(
+        name=_text(data.get('name')),
+        email=_text(data.get('email')),
+        phone=_text(data.get('phone')),
+        summary=_text(data.get('summary')),
+        skills=_text_list(data.get('skills')),
+        experience=[
+            Experience(
+                title=_text(exp.get('title')),
+                company=_text(exp.get('company')),
+                duration=_text(exp.get('duration')),
+                responsibilities=_text_list(exp.get('responsibilities')),
+            )
+            for exp in _entries(data.get('experience'))
+        ],
+        education=[
+            Education(
+                degree=_text(edu.get('degree')),
+                university=_text(edu.get('university')),
+                year=_text(edu.get('year')),
+                details=_text(edu.get('details')),
+            )
+            for edu in _entries(data.get('education'))
+        ],
+        projects=[
+            Project(
+                name=_text(project.get('name')),
+                description=_text(project.get('description')),
+                technologies=_text_list(project.get('technologies')),
+                duration=_text(project.get('duration')),
+            )
+            for project in _entries(data.get('projects'))
+        ],
+        certifications=_text_list(data.get('certifications')),
+    )
+
+
+def dumps(resume):
+    """Serialize a Resume (or resume dict) to JSON bytes"""
+    return orjson.dumps(normalize_resume(resume))
+
+
+def loads(data):
+    """Parse JSON bytes/str into a Resume"""
+    return normalize_resume(orjson.loads(data))
+
+
+def measure_memory(raw_resumes):
+    """Bytes per resume held as plain dicts vs. Resume objects"""
+    def allocated(build):
+        tracemalloc.start()
+        held = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del held
+        return size
+
+    count = max(len(raw_resumes), 1)
+    blobs = [orjson.dumps(raw) for raw in raw_resumes]
+    as_dicts = allocated(lambda: [orjson.loads(blob) for blob in blobs])
+    as_models = allocated(lambda: [loads(blob) for blob in blobs])
+    return {
+        'resumes': len(raw_resumes),
+        'dict_bytes_per_resume': as_dicts / count,
+        'model_bytes_per_resume': as_models / count,
+        'json_bytes_per_resume': sum(len(blob) for blob in blobs) / count,
+    }
+
+
+SAMPLE_RESUME = {
+    "name": "Alex Morgan",
+    "email": "alex@example.com",
+    "phone": "555-0100",
+    "summary": "Software engineer with a track record of shipping reliable services.",
+    "skills": ["Python", "SQL", "Docker", "Kubernetes", "AWS", "Leadership", "Communication", "Go"],
+    "experience": [
+        {"title": "Senior Engineer", "company": "Acme", "duration": "2020 - Present",
+         "responsibilities": ["Led migration to microservices", "Cut p95 latency by 40%",
+                              "Mentored four engineers", "Owned on-call rotation"]},
+        {"title": "Engineer", "company": "Globex", "duration": "2017 - 2020",
+         "responsibilities": ["Built billing pipeline", "Automated deployments",
+                              "Wrote integration tests", "Reduced costs by 15%"]},
+    ],
+    "education": {"degree": "B.S. Computer Science", "university": "State University", "year": "2017"},
+    "certifications": ["AWS Solutions Architect", "CKA"],
+}
+
+
+if __name__ == "__main__":
+    for batch in (100, 1000, 10000):
+        print(measure_memory([dict(SAMPLE_RESUME, name=f"{SAMPLE_RESUME['name']} {i}") for i in range(batch)]))
@@ -0,0 +1,149 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import orjson
+
+try:
+    import zstandard
+except ImportError:  # compression is optional
+    zstandard = None
+
+CHUNK_SIZE = 64 * 1024
+
+
+def fingerprint_bytes(data):
+    """Content hash used as the store key"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def fingerprint_upload(uploaded_file):
+    """Hash an uploaded file in chunks without keeping a second copy in memory"""
+    digest = hashlib.sha256()
+    uploaded_file.seek(0)
+    for chunk in iter(lambda: uploaded_file.read(CHUNK_SIZE), b""):
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def prompt_fingerprint(prompt):
+    """Short hash of a prompt template, so cached LLM output is tied to the prompt that produced it"""
+    return hashlib.sha256(prompt.template.encode("utf-8")).hexdigest()[:16]
+
+
+class ResumeStore:
+    """Thread-safe LRU store of parsed resumes keyed by upload fingerprint"""
+
+    # Entries hold text / structured / error / provenance, kept as orjson bytes
+    # (zstd-compressed when zstandard is installed)
+
+    def __init__(self, max_entries=256, compress=True, level=3):
+        self.max_entries = max_entries
+        self.compress = compress and zstandard is not None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.compress:
+            self._compressor = zstandard.ZstdCompressor(level=level)
+            self._decompressor = zstandard.ZstdDecompressor()
+
+    def _encode(self, entry):
+        blob = orjson.dumps(entry)
+        return self._compressor.compress(blob) if self.compress else blob
+
+    def _decode(self, blob):
+        return orjson.loads(self._decompressor.decompress(blob) if self.compress else blob)
+
+    def get(self, fingerprint):
+        """Return the stored entry dict, or None"""
+        with self._lock:
+            blob = self._entries.get(fingerprint)
+            if blob is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(fingerprint)
+            self.hits += 1
+        return self._decode(blob)
+
+    def update(self, fingerprint, **fields):
+        """Merge fields (text, structured, error, provenance) into an entry"""
+        with self._lock:
+            blob = self._entries.get(fingerprint)
+            entry = self._decode(blob) if blob is not None else {'provenance': {}}
+            provenance = fields.pop('provenance', None)
+            entry.update(fields)
+            if provenance:
+                entry['provenance'].update(provenance)
+            entry['provenance']['updated_at'] = time.time()
+            self._entries[fingerprint] = self._encode(entry)
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Hit/miss counters and stored size"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': sum(len(blob) for blob in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'compressed': self.compress,
+            }
+
+
+class SharedResumeStore(ResumeStore):
+    """ResumeStore kept in a SharedStore, so every server process reuses the same extractions"""
+
+    NAMESPACE = 'resumes'
+
+    def __init__(self, store, compress=True, level=3):
+        super().__init__(max_entries=store.max_entries, compress=compress, level=level)
+        self.store = store
+
+    def get(self, fingerprint):
+        blob = self.store.get(self.NAMESPACE, fingerprint)
+        with self._lock:
+            if blob is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return self._decode(blob)
+
+    def update(self, fingerprint, **fields):
+        provenance = fields.pop('provenance', None)
+        merged = {}
+
+        def merge(blob):
+            entry = self._decode(blob) if blob is not None else {'provenance': {}}
+            entry.update(fields)
+            if provenance:
+                entry['provenance'].update(provenance)
+            entry['provenance']['updated_at'] = time.time()
+            merged['entry'] = entry
+            return self._encode(entry)
+
+        self.store.update(self.NAMESPACE, fingerprint, merge)
+        return merged['entry']
+
+    def __len__(self):
+        return self.store.stats()['namespaces'].get(self.NAMESPACE, {}).get('entries', 0)
+
+    def stats(self):
+        namespace = self.store.stats()['namespaces'].get(self.NAMESPACE, {})
+        with self._lock:
+            return {
+                'entries': namespace.get('entries', 0),
+                'bytes': namespace.get('bytes') or 0,
+                'hits': self.hits,
+                'misses': self.misses,
+                'compressed': self.compress,
+                'shared': self.store.path,
+            }
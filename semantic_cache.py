@@ -0,0 +1,212 @@
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+import orjson
+
+from keywords import normalize_text, resume_plain_text
+
+# Opt-in: set RESUME_REUSE_OPTIMIZATIONS=1 to reuse optimizations by default
+REUSE_BY_DEFAULT = os.environ.get("RESUME_REUSE_OPTIMIZATIONS", "0").lower() in ("1", "true", "yes")
+# Both the resume and the job description must be at least this (cosine) similar to a stored pair
+DEFAULT_REUSE_THRESHOLD = float(os.environ.get("RESUME_REUSE_THRESHOLD", "0.9"))
+# "exact" scans every stored pair with NumPy; "lsh" only scores random-hyperplane bucket matches
+DEFAULT_INDEX = os.environ.get("RESUME_REUSE_INDEX", "exact")
+DEFAULT_MAX_ENTRIES = int(os.environ.get("RESUME_REUSE_MAX_ENTRIES", "2000"))
+FEATURE_DIM = 2048
+TOKEN = re.compile(r"[\w+#]+")
+# Never taken from a stored optimization: the prompt keeps these exactly as extracted
+PROTECTED_FIELDS = ('name', 'email', 'phone', 'education', 'projects')
+# Per experience entry, facts that must match exactly for a reuse and are put back afterwards
+EXPERIENCE_FACTS = ('title', 'company', 'duration')
+
+
+def hashed_features(text, dim=FEATURE_DIM):
+    """Unit vector of signed, hashed word unigrams and bigrams with sublinear term frequency"""
+    tokens = TOKEN.findall(normalize_text(text))
+    counts = Counter(tokens)
+    counts.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, count in counts.items():
+        h = zlib.crc32(feature.encode("utf-8"))  # stable across processes, unlike hash()
+        vector[h % dim] += (1.0 + math.log(count)) * (1.0 if h & 0x80000000 else -1.0)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _text(value):
+    return str(value or "").strip()
+
+
+def resume_facts(extracted):
+    """The facts of an extracted resume a reuse may not change: each job's title, company and dates, skills and certifications"""
+    experience = extracted.get('experience') or []
+    return [
+        [[_text(entry.get(fact)) for fact in EXPERIENCE_FACTS] for entry in experience if isinstance(entry, dict)],
+        sorted({_text(skill).casefold() for skill in extracted.get('skills') or []}),
+        sorted({_text(cert).casefold() for cert in extracted.get('certifications') or []}),
+    ]
+
+
+def adapt_optimization(optimized, extracted):
+    """A stored optimization with this resume's protected fields and experience facts put back"""
+    adapted = dict(optimized)
+    adapted.update({name: extracted[name] for name in PROTECTED_FIELDS if name in extracted})
+    entries = [entry for entry in extracted.get('experience') or [] if isinstance(entry, dict)]
+    rewritten = [entry for entry in adapted.get('experience') or [] if isinstance(entry, dict)]
+    adapted['experience'] = [
+        dict(rewrite, **{fact: entry.get(fact, "") for fact in EXPERIENCE_FACTS})
+        for entry, rewrite in zip(entries, rewritten)
+    ] + entries[len(rewritten):]
+    return adapted
+
+
+class LshBuckets:
+    """Random-hyperplane LSH: slots whose sign pattern matches the query's in at least one table"""
+
+    def __init__(self, dim, tables=8, bits=10, seed=0):
+        self._planes = np.random.default_rng(seed).standard_normal((tables, bits, dim)).astype(np.float32)
+        self._weights = 1 << np.arange(bits)
+        self._buckets = [{} for _ in range(tables)]
+        self._slots = {}  # slot -> its signature in each table
+
+    def _signatures(self, vector):
+        return ((self._planes @ vector > 0) @ self._weights).tolist()
+
+    def add(self, slot, vector):
+        self.remove(slot)
+        signatures = self._signatures(vector)
+        for buckets, signature in zip(self._buckets, signatures):
+            buckets.setdefault(signature, set()).add(slot)
+        self._slots[slot] = signatures
+
+    def remove(self, slot):
+        for buckets, signature in zip(self._buckets, self._slots.pop(slot, ())):
+            buckets[signature].discard(slot)
+            if not buckets[signature]:
+                del buckets[signature]
+
+    def candidates(self, vector):
+        found = set()
+        for buckets, signature in zip(self._buckets, self._signatures(vector)):
+            found.update(buckets.get(signature, ()))
+        return np.fromiter(found, dtype=np.intp, count=len(found))
+
+
+@dataclass(slots=True)
+class Reuse:
+    """A stored optimization close enough to the request to be reused"""
+    optimized: dict
+    similarity: float  # the lower of the two below
+    resume_similarity: float
+    job_similarity: float
+
+
+class SemanticCache:
+    """Thread-safe index of (extracted resume, job requirements) pairs and their optimizations"""
+
+    # Pairs are hashed feature vectors in two growing NumPy matrices; once max_entries
+    # is reached the oldest slot is overwritten. Optimizations are kept as orjson bytes.
+    # Similarity alone never decides a reuse: the stored resume's facts (resume_facts)
+    # must equal the new one's, so a corrected date or employer always gets a fresh call
+
+    def __init__(self, threshold=DEFAULT_REUSE_THRESHOLD, max_entries=DEFAULT_MAX_ENTRIES, index=DEFAULT_INDEX, dim=FEATURE_DIM):
+        if index not in ("exact", "lsh"):
+            raise ValueError(f"Unknown index {index!r} (expected 'exact' or 'lsh')")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.index = index
+        self.dim = dim
+        self._resumes = np.zeros((0, dim), dtype=np.float32)
+        self._jobs = np.zeros((0, dim), dtype=np.float32)
+        self._payloads = []
+        self._facts = []
+        self._next = 0  # slot the next add writes to
+        self._buckets = LshBuckets(2 * dim) if index == "lsh" else None
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+
+    def vectors(self, extracted, job_text):
+        return hashed_features(resume_plain_text(extracted), self.dim), hashed_features(job_text, self.dim)
+
+    def _pair(self, resume_vector, job_vector):
+        """Both vectors in one unit vector, for the LSH tables"""
+        return np.concatenate((resume_vector, job_vector)) / np.float32(math.sqrt(2))
+
+    def lookup(self, extracted, job_text, threshold=None):
+        """The most similar stored optimization of a resume with the same facts, if both similarities reach threshold"""
+        threshold = self.threshold if threshold is None else threshold
+        resume_vector, job_vector = self.vectors(extracted, job_text)
+        facts = orjson.dumps(resume_facts(extracted))
+        with self._lock:
+            self.lookups += 1
+            if self._buckets is not None:
+                slots = self._buckets.candidates(self._pair(resume_vector, job_vector))
+                resumes, jobs = self._resumes[slots], self._jobs[slots]
+            else:
+                slots = np.arange(len(self._payloads))
+                resumes, jobs = self._resumes[:len(slots)], self._jobs[:len(slots)]
+            if not len(slots):
+                return None
+            resume_scores = resumes @ resume_vector
+            job_scores = jobs @ job_vector
+            scores = np.minimum(resume_scores, job_scores)
+            for best in np.argsort(-scores):
+                if scores[best] < threshold:
+                    return None
+                if self._facts[slots[best]] == facts:
+                    break
+            else:
+                return None
+            self.hits += 1
+            payload = self._payloads[slots[best]]
+        return Reuse(orjson.loads(payload), float(scores[best]), float(resume_scores[best]), float(job_scores[best]))
+
+    def _grown(self, matrix, capacity):
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        grown[:len(matrix)] = matrix
+        return grown
+
+    def add(self, extracted, job_text, optimized):
+        """Remember the optimization made for this pair"""
+        resume_vector, job_vector = self.vectors(extracted, job_text)
+        payload = orjson.dumps(optimized)
+        facts = orjson.dumps(resume_facts(extracted))
+        with self._lock:
+            slot = self._next
+            if slot == len(self._payloads):
+                if slot == len(self._resumes):
+                    capacity = min(max(2 * slot, 16), self.max_entries)
+                    self._resumes = self._grown(self._resumes, capacity)
+                    self._jobs = self._grown(self._jobs, capacity)
+                self._payloads.append(payload)
+                self._facts.append(facts)
+            else:
+                self._payloads[slot] = payload
+                self._facts[slot] = facts
+            self._resumes[slot] = resume_vector
+            self._jobs[slot] = job_vector
+            if self._buckets is not None:
+                self._buckets.add(slot, self._pair(resume_vector, job_vector))
+            self._next = (slot + 1) % self.max_entries
+
+    def __len__(self):
+        return len(self._payloads)
+
+    def stats(self):
+        """Lookups, reuses and the hit rate so far"""
+        with self._lock:
+            return {
+                'entries': len(self._payloads),
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'hit_rate': self.hits / self.lookups if self.lookups else 0.0,
+                'threshold': self.threshold,
+                'index': self.index,
+            }
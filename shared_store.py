@@ -0,0 +1,191 @@
+import hashlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+import orjson
+
+# Path of the SQLite file shared by every server process on the box; unset keeps
+# all caches and job state in-process (the single-process default)
+DEFAULT_SHARED_STORE = os.environ.get("RESUME_SHARED_STORE")
+# Oldest entries of a namespace are dropped beyond this many
+DEFAULT_MAX_ENTRIES = int(os.environ.get("RESUME_SHARED_MAX_ENTRIES", "2000"))
+# A running job whose status hasn't been refreshed for this long is assumed dead
+JOB_STALE_SECONDS = 10.0
+BUSY_TIMEOUT_MS = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS entries_age ON entries (namespace, updated_at);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    status BLOB NOT NULL,
+    finished INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def process_owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def cache_key(*parts):
+    """Stable hash of JSON-serialisable parts (dataclasses included)"""
+    return hashlib.sha256(orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class SharedStore:
+    """Key/value blobs and job status in one SQLite file (WAL), safe across threads and processes"""
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.owner = process_owner()
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        """One connection per thread; WAL lets readers run while another process writes"""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.db = db
+        return db
+
+    # Blobs
+    def get(self, namespace, key):
+        row = self._connect().execute(
+            "SELECT value FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, namespace, key, value):
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, updated_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, value, time.time())
+            )
+            db.execute(
+                "DELETE FROM entries WHERE namespace = ? AND key IN ("
+                " SELECT key FROM entries WHERE namespace = ? ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (namespace, namespace, self.max_entries)
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def update(self, namespace, key, merge):
+        """Atomically replace an entry with merge(old_value_or_None); returns the new value"""
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")  # takes the write lock first, so concurrent merges don't lose fields
+        try:
+            row = db.execute("SELECT value FROM entries WHERE namespace = ? AND key = ?", (namespace, key)).fetchone()
+            value = merge(row[0] if row else None)
+            db.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, updated_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, value, time.time())
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return value
+
+    def get_or_create(self, namespace, key, produce):
+        """Cached value (bytes or str) for key, or produce() it and share the result with every process"""
+        value = self.get(namespace, key)
+        if value is None:
+            value = produce()
+            self.put(namespace, key, value)
+        return value
+
+    # Job status
+    def publish_job(self, job_id, progress):
+        """Record a job's latest Progress (as a dict) under this process"""
+        self._connect().execute(
+            "INSERT OR REPLACE INTO jobs (job_id, owner, status, finished, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, self.owner, orjson.dumps(progress), int(progress['finished']), time.time())
+        )
+
+    def job(self, job_id):
+        row = self._connect().execute(
+            "SELECT owner, status, finished, updated_at FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return self._job_row(job_id, *row) if row else None
+
+    def jobs(self, running_only=False):
+        """Published jobs from every process, most recently updated first"""
+        rows = self._connect().execute(
+            "SELECT job_id, owner, status, finished, updated_at FROM jobs ORDER BY updated_at DESC"
+        ).fetchall()
+        jobs = [self._job_row(*row) for row in rows]
+        return [job for job in jobs if job['running']] if running_only else jobs
+
+    def _job_row(self, job_id, owner, status, finished, updated_at):
+        return {
+            'job_id': job_id,
+            'owner': owner,
+            'progress': orjson.loads(status),
+            'updated_at': updated_at,
+            'running': not finished and time.time() - updated_at < JOB_STALE_SECONDS,
+        }
+
+    def stats(self):
+        rows = self._connect().execute(
+            "SELECT namespace, COUNT(*), SUM(LENGTH(value)) FROM entries GROUP BY namespace"
+        ).fetchall()
+        return {
+            'path': self.path,
+            'namespaces': {namespace: {'entries': count, 'bytes': size} for namespace, count, size in rows},
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def shared_store(path=DEFAULT_SHARED_STORE):
+    """Process-wide SharedStore for path, or None when no shared store is configured"""
+    if not path:
+        return None
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = SharedStore(path)
+        return _stores[path]
+
+
+def cached_render(fmt, render, resume, *variant, store=None):
+    """render() once per format, resume and variant (theme, brand...) across every server process"""
+    store = store or shared_store()
+    if store is None:
+        return render()
+
+    def produce():
+        data = render()
+        return data.getvalue() if hasattr(data, 'getvalue') else data  # renderers may hand back a BytesIO
+
+    return store.get_or_create('renders', cache_key(fmt, resume, *variant), produce)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Keep the modules' on-disk state out of the working tree while they are imported
+os.environ.setdefault("RESUME_RATE_STATE", "")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
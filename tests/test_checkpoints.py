@@ -0,0 +1,81 @@
+import os
+from dataclasses import dataclass
+
+import orjson
+
+from checkpoints import BatchCheckpoint, ItemPlan, list_batches
+
+
+@dataclass(slots=True)
+class Spec:
+    department: str = "Engineering"
+    count: int = 3
+
+
+def make_batch(root, count=3):
+    plan = [ItemPlan(index, f"seed-{index}", f"Person {index}", 2) for index in range(count)]
+    return BatchCheckpoint.create(Spec(count=count), plan, str(root))
+
+
+def resume(name):
+    return {'name': name, 'skills': ["Python"]}
+
+
+def items_bytes(checkpoint):
+    with open(os.path.join(checkpoint.path, "items.jsonl"), "rb") as f:
+        return f.read()
+
+
+def test_reopen_after_truncation_seals_the_torn_line(tmp_path):
+    checkpoint = make_batch(tmp_path)
+    checkpoint.record_done(0, resume("A"), {})
+    checkpoint.record_done(1, resume("B"), {})
+    checkpoint.close()
+    items_path = os.path.join(checkpoint.path, "items.jsonl")
+    os.truncate(items_path, os.path.getsize(items_path) - 5)  # crash mid-write of the second record
+
+    reopened = BatchCheckpoint.open(checkpoint.batch_id, str(tmp_path))
+    assert set(reopened.completed()) == {0}
+    reopened.record_done(2, resume("C"), {})
+    reopened.close()
+
+    lines = items_bytes(reopened).split(b"\n")
+    assert lines[-1] == b""
+    assert orjson.loads(lines[-2])['index'] == 2  # the new record is on a line of its own
+    again = BatchCheckpoint.open(checkpoint.batch_id, str(tmp_path))
+    assert set(again.completed()) == {0, 2}
+    assert [item.index for item in again.missing()] == [1]
+    again.close()
+
+
+def test_reopen_of_an_intact_file_adds_nothing(tmp_path):
+    checkpoint = make_batch(tmp_path)
+    checkpoint.record_done(0, resume("A"), {})
+    checkpoint.close()
+    before = items_bytes(checkpoint)
+    BatchCheckpoint.open(checkpoint.batch_id, str(tmp_path)).close()
+    assert items_bytes(checkpoint) == before
+
+
+def test_list_batches_is_read_only(tmp_path):
+    checkpoint = make_batch(tmp_path, count=3)
+    checkpoint.record_failed(0, "boom")
+    checkpoint.record_done(0, resume("A"), {})
+    checkpoint.record_failed(1, "boom")
+    checkpoint.close()
+    items_path = os.path.join(checkpoint.path, "items.jsonl")
+    with open(items_path, "ab") as f:
+        f.write(b'{"index":2,"status":"do')  # a write still in progress
+    before = items_bytes(checkpoint)
+
+    [summary] = list_batches(str(tmp_path))
+    assert (summary['total'], summary['done'], summary['failed']) == (3, 1, 1)
+    assert summary['spec']['department'] == "Engineering"
+    assert items_bytes(checkpoint) == before
+    assert list_batches(str(tmp_path), incomplete_only=True) == [summary]
+
+
+def test_list_batches_skips_directories_without_a_manifest(tmp_path):
+    os.makedirs(tmp_path / "not-a-batch")
+    assert list_batches(str(tmp_path)) == []
+    assert list_batches(str(tmp_path / "missing")) == []
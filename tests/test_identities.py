@@ -0,0 +1,42 @@
+import orjson
+import pytest
+
+from identities import AffinePermutation, FeistelPermutation, IdentityAllocator
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 7, 1000, 4097])
+def test_feistel_permutation_is_a_bijection(n):
+    permutation = FeistelPermutation(n, "salt")
+    assert sorted(permutation(k) for k in range(n)) == list(range(n))
+
+
+def test_feistel_permutation_depends_on_the_salt():
+    first, second = FeistelPermutation(1000, "a"), FeistelPermutation(1000, "b")
+    assert [first(k) for k in range(20)] != [second(k) for k in range(20)]
+    assert [first(k) for k in range(20)] == [FeistelPermutation(1000, "a")(k) for k in range(20)]
+
+
+def test_feistel_permutation_has_no_constant_stride():
+    permutation = FeistelPermutation(100_000, "salt")
+    values = [permutation(k) for k in range(50)]
+    strides = {(b - a) % 100_000 for a, b in zip(values, values[1:])}
+    assert len(strides) > 40
+
+
+def test_allocator_never_repeats_and_replays_runs(tmp_path):
+    path = str(tmp_path / "identities.json")
+    allocator = IdentityAllocator(path)
+    first = allocator.reserve("run-1", ["A"] * 200 + ["B"] * 50)
+    second = IdentityAllocator(path).reserve("run-2", ["A"] * 200)
+    for field in ("name", "email", "phone"):
+        values = [getattr(identity, field) for identity in first + second]
+        assert len(set(values)) == len(values)
+    assert IdentityAllocator(path).reserve("run-1", ["A"] * 200 + ["B"] * 50) == first
+
+
+def test_legacy_state_keeps_the_affine_permutation(tmp_path):
+    path = tmp_path / "identities.json"
+    path.write_bytes(orjson.dumps({'salt': 42, 'next': {}, 'next_phone': 0, 'runs': {}}))
+    allocator = IdentityAllocator(str(path))
+    assert isinstance(allocator._phones, AffinePermutation)
+    assert isinstance(IdentityAllocator(str(tmp_path / "new.json"))._phones, FeistelPermutation)
@@ -0,0 +1,28 @@
+from keywords import SkillMatcher
+
+TAXONOMY = {
+    'skills': {
+        'Languages': {"Java": [], "JavaScript": ["es6"], "Swift": [], "SQL": [], "NoSQL": []},
+        'Frameworks': {"Spring": ["spring framework"], "Spring Boot": [], "Express": ["express.js"]},
+    },
+    'case_sensitive': ["Express", "Spring", "Swift"],
+}
+
+
+def test_matches_on_word_boundaries():
+    matcher = SkillMatcher(TAXONOMY)
+    assert matcher.scan("JavaScript and NoSQL") == {"JavaScript": 1, "NoSQL": 1}
+    assert matcher.scan("java,\nsql") == {"Java": 1, "SQL": 1}
+
+
+def test_ambiguous_words_only_match_as_written():
+    matcher = SkillMatcher(TAXONOMY)
+    assert not matcher.scan("In spring we express ideas at a swift pace")
+    assert matcher.scan("Services in Spring and Express, apps in Swift") == {"Spring": 1, "Express": 1, "Swift": 1}
+
+
+def test_context_aliases_match_in_any_case():
+    matcher = SkillMatcher(TAXONOMY)
+    found = matcher.scan("SPRING FRAMEWORK, spring boot and express.js")
+    assert found["Spring"] == 1 and found["Spring Boot"] == 1 and found["Express"] == 1
+    assert matcher.scan("SpringBoot") == {}
@@ -0,0 +1,39 @@
+import pytest
+
+from layout import available_themes, compile_resume
+from renderers import export_formats, render_html
+
+RESUME = {
+    'name': "Ada Lovelace",
+    'email': "ada@example.com",
+    'phone': "555-0100",
+    'summary': "Engineer <who> writes & ships.",
+    'skills': ["Python", "SQL"],
+    'experience': [{'title': "Engineer", 'company': "Analytical Engines", 'duration': "2020-2024",
+                    'responsibilities': ["Built the thing", "Measured the thing"]}],
+    'education': [{'degree': "BSc Mathematics", 'university': "London", 'year': "2019"}],
+}
+
+
+@pytest.mark.parametrize("theme", available_themes())
+def test_sections_follow_the_theme_and_skip_empty_ones(theme):
+    tree = compile_resume(RESUME, theme)
+    ordered = [section['key'] for section in tree.theme.sections]
+    keys = [section.key for section in tree.sections]
+    assert keys == [key for key in ordered if key in keys]
+    assert 'projects' not in keys and 'certifications' not in keys
+
+
+@pytest.mark.parametrize("theme", available_themes())
+def test_every_backend_renders_the_same_tree(theme):
+    outputs = export_formats(RESUME, ('pdf', 'docx', 'html', 'md', 'txt'), theme=theme)
+    assert outputs['pdf'].getvalue().startswith(b"%PDF")
+    assert outputs['docx'].getvalue().startswith(b"PK")
+    for fmt in ('html', 'md', 'txt'):
+        assert "Analytical Engines" in outputs[fmt]
+
+
+def test_html_escapes_resume_text():
+    html = render_html(compile_resume(RESUME, 'modern'))
+    assert "&lt;who&gt; writes &amp; ships" in html
+    assert "<who>" not in html
@@ -0,0 +1,51 @@
+import time
+
+from prefetch import Prefetcher
+
+
+def fail():
+    raise RuntimeError("model unavailable")
+
+
+def settle(prefetcher, key, timeout=2.0):
+    """Wait until the work for key is done and its outcome recorded"""
+    end = time.monotonic() + timeout
+    while prefetcher.pending(key) is not None and time.monotonic() < end:
+        prefetcher.wait(key, timeout)
+
+
+def test_failed_key_is_not_retried_until_it_expires():
+    prefetcher = Prefetcher(max_workers=1, retry_after=60.0)
+    prefetcher.submit('k', fail)
+    settle(prefetcher, 'k')
+    assert prefetcher.submit('k', lambda: "ok") is None
+    assert prefetcher.stats()['failed'] == 1
+
+
+def test_retry_after_failure_once_expired():
+    prefetcher = Prefetcher(max_workers=1, retry_after=0.0)
+    prefetcher.submit('k', fail)
+    settle(prefetcher, 'k')
+    future = prefetcher.submit('k', lambda: "ok")
+    assert future is not None
+    assert future.result(timeout=2.0) == "ok"
+    settle(prefetcher, 'k')
+    assert prefetcher.stats() == {'pending': 0, 'started': 2, 'failed': 1}
+
+
+def test_forget_allows_an_immediate_retry():
+    prefetcher = Prefetcher(max_workers=1, retry_after=60.0)
+    prefetcher.submit('k', fail)
+    settle(prefetcher, 'k')
+    prefetcher.forget('k')
+    assert prefetcher.submit('k', lambda: "ok").result(timeout=2.0) == "ok"
+
+
+def test_pending_work_is_shared_per_key():
+    prefetcher = Prefetcher(max_workers=1)
+    blocker = prefetcher.submit('slow', time.sleep, 0.2)
+    first = prefetcher.submit('k', lambda: "ok")
+    assert prefetcher.submit('k', lambda: "other") is first
+    assert first.result(timeout=2.0) == "ok"
+    blocker.result(timeout=2.0)
+    assert prefetcher.wait('missing') is False
@@ -0,0 +1,43 @@
+import threading
+import time
+
+from preview import DebouncedRenderer
+
+
+def wait_for_exit(renderer, timeout=2.0):
+    end = time.monotonic() + timeout
+    while renderer._thread is not None and time.monotonic() < end:
+        time.sleep(0.01)
+    return renderer._thread is None
+
+
+def test_renders_the_latest_submission():
+    renderer = DebouncedRenderer(lambda payload: f"<p>{payload['name']}</p>", delay=0.01)
+    renderer.submit({'name': "A"})
+    renderer.submit({'name': "B"})
+    assert renderer.wait(timeout=2.0) == "<p>B</p>"
+    assert not renderer.is_stale()
+    renderer.close()
+
+
+def test_worker_exits_when_idle_and_restarts_on_submit():
+    before = threading.active_count()
+    renderer = DebouncedRenderer(str.upper, delay=0.0, idle_timeout=0.05)
+    assert renderer._thread is None  # nothing to do yet
+    renderer.submit("a")
+    assert renderer.wait(timeout=2.0) == "A"
+    assert wait_for_exit(renderer)
+    assert threading.active_count() == before
+    renderer.submit("b")
+    assert renderer.wait(timeout=2.0) == "B"
+    renderer.close()
+    assert wait_for_exit(renderer)
+
+
+def test_close_drops_pending_work():
+    renderer = DebouncedRenderer(str.upper, delay=60.0)
+    renderer.submit("never")
+    renderer.close()
+    assert wait_for_exit(renderer)
+    assert renderer.wait(timeout=0.5) is None
+    assert not renderer.is_stale()
@@ -0,0 +1,55 @@
+import rate_control
+from rate_control import MIN_HEDGE_SAMPLES, AdaptiveRateController, CallBudget, Race
+
+
+class EchoChain:
+    def invoke(self, inputs):
+        return inputs
+
+
+def record(controller, stage, latencies):
+    for latency in latencies:
+        controller.release(latency=latency, stage=stage)
+
+
+def test_hedge_delay_is_kept_per_stage():
+    controller = AdaptiveRateController()
+    record(controller, 'extract', [1.0] * MIN_HEDGE_SAMPLES)
+    record(controller, 'optimize', [10.0] * MIN_HEDGE_SAMPLES)
+    assert controller.hedge_delay('extract') == 1.0
+    assert controller.hedge_delay('optimize') == 10.0
+    assert controller.hedge_delay('generate') is None
+
+
+def test_hedge_delay_waits_for_enough_samples():
+    controller = AdaptiveRateController()
+    record(controller, 'extract', [1.0] * (MIN_HEDGE_SAMPLES - 1))
+    assert controller.hedge_delay('extract') is None
+    record(controller, 'extract', [3.0])
+    assert controller.hedge_delay('extract') == 3.0  # the p95 of the window
+
+
+def test_race_hedges_on_its_own_stage():
+    controller = AdaptiveRateController()
+    record(controller, 'extract', [1.0] * MIN_HEDGE_SAMPLES)
+    record(controller, 'optimize', [10.0] * MIN_HEDGE_SAMPLES)
+    budget = CallBudget(deadline=None, hedge=True)
+    for stage, delay in (('extract', 1.0), ('optimize', 10.0)):
+        race = Race(controller, budget, stage)
+        assert race.hedge_at - race.start == delay
+    assert Race(controller, budget, 'generate').hedge_at is None
+
+
+def test_invoke_records_latency_under_its_stage():
+    controller = AdaptiveRateController()
+    controller.spacing = 0.0  # stays 0: successes only ever shrink it
+    for _ in range(MIN_HEDGE_SAMPLES):
+        assert controller.invoke(EchoChain(), "x", stage='extract') == "x"
+    assert controller.hedge_delay('extract') is not None
+    assert controller.hedge_delay('optimize') is None
+    assert controller.in_flight == 0
+
+
+def test_hedging_is_off_by_default():
+    assert rate_control.HEDGE_BY_DEFAULT is False
+    assert not any(budget.hedge for budget in rate_control.STAGE_BUDGETS.values())
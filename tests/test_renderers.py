@@ -0,0 +1,34 @@
+from layout import compile_resume
+from renderers import FAST_MAX_PAGES, render_pdf, render_pdf_canvas, text_width, wrap_runs
+
+RESUME = {
+    'name': "Ada Lovelace",
+    'email': "ada@example.com",
+    'summary': "Engineer.",
+    'skills': ["Python", "SQL"],
+    'experience': [{'title': "Engineer", 'company': "Analytical Engines", 'duration': "2020-2024",
+                    'responsibilities': ["Built the thing", "Measured the thing"]}],
+}
+
+
+def long_resume(bullets):
+    return dict(RESUME, experience=[dict(RESUME['experience'][0], responsibilities=["Did work " * 30] * bullets)])
+
+
+def test_canvas_renderer_draws_a_short_resume():
+    buffer = render_pdf_canvas(compile_resume(RESUME, 'classic'))
+    assert buffer is not None and buffer.getvalue().startswith(b"%PDF")
+
+
+def test_canvas_renderer_gives_up_past_its_page_budget():
+    assert render_pdf_canvas(compile_resume(long_resume(200), 'classic'), max_pages=FAST_MAX_PAGES) is None
+    assert render_pdf(long_resume(200), engine="auto").getvalue().startswith(b"%PDF")  # platypus fallback
+
+
+def test_wrap_runs_keeps_lines_within_width():
+    runs = (("lorem ipsum dolor sit amet " * 20, "Helvetica"),)
+    lines = wrap_runs(runs, 10, 200.0)
+    assert len(lines) > 1
+    for line in lines:
+        assert sum(text_width(text, font, 10) for text, font in line) <= 200.0
+    assert " ".join(text for line in lines for text, _ in line).split() == runs[0][0].split()